@@ -1,18 +1,59 @@
 """AI services for photo analysis, video behavior analysis, and dog matching."""
 
-from .dog_matcher import DogMatcher, GeoLocation, LostDogNotice, StrayDogReport
-from .gemini_client import GeminiClient
-from .mock_gemini_client import MockGeminiClient
-from .photo_analyzer import PhotoAnalyzer
-from .video_analyzer import VideoAnalyzer
+from .comparison_cache import ComparisonCache
+from .dog_attributes import AttributePruner, DogAttributes
+from .dog_matcher import (
+    AsyncDogMatcher,
+    DogMatcher,
+    GeoLocation,
+    LostDogNotice,
+    MatchBudget,
+    StandingNotice,
+    StrayDogReport,
+)
+from .gemini_client import AsyncGeminiClient, GeminiClient
+from .hedging import HedgingPolicy
+from .image_preprocessor import ImagePreprocessor
+from .keyframes import KeyframeSampler
+from .match_cascade import MatchCascade
+from .match_jobs import MatchJobWorkerPool
+from .mock_gemini_client import AsyncMockGeminiClient, MockGeminiClient
+from .photo_analyzer import AsyncPhotoAnalyzer, PhotoAnalyzer
+from .rate_limiter import QuotaRateLimiter, RetryPolicy
+from .request_coalescer import RequestCoalescer
+from .response_cache import ResponseCache
+from .standing_notices import StandingNoticeMatcher
+from .upload_registry import UploadedFileRegistry
+from .video_analyzer import AsyncVideoAnalyzer, VideoAnalyzer
 
 __all__ = [
     "GeminiClient",
+    "AsyncGeminiClient",
     "MockGeminiClient",
+    "AsyncMockGeminiClient",
     "PhotoAnalyzer",
+    "AsyncPhotoAnalyzer",
     "VideoAnalyzer",
+    "AsyncVideoAnalyzer",
+    "ResponseCache",
+    "RequestCoalescer",
+    "QuotaRateLimiter",
+    "RetryPolicy",
+    "HedgingPolicy",
+    "ImagePreprocessor",
+    "UploadedFileRegistry",
+    "ComparisonCache",
+    "AttributePruner",
+    "KeyframeSampler",
+    "MatchCascade",
+    "MatchJobWorkerPool",
     "DogMatcher",
+    "AsyncDogMatcher",
     "GeoLocation",
+    "DogAttributes",
     "LostDogNotice",
+    "MatchBudget",
+    "StandingNotice",
+    "StandingNoticeMatcher",
     "StrayDogReport",
 ]
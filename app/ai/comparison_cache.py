@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Collection, Optional
+
+from app.db.sqlite import SQLiteDatabase
+
+from .response_cache import part_digest
+
+
+@dataclass(frozen=True)
+class ComparisonKey:
+    """Identity of one notice/report comparison.
+
+    Image hashes are taken over the parts actually sent to the model, so a change
+    in image preprocessing misses the cache just like a new prompt or model does.
+    """
+
+    notice_hash: str
+    report_hash: str
+    prompt_version: str
+    model: str
+
+
+def prompt_version(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def comparison_key(*, notice_part: Any, report_part: Any, prompt: str, model: str) -> Optional[ComparisonKey]:
+    """Key for a comparison, or None when either part cannot be identified by content."""
+    notice_hash = part_digest(notice_part)
+    report_hash = part_digest(report_part)
+    if notice_hash is None or report_hash is None:
+        return None
+    return ComparisonKey(
+        notice_hash=notice_hash,
+        report_hash=report_hash,
+        prompt_version=prompt_version(prompt),
+        model=model,
+    )
+
+
+class ComparisonCache:
+    """SQLite store of lost-notice/stray-report comparison responses.
+
+    Owners re-run the same notice against a mostly unchanged set of reports, so
+    every pair the model has already judged is answered from here. Entries never
+    expire on their own: editing the prompt file or switching models changes the
+    key, and `purge_stale` drops rows left behind by older prompts or models.
+    Rows live in the `match_comparisons` table of `db`, which must be
+    initialized; stores go through `db.write` without waiting for the commit.
+    """
+
+    def __init__(self, db: SQLiteDatabase, *, clock: Callable[[], float] = time.time) -> None:
+        self.db = db
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "purged": 0}
+
+    def get(self, key: ComparisonKey) -> Optional[dict[str, Any]]:
+        with self.db.connection() as conn:
+            row = conn.execute(
+                """
+                SELECT response FROM match_comparisons
+                WHERE notice_hash = ? AND report_hash = ? AND prompt_version = ? AND model = ?
+                """,
+                (key.notice_hash, key.report_hash, key.prompt_version, key.model),
+            ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(row["response"])
+
+    def set(self, key: ComparisonKey, response: dict[str, Any]) -> None:
+        payload = json.dumps(response, ensure_ascii=True, separators=(",", ":"))
+        created_at = self._clock()
+
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                """
+                INSERT INTO match_comparisons (notice_hash, report_hash, prompt_version, model, response, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(notice_hash, report_hash, prompt_version, model) DO UPDATE SET
+                    response = excluded.response,
+                    created_at = excluded.created_at
+                """,
+                (key.notice_hash, key.report_hash, key.prompt_version, key.model, payload, created_at),
+            )
+
+        self.db.write(write, wait=False)
+        self._count("stores")
+
+    def purge_stale(self, *, prompt_version: str | Collection[str], model: str) -> int:
+        """Delete entries for `model` made with any other prompt version.
+
+        Pass several versions when the model serves more than one prompt, as a
+        MatchCascade tier that shares the image model does.
+        """
+        versions = [prompt_version] if isinstance(prompt_version, str) else sorted(prompt_version)
+        placeholders = ",".join("?" for _ in versions)
+        with self.db.connection(write=True) as conn:
+            deleted = conn.execute(
+                f"DELETE FROM match_comparisons WHERE model = ? AND prompt_version NOT IN ({placeholders})",
+                (model, *versions),
+            ).rowcount
+        with self._lock:
+            self._counters["purged"] += deleted
+        return deleted
+
+    def stats(self) -> dict[str, Any]:
+        with self.db.connection() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM match_comparisons").fetchone()[0]
+        with self._lock:
+            return {**self._counters, "entries": int(entries)}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
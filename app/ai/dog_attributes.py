@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Sequence
+
+
+SIZES = ("small", "medium", "large")
+AGE_GROUPS = ("puppy", "adult", "senior")
+
+# Coat colour words from appearance_tags, folded into families a photo cannot
+# easily confuse: lighting turns tan into golden, never black into white.
+_COLOR_FAMILIES = {
+    "black": "black",
+    "white": "white",
+    "cream": "white",
+    "ivory": "white",
+    "brown": "brown",
+    "chocolate": "brown",
+    "liver": "brown",
+    "tan": "brown",
+    "fawn": "brown",
+    "golden": "brown",
+    "gold": "brown",
+    "yellow": "brown",
+    "red": "brown",
+    "apricot": "brown",
+    "grey": "grey",
+    "gray": "grey",
+    "silver": "grey",
+    "blue": "grey",
+}
+
+_TAG_WORDS = re.compile(r"[a-z]+")
+
+
+@dataclass(frozen=True)
+class DogAttributes:
+    """Normalized PhotoAnalyzer output kept with a report or notice for attribute pruning.
+
+    None (or an empty `colors`) means the attribute is unknown, and unknown
+    attributes never prune.
+    """
+
+    size: Optional[str] = None
+    age_group: Optional[str] = None
+    colors: tuple[str, ...] = ()
+    breed: Optional[str] = None
+
+    @classmethod
+    def from_analysis(cls, analysis: dict[str, Any]) -> "DogAttributes":
+        size = str(analysis.get("size") or "").strip().lower()
+        age_group = str(analysis.get("age_group") or "").strip().lower()
+        breed = str(analysis.get("breed") or "").strip().lower()
+        tags = analysis.get("appearance_tags") or []
+        if isinstance(tags, str):
+            tags = tags.split(",")
+        colors = {
+            _COLOR_FAMILIES[word]
+            for tag in tags
+            for word in _TAG_WORDS.findall(str(tag).lower())
+            if word in _COLOR_FAMILIES
+        }
+        return cls(
+            size=size if size in SIZES else None,
+            age_group=age_group if age_group in AGE_GROUPS else None,
+            colors=tuple(sorted(colors)),
+            breed=breed if breed and breed != "unknown" else None,
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        size: Optional[str],
+        age_group: Optional[str],
+        colors: Optional[str],
+        breed: Optional[str],
+    ) -> Optional["DogAttributes"]:
+        if size is None and age_group is None and not colors and breed is None:
+            return None
+        return cls(
+            size=size,
+            age_group=age_group,
+            colors=tuple(colors.split(",")) if colors else (),
+            breed=breed,
+        )
+
+    def colors_column(self) -> Optional[str]:
+        return ",".join(self.colors) or None
+
+
+def _size_conflict(notice: DogAttributes, report: DogAttributes) -> bool:
+    if notice.size is None or report.size is None:
+        return False
+    return abs(SIZES.index(notice.size) - SIZES.index(report.size)) > 1
+
+
+def _age_conflict(notice: DogAttributes, report: DogAttributes) -> bool:
+    if notice.age_group is None or report.age_group is None:
+        return False
+    return abs(AGE_GROUPS.index(notice.age_group) - AGE_GROUPS.index(report.age_group)) > 1
+
+
+def _color_conflict(notice: DogAttributes, report: DogAttributes) -> bool:
+    if not notice.colors or not report.colors:
+        return False
+    return not set(notice.colors) & set(report.colors)
+
+
+PruningRule = Callable[[DogAttributes, DogAttributes], bool]
+
+# Each rule only fires on a clear contradiction: small vs large, puppy vs senior,
+# or coats with no colour family in common. Adjacent values are left to the model.
+PRUNING_RULES: dict[str, PruningRule] = {
+    "size": _size_conflict,
+    "age_group": _age_conflict,
+    "coat_color": _color_conflict,
+}
+
+
+class AttributePruner:
+    """Skips model comparisons between a notice and reports it clearly cannot match.
+
+    Rules run in the configured order and the first one that fires is credited
+    with the saved call in `stats()`.
+    """
+
+    def __init__(self, rules: Sequence[str] = tuple(PRUNING_RULES)) -> None:
+        unknown = [name for name in rules if name not in PRUNING_RULES]
+        if unknown:
+            raise ValueError(f"Unsupported pruning rules: {unknown}. Use any of {list(PRUNING_RULES)}.")
+        self.rules = tuple(dict.fromkeys(rules))
+        self._lock = threading.Lock()
+        self._counters = {name: 0 for name in self.rules}
+        self._checked = 0
+
+    def conflicting_rule(self, notice: Optional[DogAttributes], report: Optional[DogAttributes]) -> Optional[str]:
+        """Name of the first rule that rules the pair out, or None; counts the check."""
+        if notice is None or report is None:
+            return None
+        matched = next((name for name in self.rules if PRUNING_RULES[name](notice, report)), None)
+        with self._lock:
+            self._checked += 1
+            if matched is not None:
+                self._counters[matched] += 1
+        return matched
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "checked": self._checked,
+                "pruned": sum(self._counters.values()),
+                "pruned_by_rule": dict(self._counters),
+            }
@@ -1,15 +1,60 @@
 from __future__ import annotations
 
-import math
-from dataclasses import dataclass
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional, Protocol, Sequence
+from typing import Any, AsyncGenerator, AsyncIterator, Optional, Protocol, Sequence
 
-from .gemini_client import GeminiClient
+from .comparison_cache import ComparisonCache, ComparisonKey, comparison_key
+from .dog_attributes import AttributePruner, DogAttributes
+from .gemini_client import AsyncGeminiClient, GeminiClient
+from .geo import haversine_km, haversine_km_array, to_epoch_seconds
+from .image_payload import ImageBytes
+from .match_cascade import MatchCascade
+from .visual_embedding import VisualEmbedding, embed_image_source
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    from contextlib import aclosing
+except ImportError:  # pragma: no cover - Python < 3.10
+
+    @asynccontextmanager
+    async def aclosing(stream: Any) -> AsyncGenerator[Any, None]:
+        try:
+            yield stream
+        finally:
+            await stream.aclose()
 
 
 DEFAULT_PROMPT_PATH = Path(__file__).resolve().parents[2] / "prompts" / "lost_dog_match_prompt.txt"
+DEFAULT_BATCH_PROMPT_PATH = Path(__file__).resolve().parents[2] / "prompts" / "lost_dog_match_batch_prompt.txt"
+
+# `input` keeps the caller's order; `nearest` and `recent` put the candidates most
+# likely to be the lost dog first, which matters once a MatchBudget cuts the run short.
+CANDIDATE_ORDERS = ("input", "nearest", "recent")
+
+# Reports and notices are held by the thousand during a match; slots keep each one
+# small. dataclass(slots=...) needs Python 3.10, so 3.9 gets regular instances.
+_SLOTS: dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Set in the worker threads of a budgeted DogMatcher run; once the deadline passes,
+# comparisons still running stop before their next model call.
+_abandoned: ContextVar[Optional[threading.Event]] = ContextVar("dog_matcher_abandoned", default=None)
+
+
+class _RunAbandoned(RuntimeError):
+    """Raised instead of a model call once a budgeted run has stopped waiting for the result."""
 
 
 class MatchNotifier(Protocol):
@@ -20,42 +65,178 @@ class MatchNotifier(Protocol):
         owner_id: str,
         matched_report_ids: list[str],
         similarity_score: float,
+        *,
+        notice_id: Optional[str] = None,
     ) -> None:
         ...
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class GeoLocation:
     latitude: float
     longitude: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class LostDogNotice:
     image_path: Optional[str] = None
     image_base64: Optional[str] = None
     lost_at: Optional[datetime] = None
     location: Optional[GeoLocation] = None
+    image_bytes: Optional[ImageBytes] = field(default=None, repr=False, compare=False)
+    attributes: Optional[DogAttributes] = field(default=None, compare=False)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class StrayDogReport:
     report_id: str
     image_path: Optional[str] = None
     image_base64: Optional[str] = None
     reported_at: Optional[datetime] = None
     location: Optional[GeoLocation] = None
+    image_bytes: Optional[ImageBytes] = field(default=None, repr=False, compare=False)
+    embedding: Optional[VisualEmbedding] = field(default=None, repr=False, compare=False)
+    attributes: Optional[DogAttributes] = field(default=None, compare=False)
+
+
+@dataclass(frozen=True)
+class StandingNotice:
+    """A lost notice kept open so new stray reports are matched against it as they arrive.
+
+    The search limits are per notice; None falls back to the matcher's defaults.
+    """
+
+    notice_id: str
+    notice: LostDogNotice
+    owner_id: Optional[str] = None
+    max_distance_km: Optional[float] = None
+    max_time_gap_hours: Optional[float] = None
+    similarity_threshold: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class SpatiotemporalBatch:
+    """Result of `filter_batch`: per-candidate pass mask and distance to the notice in km.
+
+    Distances are NaN where either side has no location.
+    """
+
+    mask: Any
+    distances_km: Any
+    epochs: Any
+
+    def nearest_first(self) -> Any:
+        """Indices of passing candidates, nearest first; unlocated ones last, stable."""
+        passing = np.flatnonzero(self.mask)
+        distances = self.distances_km[passing]
+        return passing[np.argsort(np.where(np.isnan(distances), np.inf, distances), kind="stable")]
+
+    def most_recent_first(self) -> Any:
+        """Indices of passing candidates, latest report first; undated ones last, stable."""
+        passing = np.flatnonzero(self.mask)
+        epochs = self.epochs[passing]
+        return passing[np.argsort(np.where(np.isnan(epochs), np.inf, -epochs), kind="stable")]
+
+
+@dataclass(frozen=True)
+class MatchBudget:
+    """Request-level limits on one search; None leaves that limit off.
+
+    Reports not scored within the budget are returned as `skipped_report_ids`
+    so the caller can resume with just those later.
+    """
+
+    deadline_seconds: Optional[float] = None
+    max_matches: Optional[int] = None
+    max_model_calls: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class _CandidateOutcome:
+    report_id: str
+    similarity: float = 0.0
+    is_match: bool = False
+    error: Optional[Exception] = None
+    cached: bool = False
+    model_calls: int = 1
+    escalated: bool = False
+    batched: bool = False
+
+
+class _BudgetTracker:
+    """Decides whether another group of candidates may start under a MatchBudget.
+
+    A group reserves the most model calls it can make (see
+    _DogMatcherBase._max_model_calls) before it starts, so `max_model_calls`
+    is never exceeded. Calls are charged once its outcomes are known and the
+    reservation is released; cache hits cost nothing.
+    """
+
+    def __init__(self, budget: MatchBudget) -> None:
+        self.budget = budget
+        self.deadline = None if budget.deadline_seconds is None else time.monotonic() + budget.deadline_seconds
+        self.model_calls = 0
+        self.reserved_calls = 0
+        self.matches = 0
+        self.stop_reason: Optional[str] = None
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def reserve(self, calls: int) -> bool:
+        """Reserve `calls` model calls for a group about to start; False if it may not start."""
+        if self.stop_reason is not None:
+            return False
+        budget = self.budget
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.stop_reason = "deadline"
+        elif budget.max_matches is not None and self.matches >= budget.max_matches:
+            self.stop_reason = "max_matches"
+        elif (
+            budget.max_model_calls is not None
+            and self.model_calls + self.reserved_calls + calls > budget.max_model_calls
+        ):
+            # Running groups may still use fewer calls than they reserved and free some.
+            if self.reserved_calls == 0:
+                self.stop_reason = "max_model_calls"
+            return False
+        if self.stop_reason is not None:
+            return False
+        self.reserved_calls += calls
+        return True
+
+    def record(self, outcome: _CandidateOutcome) -> None:
+        self.model_calls += outcome.model_calls
+        if outcome.error is None and outcome.is_match:
+            self.matches += 1
+
+    def release(self, calls: int) -> None:
+        self.reserved_calls -= calls
+
+    def expire(self) -> None:
+        self.stop_reason = "deadline"
 
 
-class DogMatcher:
+class _DogMatcherBase:
     def __init__(
         self,
-        client: GeminiClient,
+        client: Any,
         prompt_path: Path = DEFAULT_PROMPT_PATH,
         similarity_threshold: float = 70.0,
         max_distance_km: float = 5.0,
         max_time_gap_hours: int = 72,
         temperature: float = 0.2,
+        max_concurrency: int = 1,
+        prefilter_top_k: Optional[int] = None,
+        prefilter_min_similarity: float = 0.0,
+        candidate_order: str = "input",
+        comparison_cache: Optional[ComparisonCache] = None,
+        attribute_pruner: Optional[AttributePruner] = None,
+        cascade: Optional[MatchCascade] = None,
+        batch_size: int = 1,
+        batch_ambiguity_band: float = 5.0,
     ) -> None:
         self.client = client
         self.prompt_path = prompt_path
@@ -63,62 +244,414 @@ class DogMatcher:
         self.max_distance_km = max_distance_km
         self.max_time_gap_hours = max_time_gap_hours
         self.temperature = temperature
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.prefilter_top_k = prefilter_top_k if prefilter_top_k and prefilter_top_k > 0 else None
+        self.prefilter_min_similarity = prefilter_min_similarity
+        self.candidate_order = self._check_order(candidate_order)
+        self.comparison_cache = comparison_cache
+        self.attribute_pruner = attribute_pruner
+        self.cascade = cascade
+        self.batch_size = max(1, int(batch_size))
+        self.batch_ambiguity_band = max(0.0, float(batch_ambiguity_band))
+        self.batch_prompt_path = DEFAULT_BATCH_PROMPT_PATH
 
-    def match_lost_dog(
+    @staticmethod
+    def _check_order(order: str) -> str:
+        if order not in CANDIDATE_ORDERS:
+            raise ValueError(f"Unsupported candidate order: {order}. Use one of {list(CANDIDATE_ORDERS)}.")
+        return order
+
+    @staticmethod
+    def _empty_result() -> dict[str, Any]:
+        return {"is_match": False, "similarity_score": 0.0, "matched_report_ids": []}
+
+    def _eligible_reports(
         self,
-        *,
         notice: LostDogNotice,
         candidate_reports: Sequence[StrayDogReport],
-        owner_id: Optional[str] = None,
-        notifier: Optional[MatchNotifier] = None,
-    ) -> dict[str, Any]:
-        if not candidate_reports:
-            return {"is_match": False, "similarity_score": 0.0, "matched_report_ids": []}
+        order: Optional[str] = None,
+    ) -> list[StrayDogReport]:
+        order = self._check_order(order or self.candidate_order)
+        if np is None:
+            eligible = [report for report in candidate_reports if self._passes_spatiotemporal_filter(notice, report)]
+            return self._sorted_reports(notice, eligible, order)
+        batch = self.filter_batch(notice, *self._report_columns(candidate_reports))
+        if order == "nearest":
+            indices = batch.nearest_first()
+        elif order == "recent":
+            indices = batch.most_recent_first()
+        else:
+            indices = np.flatnonzero(batch.mask)
+        return [candidate_reports[index] for index in indices]
 
-        prompt = self._load_prompt()
-        notice_part = self.client.build_image_part(
+    def _sorted_reports(
+        self,
+        notice: LostDogNotice,
+        reports: list[StrayDogReport],
+        order: str,
+    ) -> list[StrayDogReport]:
+        if order == "nearest" and notice.location:
+            origin = notice.location
+
+            def distance(report: StrayDogReport) -> float:
+                if report.location is None:
+                    return float("inf")
+                return self._haversine_km(
+                    origin.latitude,
+                    origin.longitude,
+                    report.location.latitude,
+                    report.location.longitude,
+                )
+
+            return sorted(reports, key=distance)
+        if order == "recent":
+
+            def age(report: StrayDogReport) -> float:
+                return -to_epoch_seconds(report.reported_at) if report.reported_at else float("inf")
+
+            return sorted(reports, key=age)
+        return reports
+
+    def filter_batch(
+        self,
+        notice: LostDogNotice,
+        latitudes: Any,
+        longitudes: Any,
+        epochs: Any,
+    ) -> SpatiotemporalBatch:
+        """Vectorised `_passes_spatiotemporal_filter` over columnar candidate data.
+
+        `latitudes`, `longitudes` and `epochs` (POSIX seconds) are equal-length
+        array-likes; NaN marks a missing location or report time, which passes
+        that check as it does per report.
+        """
+        if np is None:
+            raise RuntimeError("numpy is required for batch spatiotemporal filtering.")
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        epochs = np.asarray(epochs, dtype=np.float64)
+        mask = np.ones(latitudes.shape, dtype=bool)
+
+        if notice.lost_at:
+            gaps = np.abs(epochs - to_epoch_seconds(notice.lost_at))
+            mask &= ~(gaps > self.max_time_gap_hours * 3600.0)
+
+        if notice.location:
+            distances = haversine_km_array(notice.location.latitude, notice.location.longitude, latitudes, longitudes)
+            mask &= ~(distances > self.max_distance_km)
+        else:
+            distances = np.full(latitudes.shape, np.nan)
+
+        return SpatiotemporalBatch(mask=mask, distances_km=distances, epochs=epochs)
+
+    @staticmethod
+    def _report_columns(reports: Sequence[StrayDogReport]) -> tuple[Any, Any, Any]:
+        count = len(reports)
+        latitudes = np.full(count, np.nan)
+        longitudes = np.full(count, np.nan)
+        epochs = np.full(count, np.nan)
+        for index, report in enumerate(reports):
+            if report.location:
+                latitudes[index] = report.location.latitude
+                longitudes[index] = report.location.longitude
+            if report.reported_at:
+                epochs[index] = to_epoch_seconds(report.reported_at)
+        return latitudes, longitudes, epochs
+
+    def _prefilter(
+        self,
+        notice: LostDogNotice,
+        reports: Sequence[StrayDogReport],
+    ) -> tuple[list[StrayDogReport], list[str]]:
+        """Keep the `prefilter_top_k` reports most visually similar to the notice.
+
+        Reports whose tagged attributes contradict the notice's (see
+        AttributePruner) are dropped first. Similarity comes from local
+        embeddings (stored at upsert, or computed here for inline candidates),
+        so only the survivors cost a Gemini call. Reports below
+        `prefilter_min_similarity` are dropped outright; reports that cannot be
+        embedded are never dropped by the floor and rank after embedded ones.
+        Survivors keep their original order. Returns (kept, pruned report ids).
+        """
+        reports, attribute_pruned = self._prune_by_attributes(notice, reports)
+        if not reports or (self.prefilter_top_k is None and self.prefilter_min_similarity <= 0):
+            return list(reports), attribute_pruned
+        notice_embedding = embed_image_source(
+            image_bytes=notice.image_bytes,
             image_base64=notice.image_base64,
             image_path=notice.image_path,
         )
+        if notice_embedding is None:
+            return list(reports), attribute_pruned
 
-        matched_report_ids: list[str] = []
-        highest_similarity = 0.0
-
-        for report in candidate_reports:
-            if not self._passes_spatiotemporal_filter(notice, report):
-                continue
-
-            report_part = self.client.build_image_part(
+        ranked: list[tuple[Optional[float], int]] = []
+        for position, report in enumerate(reports):
+            embedding = report.embedding or embed_image_source(
+                image_bytes=report.image_bytes,
                 image_base64=report.image_base64,
                 image_path=report.image_path,
             )
-            raw = self.client.generate_json(
-                prompt,
-                parts=[notice_part, report_part],
-                model="image",
-                temperature=self.temperature,
-            )
+            similarity = None if embedding is None else notice_embedding.similarity(embedding)
+            if similarity is not None and similarity < self.prefilter_min_similarity:
+                continue
+            ranked.append((similarity, position))
 
-            similarity = self._normalize_similarity(raw.get("similarity_score"))
-            highest_similarity = max(highest_similarity, similarity)
+        ranked.sort(key=lambda item: (item[0] is None, -(item[0] or 0.0), item[1]))
+        kept_positions = {position for _, position in ranked[: self.prefilter_top_k]}
+        kept = [report for position, report in enumerate(reports) if position in kept_positions]
+        pruned = [report.report_id for position, report in enumerate(reports) if position not in kept_positions]
+        return kept, attribute_pruned + pruned
+
+    def _prune_by_attributes(
+        self,
+        notice: LostDogNotice,
+        reports: Sequence[StrayDogReport],
+    ) -> tuple[list[StrayDogReport], list[str]]:
+        if self.attribute_pruner is None or notice.attributes is None:
+            return list(reports), []
+        kept: list[StrayDogReport] = []
+        pruned: list[str] = []
+        for report in reports:
+            if self.attribute_pruner.conflicting_rule(notice.attributes, report.attributes) is None:
+                kept.append(report)
+            else:
+                pruned.append(report.report_id)
+        return kept, pruned
 
-            model_is_match = bool(raw.get("is_match", False))
-            if model_is_match or similarity >= self.similarity_threshold:
-                matched_report_ids.append(report.report_id)
+    def _outcome_from_response(self, report_id: str, raw: dict[str, Any], *, cached: bool = False) -> _CandidateOutcome:
+        similarity = self._normalize_similarity(raw.get("similarity_score"))
+        model_is_match = bool(raw.get("is_match", False))
+        return _CandidateOutcome(
+            report_id=report_id,
+            similarity=similarity,
+            is_match=model_is_match or similarity >= self.similarity_threshold,
+            cached=cached,
+            model_calls=0 if cached else 1,
+        )
 
-        is_match = len(matched_report_ids) > 0
-        if is_match and owner_id and notifier:
-            notifier.notify_possible_match(
-                owner_id=owner_id,
-                matched_report_ids=matched_report_ids,
-                similarity_score=highest_similarity,
+    def _escalated_outcome(
+        self,
+        screened: _CandidateOutcome,
+        report_id: str,
+        raw: dict[str, Any],
+        *,
+        cached: bool,
+    ) -> _CandidateOutcome:
+        outcome = self._outcome_from_response(report_id, raw, cached=cached and screened.cached)
+        return replace(outcome, model_calls=screened.model_calls + (0 if cached else 1), escalated=True)
+
+    def _image_part(self, source: LostDogNotice | StrayDogReport) -> Any:
+        """Gemini part for the notice or report image; decoding and resizing make this CPU-bound."""
+        return self.client.build_image_part(
+            image_bytes=source.image_bytes,
+            image_base64=source.image_base64,
+            image_path=source.image_path,
+        )
+
+    def _max_model_calls(self, reports: Sequence[StrayDogReport]) -> int:
+        """Most model calls scoring `reports` as one group can make.
+
+        That is the batched call, then every candidate re-scored pairwise, which
+        takes a screening and an escalation call under a cascade.
+        """
+        per_candidate = 1 if self.cascade is None else 2
+        return (1 if len(reports) > 1 else 0) + per_candidate * len(reports)
+
+    def _groups(self, reports: Sequence[StrayDogReport]) -> list[tuple[int, Sequence[StrayDogReport]]]:
+        """Split reports into (start index, reports) units of at most `batch_size` scored together."""
+        size = self.batch_size
+        return [(start, reports[start : start + size]) for start in range(0, len(reports), size)]
+
+    def _load_batch_prompt(self) -> str:
+        if not self.batch_prompt_path.exists():
+            raise FileNotFoundError(f"Prompt file not found: {self.batch_prompt_path}")
+        return self.batch_prompt_path.read_text(encoding="utf-8")
+
+    def _batch_tier(self) -> str:
+        # With a cascade, a batch takes the place of the per-candidate screening call.
+        return "image" if self.cascade is None else self.cascade.screen_tier
+
+    def _batch_is_ambiguous(self, similarity: float) -> bool:
+        return abs(similarity - self.similarity_threshold) <= self.batch_ambiguity_band
+
+    def _batch_keys(
+        self,
+        notice_part: Any,
+        report_parts: Sequence[Any],
+    ) -> tuple[str, str, list[Optional[ComparisonKey]]]:
+        """(prompt, tier, per-report cache keys) of a batched comparison."""
+        batch_prompt = self._load_batch_prompt()
+        tier = self._batch_tier()
+        keys = [self._comparison_key(batch_prompt, notice_part, part, tier) for part in report_parts]
+        return batch_prompt, tier, keys
+
+    def _cached_batch_entries(
+        self,
+        keys: Sequence[Optional[ComparisonKey]],
+    ) -> dict[int, tuple[dict[str, Any], bool]]:
+        """Batch answers already in the comparison cache, as {position: (entry, cached)}."""
+        cache = self.comparison_cache
+        entries: dict[int, tuple[dict[str, Any], bool]] = {}
+        if cache is None:
+            return entries
+        for position, key in enumerate(keys):
+            hit = cache.get(key) if key is not None else None
+            if hit is not None:
+                entries[position] = (hit, True)
+        return entries
+
+    def _store_batch_response(
+        self,
+        raw: dict[str, Any],
+        uncached: Sequence[int],
+        keys: Sequence[Optional[ComparisonKey]],
+        entries: dict[int, tuple[dict[str, Any], bool]],
+    ) -> None:
+        """Add the usable entries of a batched response to `entries` and the comparison cache."""
+        cache = self.comparison_cache
+        for slot, entry in self._batch_entries(raw, len(uncached)).items():
+            position = uncached[slot]
+            entries[position] = (entry, False)
+            if cache is not None and keys[position] is not None:
+                cache.set(keys[position], entry)
+
+    def _partition_batch(
+        self,
+        reports: Sequence[StrayDogReport],
+        entries: dict[int, tuple[dict[str, Any], bool]],
+    ) -> tuple[dict[int, _CandidateOutcome], dict[int, _CandidateOutcome]]:
+        """Split batch answers into settled outcomes and ambiguous ones to escalate.
+
+        With a cascade the batch was the screening call, so an ambiguous answer
+        goes straight to the escalation tier. Without one it is left out of both
+        and the candidate is re-scored pairwise, like one the batch skipped.
+        """
+        settled: dict[int, _CandidateOutcome] = {}
+        escalate: dict[int, _CandidateOutcome] = {}
+        for position, (entry, cached) in entries.items():
+            outcome = replace(
+                self._outcome_from_response(reports[position].report_id, entry, cached=cached),
+                model_calls=0,
+                batched=True,
             )
+            if self.cascade is not None:
+                if self.cascade.should_escalate(outcome.similarity, self.similarity_threshold):
+                    escalate[position] = outcome
+                else:
+                    settled[position] = outcome
+            elif not self._batch_is_ambiguous(outcome.similarity):
+                settled[position] = outcome
+        return settled, escalate
 
-        return {
-            "is_match": is_match,
+    @staticmethod
+    def _group_outcomes(outcomes: dict[int, _CandidateOutcome], count: int, calls: int) -> list[_CandidateOutcome]:
+        """Outcomes in report order, with the group's batched calls charged to the first."""
+        ordered = [outcomes[position] for position in range(count)]
+        if calls:
+            ordered[0] = replace(ordered[0], model_calls=ordered[0].model_calls + calls)
+        return ordered
+
+    @staticmethod
+    def _batch_entries(raw: dict[str, Any], count: int) -> dict[int, dict[str, Any]]:
+        """Per-candidate responses of a batched comparison, keyed by 0-based position.
+
+        Entries that are missing, duplicated, out of range or lack a numeric
+        score are left out, so those candidates are re-scored pairwise.
+        """
+        entries = raw.get("results")
+        if not isinstance(entries, list):
+            return {}
+        found: dict[int, dict[str, Any]] = {}
+        duplicated: set[int] = set()
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                position = int(entry["index"]) - 1
+                float(entry["similarity_score"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 0 <= position < count:
+                continue
+            if position in found:
+                duplicated.add(position)
+            found[position] = entry
+        return {position: entry for position, entry in found.items() if position not in duplicated}
+
+    def _comparison_key(
+        self,
+        prompt: str,
+        notice_part: Any,
+        report_part: Any,
+        tier: str = "image",
+    ) -> Optional[ComparisonKey]:
+        if self.comparison_cache is None:
+            return None
+        return comparison_key(
+            notice_part=notice_part,
+            report_part=report_part,
+            prompt=prompt,
+            model=self.client._resolve_model_name(tier),
+        )
+
+    @staticmethod
+    def _summarize(outcomes: Sequence[_CandidateOutcome]) -> dict[str, Any]:
+        failed = [outcome for outcome in outcomes if outcome.error is not None]
+        if failed and len(failed) == len(outcomes):
+            # Nothing could be scored, so there is no partial result worth returning.
+            error = failed[0].error
+            assert error is not None
+            raise error
+
+        matched_report_ids: list[str] = []
+        highest_similarity = 0.0
+        for outcome in outcomes:
+            if outcome.error is not None:
+                continue
+            highest_similarity = max(highest_similarity, outcome.similarity)
+            if outcome.is_match:
+                matched_report_ids.append(outcome.report_id)
+
+        result: dict[str, Any] = {
+            "is_match": len(matched_report_ids) > 0,
             "similarity_score": round(highest_similarity, 2),
             "matched_report_ids": matched_report_ids,
         }
+        if failed:
+            result["failed_report_ids"] = [outcome.report_id for outcome in failed]
+        cached = [outcome.report_id for outcome in outcomes if outcome.cached]
+        if cached:
+            result["cached_report_ids"] = cached
+        escalated = [outcome.report_id for outcome in outcomes if outcome.escalated]
+        if escalated:
+            result["escalated_report_ids"] = escalated
+        batched = [outcome.report_id for outcome in outcomes if outcome.batched]
+        if batched:
+            result["batched_report_ids"] = batched
+        return result
+
+    @staticmethod
+    def _candidate_event(outcome: _CandidateOutcome) -> dict[str, Any]:
+        if outcome.error is not None:
+            return {"report_id": outcome.report_id, "error": str(outcome.error)}
+        return {
+            "report_id": outcome.report_id,
+            "similarity_score": round(outcome.similarity, 2),
+            "is_match": outcome.is_match,
+            "cached": outcome.cached,
+        }
+
+    @staticmethod
+    def _add_budget_report(
+        result: dict[str, Any],
+        reports: Sequence[StrayDogReport],
+        outcomes: Sequence[_CandidateOutcome],
+        stop_reason: Optional[str],
+    ) -> None:
+        attempted = {outcome.report_id for outcome in outcomes}
+        result["scored_report_ids"] = [outcome.report_id for outcome in outcomes if outcome.error is None]
+        result["skipped_report_ids"] = [report.report_id for report in reports if report.report_id not in attempted]
+        result["stop_reason"] = stop_reason
 
     def _load_prompt(self) -> str:
         if not self.prompt_path.exists():
@@ -153,12 +686,558 @@ class DogMatcher:
 
     @staticmethod
     def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        radius_km = 6371.0
-        d_lat = math.radians(lat2 - lat1)
-        d_lon = math.radians(lon2 - lon1)
-        a = (
-            math.sin(d_lat / 2) ** 2
-            + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon / 2) ** 2
+        return haversine_km(lat1, lon1, lat2, lon2)
+
+
+class DogMatcher(_DogMatcherBase):
+    def __init__(
+        self,
+        client: GeminiClient,
+        prompt_path: Path = DEFAULT_PROMPT_PATH,
+        similarity_threshold: float = 70.0,
+        max_distance_km: float = 5.0,
+        max_time_gap_hours: int = 72,
+        temperature: float = 0.2,
+        max_concurrency: int = 1,
+        prefilter_top_k: Optional[int] = None,
+        prefilter_min_similarity: float = 0.0,
+        candidate_order: str = "input",
+        comparison_cache: Optional[ComparisonCache] = None,
+        attribute_pruner: Optional[AttributePruner] = None,
+        cascade: Optional[MatchCascade] = None,
+        batch_size: int = 1,
+        batch_ambiguity_band: float = 5.0,
+    ) -> None:
+        super().__init__(
+            client,
+            prompt_path=prompt_path,
+            similarity_threshold=similarity_threshold,
+            max_distance_km=max_distance_km,
+            max_time_gap_hours=max_time_gap_hours,
+            temperature=temperature,
+            max_concurrency=max_concurrency,
+            prefilter_top_k=prefilter_top_k,
+            prefilter_min_similarity=prefilter_min_similarity,
+            candidate_order=candidate_order,
+            comparison_cache=comparison_cache,
+            attribute_pruner=attribute_pruner,
+            cascade=cascade,
+            batch_size=batch_size,
+            batch_ambiguity_band=batch_ambiguity_band,
+        )
+
+    def match_lost_dog(
+        self,
+        *,
+        notice: LostDogNotice,
+        candidate_reports: Sequence[StrayDogReport],
+        owner_id: Optional[str] = None,
+        notifier: Optional[MatchNotifier] = None,
+        budget: Optional[MatchBudget] = None,
+        candidate_order: Optional[str] = None,
+    ) -> dict[str, Any]:
+        if not candidate_reports:
+            return self._empty_result()
+
+        prompt = self._load_prompt()
+        notice_part = self._image_part(notice)
+
+        eligible, pruned = self._prefilter(notice, self._eligible_reports(notice, candidate_reports, candidate_order))
+        if budget is None:
+            outcomes = self._score_candidates(prompt, notice_part, eligible)
+            result = self._summarize(outcomes)
+        else:
+            outcomes, stop_reason = self._score_within_budget(prompt, notice_part, eligible, budget)
+            result = self._summarize(outcomes)
+            self._add_budget_report(result, eligible, outcomes, stop_reason)
+        if pruned:
+            result["pruned_report_ids"] = pruned
+        if result["is_match"] and owner_id and notifier:
+            notifier.notify_possible_match(
+                owner_id=owner_id,
+                matched_report_ids=result["matched_report_ids"],
+                similarity_score=max(outcome.similarity for outcome in outcomes),
+            )
+        return result
+
+    def _score_candidates(
+        self,
+        prompt: str,
+        notice_part: Any,
+        reports: Sequence[StrayDogReport],
+    ) -> list[_CandidateOutcome]:
+        """Score reports against the notice, fanning out over a bounded thread pool.
+
+        Results are returned in the same order as ``reports`` regardless of
+        completion order, so the aggregated output matches sequential scoring.
+        """
+        groups = [group for _, group in self._groups(reports)]
+        if self.max_concurrency <= 1 or len(groups) <= 1:
+            return [outcome for group in groups for outcome in self._score_group(prompt, notice_part, group)]
+
+        workers = min(self.max_concurrency, len(groups))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dog-matcher") as executor:
+            scored = executor.map(lambda group: self._score_group(prompt, notice_part, group), groups)
+            return [outcome for outcomes in scored for outcome in outcomes]
+
+    def _score_within_budget(
+        self,
+        prompt: str,
+        notice_part: Any,
+        reports: Sequence[StrayDogReport],
+        budget: MatchBudget,
+    ) -> tuple[list[_CandidateOutcome], Optional[str]]:
+        """Score reports in order until the budget runs out.
+
+        Candidates still in flight when the deadline passes are abandoned and
+        count as skipped; other stop conditions let them finish. An abandoned
+        comparison cannot interrupt a model call already running, but makes no
+        further ones.
+        """
+        tracker = _BudgetTracker(budget)
+        abandoned = threading.Event()
+        groups = self._groups(reports)
+        outcomes: dict[int, _CandidateOutcome] = {}
+        pending: dict[Future[list[_CandidateOutcome]], tuple[int, int]] = {}
+        next_group = 0
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="dog-matcher")
+        try:
+            while True:
+                while next_group < len(groups) and len(pending) < self.max_concurrency:
+                    start, group = groups[next_group]
+                    calls = self._max_model_calls(group)
+                    if not tracker.reserve(calls):
+                        break
+                    future = executor.submit(self._score_group_until, abandoned, prompt, notice_part, group)
+                    pending[future] = (start, calls)
+                    next_group += 1
+                if not pending:
+                    break
+                done, _ = wait(pending, timeout=tracker.remaining(), return_when=FIRST_COMPLETED)
+                if not done:
+                    tracker.expire()
+                    break
+                for future in done:
+                    start, calls = pending.pop(future)
+                    for offset, outcome in enumerate(future.result()):
+                        outcomes[start + offset] = outcome
+                        tracker.record(outcome)
+                    tracker.release(calls)
+        finally:
+            abandoned.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        return [outcomes[index] for index in sorted(outcomes)], tracker.stop_reason
+
+    def _score_group_until(
+        self,
+        abandoned: threading.Event,
+        prompt: str,
+        notice_part: Any,
+        reports: Sequence[StrayDogReport],
+    ) -> list[_CandidateOutcome]:
+        token = _abandoned.set(abandoned)
+        try:
+            return self._score_group(prompt, notice_part, reports)
+        finally:
+            _abandoned.reset(token)
+
+    def _score_group(
+        self,
+        prompt: str,
+        notice_part: Any,
+        reports: Sequence[StrayDogReport],
+    ) -> list[_CandidateOutcome]:
+        """Score up to `batch_size` reports with one batched call, re-scoring unclear ones.
+
+        Candidates the batch leaves out are scored exactly as without batching.
+        Ambiguous ones go to the cascade's escalation tier, or are re-scored
+        pairwise without a cascade; see _partition_batch.
+        """
+        if len(reports) == 1:
+            return [self._score_candidate(prompt, notice_part, reports[0])]
+
+        outcomes: dict[int, _CandidateOutcome] = {}
+        escalate: dict[int, _CandidateOutcome] = {}
+        report_parts: list[Any] = []
+        calls = 0
+        try:
+            report_parts = [self._image_part(report) for report in reports]
+            batch_prompt, tier, keys = self._batch_keys(notice_part, report_parts)
+            entries = self._cached_batch_entries(keys)
+            uncached = [position for position in range(len(reports)) if position not in entries]
+            if len(uncached) > 1:
+                calls = 1
+                raw = self._generate(
+                    batch_prompt,
+                    parts=[notice_part, *(report_parts[position] for position in uncached)],
+                    tier=tier,
+                )
+                self._store_batch_response(raw, uncached, keys, entries)
+            outcomes, escalate = self._partition_batch(reports, entries)
+        except Exception:
+            # The whole batch failed; every candidate is retried pairwise below.
+            outcomes, escalate = {}, {}
+
+        for position, screened in escalate.items():
+            outcomes[position] = self._escalate(prompt, notice_part, report_parts[position], screened)
+        for position, report in enumerate(reports):
+            if position not in outcomes:
+                outcomes[position] = self._score_candidate(prompt, notice_part, report)
+        return self._group_outcomes(outcomes, len(reports), calls)
+
+    def _score_candidate(self, prompt: str, notice_part: Any, report: StrayDogReport) -> _CandidateOutcome:
+        try:
+            report_part = self._image_part(report)
+            cascade = self.cascade
+            if cascade is None:
+                raw, cached = self._compare(prompt, notice_part, report_part)
+                return self._outcome_from_response(report.report_id, raw, cached=cached)
+
+            raw, cached = self._compare(
+                cascade.load_screen_prompt(),
+                notice_part,
+                report_part,
+                tier=cascade.screen_tier,
+                max_output_tokens=cascade.screen_max_output_tokens,
+            )
+            screened = self._outcome_from_response(report.report_id, raw, cached=cached)
+            if not cascade.should_escalate(screened.similarity, self.similarity_threshold):
+                return screened
+        except Exception as exc:
+            return _CandidateOutcome(report_id=report.report_id, error=exc)
+        return self._escalate(prompt, notice_part, report_part, screened)
+
+    def _escalate(
+        self,
+        prompt: str,
+        notice_part: Any,
+        report_part: Any,
+        screened: _CandidateOutcome,
+    ) -> _CandidateOutcome:
+        """Re-score a screened candidate on the cascade's escalation tier."""
+        assert self.cascade is not None
+        try:
+            raw, cached = self._compare(prompt, notice_part, report_part, tier=self.cascade.escalation_tier)
+        except Exception as exc:
+            return _CandidateOutcome(report_id=screened.report_id, error=exc)
+        return self._escalated_outcome(screened, screened.report_id, raw, cached=cached)
+
+    def _compare(
+        self,
+        prompt: str,
+        notice_part: Any,
+        report_part: Any,
+        *,
+        tier: str = "image",
+        max_output_tokens: int = 2048,
+    ) -> tuple[dict[str, Any], bool]:
+        """One comparison on `tier`, answered from the comparison cache when possible; returns (response, cached)."""
+        cache = self.comparison_cache
+        key = self._comparison_key(prompt, notice_part, report_part, tier)
+        if cache is not None and key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached, True
+        raw = self._generate(prompt, parts=[notice_part, report_part], tier=tier, max_output_tokens=max_output_tokens)
+        if cache is not None and key is not None:
+            cache.set(key, raw)
+        return raw, False
+
+    def _generate(
+        self,
+        prompt: str,
+        *,
+        parts: Sequence[Any],
+        tier: str,
+        max_output_tokens: int = 2048,
+    ) -> dict[str, Any]:
+        abandoned = _abandoned.get()
+        if abandoned is not None and abandoned.is_set():
+            raise _RunAbandoned("match budget deadline passed")
+        started = time.monotonic()
+        raw = self.client.generate_json(
+            prompt,
+            parts=parts,
+            model=tier,
+            temperature=self.temperature,
+            max_output_tokens=max_output_tokens,
+        )
+        if self.cascade is not None:
+            self.cascade.record_call(tier, time.monotonic() - started)
+        return raw
+
+
+class AsyncDogMatcher(_DogMatcherBase):
+    """DogMatcher counterpart for AsyncGeminiClient.
+
+    Candidate comparisons run as asyncio tasks, at most `max_concurrency` at a
+    time, so in-flight model calls do not each hold a thread. `stream_match`
+    exposes each score as it arrives.
+    """
+
+    def __init__(
+        self,
+        client: AsyncGeminiClient,
+        prompt_path: Path = DEFAULT_PROMPT_PATH,
+        similarity_threshold: float = 70.0,
+        max_distance_km: float = 5.0,
+        max_time_gap_hours: int = 72,
+        temperature: float = 0.2,
+        max_concurrency: int = 1,
+        prefilter_top_k: Optional[int] = None,
+        prefilter_min_similarity: float = 0.0,
+        candidate_order: str = "input",
+        comparison_cache: Optional[ComparisonCache] = None,
+        attribute_pruner: Optional[AttributePruner] = None,
+        cascade: Optional[MatchCascade] = None,
+        batch_size: int = 1,
+        batch_ambiguity_band: float = 5.0,
+    ) -> None:
+        super().__init__(
+            client,
+            prompt_path=prompt_path,
+            similarity_threshold=similarity_threshold,
+            max_distance_km=max_distance_km,
+            max_time_gap_hours=max_time_gap_hours,
+            temperature=temperature,
+            max_concurrency=max_concurrency,
+            prefilter_top_k=prefilter_top_k,
+            prefilter_min_similarity=prefilter_min_similarity,
+            candidate_order=candidate_order,
+            comparison_cache=comparison_cache,
+            attribute_pruner=attribute_pruner,
+            cascade=cascade,
+            batch_size=batch_size,
+            batch_ambiguity_band=batch_ambiguity_band,
+        )
+
+    async def match_lost_dog(
+        self,
+        *,
+        notice: LostDogNotice,
+        candidate_reports: Sequence[StrayDogReport],
+        owner_id: Optional[str] = None,
+        notifier: Optional[MatchNotifier] = None,
+        budget: Optional[MatchBudget] = None,
+        candidate_order: Optional[str] = None,
+    ) -> dict[str, Any]:
+        result = self._empty_result()
+        async with aclosing(
+            self.stream_match(
+                notice=notice,
+                candidate_reports=candidate_reports,
+                owner_id=owner_id,
+                notifier=notifier,
+                budget=budget,
+                candidate_order=candidate_order,
+            )
+        ) as events:
+            async for event in events:
+                if event["event"] == "summary":
+                    result = event["data"]
+        return result
+
+    async def stream_match(
+        self,
+        *,
+        notice: LostDogNotice,
+        candidate_reports: Sequence[StrayDogReport],
+        owner_id: Optional[str] = None,
+        notifier: Optional[MatchNotifier] = None,
+        budget: Optional[MatchBudget] = None,
+        candidate_order: Optional[str] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield `start`, a `candidate` event per report as soon as it is scored, then `summary`.
+
+        `start` carries how many reports passed filtering and will be scored.
+        The summary's data is exactly what `match_lost_dog` returns. Candidate
+        events arrive in completion order, not candidate order.
+        """
+        if not candidate_reports:
+            yield {"event": "start", "data": {"eligible_count": 0}}
+            yield {"event": "summary", "data": self._empty_result()}
+            return
+
+        prompt = self._load_prompt()
+        notice_part = await asyncio.to_thread(self._image_part, notice)
+
+        eligible, pruned = await asyncio.to_thread(
+            self._prefilter,
+            notice,
+            self._eligible_reports(notice, candidate_reports, candidate_order),
+        )
+        yield {"event": "start", "data": {"eligible_count": len(eligible)}}
+        tracker = _BudgetTracker(budget or MatchBudget())
+        completed: dict[int, _CandidateOutcome] = {}
+        async with aclosing(self._iter_outcomes(prompt, notice_part, eligible, tracker)) as stream:
+            async for index, outcome in stream:
+                completed[index] = outcome
+                yield {"event": "candidate", "data": self._candidate_event(outcome)}
+
+        outcomes = [completed[index] for index in sorted(completed)]
+        result = self._summarize(outcomes)
+        if budget is not None:
+            self._add_budget_report(result, eligible, outcomes, tracker.stop_reason)
+        if pruned:
+            result["pruned_report_ids"] = pruned
+        if result["is_match"] and owner_id and notifier:
+            await asyncio.to_thread(
+                notifier.notify_possible_match,
+                owner_id=owner_id,
+                matched_report_ids=result["matched_report_ids"],
+                similarity_score=max(outcome.similarity for outcome in outcomes),
+            )
+        yield {"event": "summary", "data": result}
+
+    async def _iter_outcomes(
+        self,
+        prompt: str,
+        notice_part: Any,
+        reports: Sequence[StrayDogReport],
+        tracker: _BudgetTracker,
+    ) -> AsyncIterator[tuple[int, _CandidateOutcome]]:
+        """Score reports in order, at most `max_concurrency` at a time, yielding as each finishes.
+
+        Stops starting new comparisons once `tracker` says the budget is spent;
+        comparisons still running at the deadline are cancelled.
+        """
+        groups = self._groups(reports)
+        pending: dict[asyncio.Task[list[_CandidateOutcome]], tuple[int, int]] = {}
+        next_group = 0
+        try:
+            while True:
+                while next_group < len(groups) and len(pending) < self.max_concurrency:
+                    start, group = groups[next_group]
+                    calls = self._max_model_calls(group)
+                    if not tracker.reserve(calls):
+                        break
+                    pending[asyncio.create_task(self._score_group(prompt, notice_part, group))] = (start, calls)
+                    next_group += 1
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending, timeout=tracker.remaining(), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    tracker.expire()
+                    break
+                for task in sorted(done, key=pending.__getitem__):
+                    start, calls = pending.pop(task)
+                    outcomes = task.result()
+                    for outcome in outcomes:
+                        tracker.record(outcome)
+                    tracker.release(calls)
+                    for offset, outcome in enumerate(outcomes):
+                        yield start + offset, outcome
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _score_group(
+        self,
+        prompt: str,
+        notice_part: Any,
+        reports: Sequence[StrayDogReport],
+    ) -> list[_CandidateOutcome]:
+        if len(reports) == 1:
+            return [await self._score_candidate(prompt, notice_part, reports[0])]
+
+        outcomes: dict[int, _CandidateOutcome] = {}
+        escalate: dict[int, _CandidateOutcome] = {}
+        report_parts: list[Any] = []
+        calls = 0
+        try:
+            report_parts = await asyncio.gather(*(asyncio.to_thread(self._image_part, report) for report in reports))
+            batch_prompt, tier, keys = self._batch_keys(notice_part, report_parts)
+            entries = await asyncio.to_thread(self._cached_batch_entries, keys)
+            uncached = [position for position in range(len(reports)) if position not in entries]
+            if len(uncached) > 1:
+                calls = 1
+                started = time.monotonic()
+                raw = await self.client.generate_json(
+                    batch_prompt,
+                    parts=[notice_part, *(report_parts[position] for position in uncached)],
+                    model=tier,
+                    temperature=self.temperature,
+                )
+                if self.cascade is not None:
+                    self.cascade.record_call(tier, time.monotonic() - started)
+                await asyncio.to_thread(self._store_batch_response, raw, uncached, keys, entries)
+            outcomes, escalate = self._partition_batch(reports, entries)
+        except Exception:
+            outcomes, escalate = {}, {}
+
+        fallback_positions = [position for position in range(len(reports)) if position not in outcomes]
+        rescored = await asyncio.gather(
+            *(
+                self._escalate(prompt, notice_part, report_parts[position], escalate[position])
+                if position in escalate
+                else self._score_candidate(prompt, notice_part, reports[position])
+                for position in fallback_positions
+            )
+        )
+        outcomes.update(zip(fallback_positions, rescored))
+        return self._group_outcomes(outcomes, len(reports), calls)
+
+    async def _score_candidate(self, prompt: str, notice_part: Any, report: StrayDogReport) -> _CandidateOutcome:
+        try:
+            report_part = await asyncio.to_thread(self._image_part, report)
+            cascade = self.cascade
+            if cascade is None:
+                raw, cached = await self._compare(prompt, notice_part, report_part)
+                return self._outcome_from_response(report.report_id, raw, cached=cached)
+
+            raw, cached = await self._compare(
+                cascade.load_screen_prompt(),
+                notice_part,
+                report_part,
+                tier=cascade.screen_tier,
+                max_output_tokens=cascade.screen_max_output_tokens,
+            )
+            screened = self._outcome_from_response(report.report_id, raw, cached=cached)
+            if not cascade.should_escalate(screened.similarity, self.similarity_threshold):
+                return screened
+        except Exception as exc:
+            return _CandidateOutcome(report_id=report.report_id, error=exc)
+        return await self._escalate(prompt, notice_part, report_part, screened)
+
+    async def _escalate(
+        self,
+        prompt: str,
+        notice_part: Any,
+        report_part: Any,
+        screened: _CandidateOutcome,
+    ) -> _CandidateOutcome:
+        assert self.cascade is not None
+        try:
+            raw, cached = await self._compare(prompt, notice_part, report_part, tier=self.cascade.escalation_tier)
+        except Exception as exc:
+            return _CandidateOutcome(report_id=screened.report_id, error=exc)
+        return self._escalated_outcome(screened, screened.report_id, raw, cached=cached)
+
+    async def _compare(
+        self,
+        prompt: str,
+        notice_part: Any,
+        report_part: Any,
+        *,
+        tier: str = "image",
+        max_output_tokens: int = 2048,
+    ) -> tuple[dict[str, Any], bool]:
+        cache = self.comparison_cache
+        key = self._comparison_key(prompt, notice_part, report_part, tier)
+        if cache is not None and key is not None:
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return cached, True
+        started = time.monotonic()
+        raw = await self.client.generate_json(
+            prompt,
+            parts=[notice_part, report_part],
+            model=tier,
+            temperature=self.temperature,
+            max_output_tokens=max_output_tokens,
         )
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return radius_km * c
+        if self.cascade is not None:
+            self.cascade.record_call(tier, time.monotonic() - started)
+        if cache is not None and key is not None:
+            await asyncio.to_thread(cache.set, key, raw)
+        return raw, False
@@ -1,14 +1,31 @@
 from __future__ import annotations
 
-import base64
+import asyncio
 import json
 import mimetypes
 import os
 import re
 import tempfile
 import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Optional, Sequence
+from typing import Any, Awaitable, Mapping, Optional, Sequence
+
+from .hedging import HedgingPolicy
+from .image_payload import ImageBytes, decode_base64_image
+from .image_preprocessor import ImagePreprocessor
+from .rate_limiter import (
+    QuotaRateLimiter,
+    RetryPolicy,
+    call_with_retry,
+    call_with_retry_async,
+    estimate_request_tokens,
+    is_retryable_error,
+)
+from .request_coalescer import RequestCoalescer
+from .response_cache import ResponseCache, request_fingerprint
+from .upload_registry import UploadedFileRegistry, video_content_key
 
 try:
     import cv2
@@ -38,7 +55,10 @@ class _GenAIV2Backend:
                 "max_output_tokens": max_output_tokens,
             }
 
-    def build_inline_part(self, *, mime_type: str, data: bytes) -> Any:
+    def build_inline_part(self, *, mime_type: str, data: ImageBytes) -> Any:
+        if isinstance(data, memoryview):
+            # The SDK's pydantic models accept bytes/bytearray but not memoryview.
+            data = data.tobytes()
         try:
             return self._types.Part.from_bytes(data=data, mime_type=mime_type)
         except Exception:
@@ -60,7 +80,8 @@ class _GenAIV2Backend:
             )
 
     def upload_file(self, *, path: str, mime_type: str) -> Any:
-        # Support different google.genai file upload signatures.
+        # Support different google.genai file upload signatures. Quota and availability
+        # errors are re-raised so the client's retry loop handles them instead.
         methods = [
             lambda: self._client.files.upload(file=path, mime_type=mime_type),
             lambda: self._client.files.upload(file=path),
@@ -72,6 +93,8 @@ class _GenAIV2Backend:
             try:
                 return method()
             except Exception as exc:
+                if is_retryable_error(exc):
+                    raise
                 last_error = exc
         if last_error:
             raise last_error
@@ -83,6 +106,53 @@ class _GenAIV2Backend:
     def delete_file(self, *, name: str) -> None:
         self._client.files.delete(name=name)
 
+    async def generate_content_async(
+        self,
+        *,
+        model_name: str,
+        contents: Sequence[Any],
+        generation_config: Any,
+    ) -> Any:
+        models = self._client.aio.models
+        try:
+            return await models.generate_content(
+                model=model_name,
+                contents=list(contents),
+                config=generation_config,
+            )
+        except TypeError:
+            return await models.generate_content(
+                model=model_name,
+                contents=list(contents),
+                generation_config=generation_config,
+            )
+
+    async def upload_file_async(self, *, path: str, mime_type: str) -> Any:
+        files = self._client.aio.files
+        methods = [
+            lambda: files.upload(file=path, mime_type=mime_type),
+            lambda: files.upload(file=path),
+            lambda: files.upload(path=path, mime_type=mime_type),
+            lambda: files.upload(path=path),
+        ]
+        last_error: Exception | None = None
+        for method in methods:
+            try:
+                return await method()
+            except Exception as exc:
+                if is_retryable_error(exc):
+                    raise
+                last_error = exc
+        if last_error:
+            raise last_error
+        raise RuntimeError("Failed to upload file with google.genai.")
+
+    async def get_file_async(self, *, name: str) -> Any:
+        return await self._client.aio.files.get(name=name)
+
+    async def delete_file_async(self, *, name: str) -> None:
+        await self._client.aio.files.delete(name=name)
+
     @staticmethod
     def file_state_name(file_obj: Any) -> str:
         state = getattr(file_obj, "state", None)
@@ -97,8 +167,17 @@ class _GenAIV2Backend:
         return state_text
 
 
-class GeminiClient:
-    """Wrapper around Gemini SDK with JSON-safe output parsing."""
+@dataclass(frozen=True)
+class _PreparedRequest:
+    model_name: str
+    contents: list[Any]
+    generation_config: Any
+    fingerprint: Optional[str]
+    estimated_tokens: int
+
+
+class _GeminiClientBase:
+    """Shared configuration, request building and response parsing for Gemini clients."""
 
     _JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(\{.*\})\s*```", re.DOTALL)
 
@@ -110,6 +189,14 @@ class GeminiClient:
         default_temperature: float = 0.3,
         upload_timeout_seconds: int = 180,
         upload_poll_interval_seconds: float = 2.0,
+        response_cache: Optional[ResponseCache] = None,
+        coalescer: Optional[RequestCoalescer] = None,
+        rate_limiter: Optional[QuotaRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        image_preprocessor: Optional[ImagePreprocessor] = None,
+        upload_registry: Optional[UploadedFileRegistry] = None,
+        model_tiers: Optional[Mapping[str, str]] = None,
     ) -> None:
         key = api_key or os.getenv("GEMINI_API_KEY")
         if not key:
@@ -121,6 +208,15 @@ class GeminiClient:
         self.default_temperature = default_temperature
         self.upload_timeout_seconds = upload_timeout_seconds
         self.upload_poll_interval_seconds = upload_poll_interval_seconds
+        self.response_cache = response_cache
+        self.coalescer = coalescer
+        self.rate_limiter = rate_limiter or QuotaRateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedging = hedging
+        self.image_preprocessor = image_preprocessor
+        self.upload_registry = upload_registry
+        # Named model tiers (e.g. "fast", "strong") callers can pass as `model`.
+        self.model_tiers = dict(model_tiers or {})
 
     @staticmethod
     def _init_backend(api_key: str) -> Any:
@@ -132,117 +228,132 @@ class GeminiClient:
         except Exception as exc:
             raise RuntimeError("No Gemini SDK available. Install `google-genai`.") from exc
 
-    def generate_json(
-        self,
-        prompt: str,
-        *,
-        parts: Optional[Sequence[Any]] = None,
-        model: str = "image",
-        temperature: Optional[float] = None,
-        max_output_tokens: int = 2048,
-    ) -> dict[str, Any]:
-        model_name = self._resolve_model_name(model)
-        generation_config = self._backend.generation_config(
-            temperature=self.default_temperature if temperature is None else temperature,
-            max_output_tokens=max_output_tokens,
-        )
-
-        contents: list[Any] = [prompt]
-        if parts:
-            contents.extend(parts)
-
-        response = self._backend.generate_content(
-            model_name=model_name,
-            contents=contents,
-            generation_config=generation_config,
-        )
-        response_text = self._extract_response_text(response)
-        return self._parse_json(response_text)
-
     def build_image_part(
         self,
         *,
+        image_bytes: Optional[ImageBytes] = None,
         image_base64: Optional[str] = None,
         image_path: Optional[str] = None,
         mime_type: Optional[str] = None,
     ) -> Any:
-        if bool(image_base64) == bool(image_path):
-            raise ValueError("Provide exactly one of image_base64 or image_path.")
-
-        if image_path:
+        if sum(1 for source in (image_bytes, image_base64, image_path) if source) != 1:
+            raise ValueError("Provide exactly one of image_bytes, image_base64 or image_path.")
+
+        data: ImageBytes
+        if image_bytes:
+            data = image_bytes
+            mime = mime_type or "image/jpeg"
+        elif image_path:
             path = Path(image_path)
             if not path.exists():
                 raise FileNotFoundError(f"Image not found: {image_path}")
             data = path.read_bytes()
             guessed = mimetypes.guess_type(path.name)[0]
             mime = mime_type or guessed or "image/jpeg"
-            return self._backend.build_inline_part(mime_type=mime, data=data)
+        else:
+            assert image_base64 is not None
+            data = self._decode_base64(image_base64)
+            mime = mime_type or "image/jpeg"
 
-        assert image_base64 is not None
-        decoded = self._decode_base64(image_base64)
-        return self._backend.build_inline_part(mime_type=mime_type or "image/jpeg", data=decoded)
+        if self.image_preprocessor is not None:
+            processed = self.image_preprocessor.process(data, mime)
+            data, mime = processed.data, processed.mime_type
+        return self._backend.build_inline_part(mime_type=mime, data=data)
 
-    def upload_video(self, video_path: str, *, preprocess_seconds: Optional[int] = 10) -> Any:
-        path = Path(video_path)
-        if not path.exists():
-            raise FileNotFoundError(f"Video not found: {video_path}")
+    def _resolve_model_name(self, model: str) -> str:
+        """Model name for "image", "video" or a named tier; unknown tiers fall back to the image model."""
+        if model == "video":
+            return self.video_model
+        return self.model_tiers.get(model, self.image_model)
 
-        upload_path = path
-        temporary_clip: Optional[Path] = None
-        if preprocess_seconds:
-            temporary_clip = self._trim_video(path, preprocess_seconds)
-            upload_path = temporary_clip
+    def _prepare_request(
+        self,
+        prompt: str,
+        *,
+        parts: Optional[Sequence[Any]],
+        model: str,
+        temperature: Optional[float],
+        max_output_tokens: int,
+    ) -> _PreparedRequest:
+        model_name = self._resolve_model_name(model)
+        resolved_temperature = self.default_temperature if temperature is None else temperature
+
+        fingerprint: Optional[str] = None
+        if self.response_cache is not None or self.coalescer is not None:
+            fingerprint = request_fingerprint(
+                model_name=model_name,
+                prompt=prompt,
+                parts=parts,
+                temperature=resolved_temperature,
+                max_output_tokens=max_output_tokens,
+            )
 
-        try:
-            uploaded = self._backend.upload_file(path=str(upload_path), mime_type="video/mp4")
-            file_name = getattr(uploaded, "name", "")
-            if not file_name:
-                # If sdk already returns an active handle without a file name.
-                return uploaded
-            return self._wait_for_uploaded_file(file_name)
-        finally:
-            if temporary_clip and temporary_clip.exists():
-                temporary_clip.unlink(missing_ok=True)
+        contents: list[Any] = [prompt]
+        if parts:
+            contents.extend(parts)
 
-    def delete_uploaded_file(self, uploaded_file_or_name: Any) -> None:
-        name = uploaded_file_or_name
-        if not isinstance(name, str):
-            name = getattr(uploaded_file_or_name, "name", "")
-        if not name:
-            return
-        try:
-            self._backend.delete_file(name=name)
-        except Exception:
+        return _PreparedRequest(
+            model_name=model_name,
+            contents=contents,
+            generation_config=self._backend.generation_config(
+                temperature=resolved_temperature,
+                max_output_tokens=max_output_tokens,
+            ),
+            fingerprint=fingerprint,
+            estimated_tokens=estimate_request_tokens(prompt, parts),
+        )
+
+    def _cached_response(self, request: _PreparedRequest) -> Optional[dict[str, Any]]:
+        if request.fingerprint is None or self.response_cache is None:
+            return None
+        return self.response_cache.get(request.fingerprint)
+
+    def _finish_response(self, request: _PreparedRequest, response: Any) -> dict[str, Any]:
+        result = self._parse_json(self._extract_response_text(response))
+        if request.fingerprint is not None and self.response_cache is not None:
+            self.response_cache.set(request.fingerprint, result)
+        return result
+
+    def _can_hedge(self, request: _PreparedRequest) -> bool:
+        return self.rate_limiter.try_acquire(request.model_name, request.estimated_tokens)
+
+    def _reusable_upload(self, file_obj: Any) -> bool:
+        return file_obj is not None and self._backend.file_state_name(file_obj) == "ACTIVE"
+
+    def _register_upload(self, key: Optional[str], file_obj: Any) -> None:
+        name = self._uploaded_file_name(file_obj)
+        if key is None or self.upload_registry is None or not name:
             return
+        self.upload_registry.register(
+            key,
+            file_name=name,
+            file_uri=getattr(file_obj, "uri", None),
+            mime_type=getattr(file_obj, "mime_type", None) or "video/mp4",
+            expires_at=self._expiration_timestamp(file_obj),
+        )
 
-    def _resolve_model_name(self, model: str) -> str:
-        if model == "video":
-            return self.video_model
-        return self.image_model
+    def _is_registered_upload(self, uploaded_file_or_name: Any) -> bool:
+        name = self._uploaded_file_name(uploaded_file_or_name)
+        return bool(name) and self.upload_registry is not None and self.upload_registry.contains_file(name)
 
-    def _wait_for_uploaded_file(self, file_name: str) -> Any:
-        deadline = time.time() + self.upload_timeout_seconds
-        while time.time() < deadline:
-            file_obj = self._backend.get_file(name=file_name)
-            state = self._backend.file_state_name(file_obj)
-            if state == "ACTIVE":
-                return file_obj
-            if state == "FAILED":
-                raise RuntimeError(f"Gemini file processing failed for {file_name}.")
-            time.sleep(self.upload_poll_interval_seconds)
+    @staticmethod
+    def _expiration_timestamp(file_obj: Any) -> Optional[float]:
+        expiration = getattr(file_obj, "expiration_time", None)
+        if not isinstance(expiration, datetime):
+            return None
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=timezone.utc)
+        return expiration.timestamp()
 
-        raise TimeoutError(f"Timed out waiting for Gemini to process file {file_name}.")
+    @staticmethod
+    def _uploaded_file_name(uploaded_file_or_name: Any) -> str:
+        if isinstance(uploaded_file_or_name, str):
+            return uploaded_file_or_name
+        return getattr(uploaded_file_or_name, "name", "") or ""
 
     @staticmethod
-    def _decode_base64(payload: str) -> bytes:
-        cleaned = payload.strip()
-        if cleaned.startswith("data:") and "," in cleaned:
-            cleaned = cleaned.split(",", 1)[1]
-        cleaned = "".join(cleaned.split())
-        try:
-            return base64.b64decode(cleaned, validate=True)
-        except Exception as exc:
-            raise ValueError("Invalid base64 image payload.") from exc
+    def _decode_base64(payload: str) -> bytearray:
+        return decode_base64_image(payload)
 
     @staticmethod
     def _extract_response_text(response: Any) -> str:
@@ -341,3 +452,277 @@ class GeminiClient:
             capture.release()
             if writer is not None:
                 writer.release()
+
+
+class GeminiClient(_GeminiClientBase):
+    """Wrapper around Gemini SDK with JSON-safe output parsing."""
+
+    def generate_json(
+        self,
+        prompt: str,
+        *,
+        parts: Optional[Sequence[Any]] = None,
+        model: str = "image",
+        temperature: Optional[float] = None,
+        max_output_tokens: int = 2048,
+    ) -> dict[str, Any]:
+        request = self._prepare_request(
+            prompt,
+            parts=parts,
+            model=model,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+        )
+        cached = self._cached_response(request)
+        if cached is not None:
+            return cached
+        if self.coalescer is not None and request.fingerprint is not None:
+            return self.coalescer.run(request.fingerprint, lambda: self._call_upstream(request))
+        return self._call_upstream(request)
+
+    def _call_upstream(self, request: _PreparedRequest) -> dict[str, Any]:
+        response = call_with_retry(
+            lambda: self._generate_content(request),
+            policy=self.retry_policy,
+            limiter=self.rate_limiter,
+            model=request.model_name,
+            estimated_tokens=request.estimated_tokens,
+        )
+        return self._finish_response(request, response)
+
+    def _generate_content(self, request: _PreparedRequest) -> Any:
+        def call() -> Any:
+            return self._backend.generate_content(
+                model_name=request.model_name,
+                contents=request.contents,
+                generation_config=request.generation_config,
+            )
+
+        if self.hedging is None:
+            return call()
+        return self.hedging.run(request.model_name, call, can_hedge=lambda: self._can_hedge(request))
+
+    def upload_video(self, video_path: str, *, preprocess_seconds: Optional[int] = 10) -> Any:
+        path = Path(video_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Video not found: {video_path}")
+
+        content_key: Optional[str] = None
+        if self.upload_registry is not None:
+            content_key = video_content_key(path, preprocess_seconds)
+            reused = self._find_registered_upload(content_key)
+            if reused is not None:
+                return reused
+
+        upload_path = path
+        temporary_clip: Optional[Path] = None
+        if preprocess_seconds:
+            temporary_clip = self._trim_video(path, preprocess_seconds)
+            upload_path = temporary_clip
+
+        try:
+            uploaded = call_with_retry(
+                lambda: self._backend.upload_file(path=str(upload_path), mime_type="video/mp4"),
+                policy=self.retry_policy,
+                limiter=self.rate_limiter,
+                model=self.video_model,
+                throttle=False,
+            )
+            file_name = getattr(uploaded, "name", "")
+            if not file_name:
+                # If sdk already returns an active handle without a file name.
+                return uploaded
+            file_obj = self._wait_for_uploaded_file(file_name)
+        finally:
+            if temporary_clip and temporary_clip.exists():
+                temporary_clip.unlink(missing_ok=True)
+        self._register_upload(content_key, file_obj)
+        return file_obj
+
+    def release_uploaded_file(self, uploaded_file_or_name: Any) -> None:
+        """Done with an upload: keep it if the registry tracks it for reuse, otherwise delete it."""
+        if not self._is_registered_upload(uploaded_file_or_name):
+            self.delete_uploaded_file(uploaded_file_or_name)
+
+    def delete_uploaded_file(self, uploaded_file_or_name: Any) -> None:
+        name = self._uploaded_file_name(uploaded_file_or_name)
+        if not name:
+            return
+        if self.upload_registry is not None:
+            self.upload_registry.evict_file(name)
+        try:
+            self._backend.delete_file(name=name)
+        except Exception:
+            return
+
+    def _find_registered_upload(self, content_key: str) -> Any:
+        assert self.upload_registry is not None
+        entry = self.upload_registry.lookup(content_key)
+        if entry is None:
+            return None
+        try:
+            file_obj = self._backend.get_file(name=entry.file_name)
+        except Exception as exc:
+            if is_retryable_error(exc):
+                return None
+            file_obj = None
+        if self._reusable_upload(file_obj):
+            return file_obj
+        # Deleted remotely or no longer ACTIVE.
+        self.upload_registry.evict_file(entry.file_name)
+        return None
+
+    def _wait_for_uploaded_file(self, file_name: str) -> Any:
+        deadline = time.time() + self.upload_timeout_seconds
+        while time.time() < deadline:
+            file_obj = self._backend.get_file(name=file_name)
+            state = self._backend.file_state_name(file_obj)
+            if state == "ACTIVE":
+                return file_obj
+            if state == "FAILED":
+                raise RuntimeError(f"Gemini file processing failed for {file_name}.")
+            time.sleep(self.upload_poll_interval_seconds)
+
+        raise TimeoutError(f"Timed out waiting for Gemini to process file {file_name}.")
+
+
+class AsyncGeminiClient(_GeminiClientBase):
+    """Asyncio variant of GeminiClient built on the SDK's `client.aio` API.
+
+    Model calls, uploads and upload polling are awaited instead of blocking a
+    worker thread. Local work that can block, video trimming and the SQLite
+    backed response cache and upload registry, runs in a thread via
+    `asyncio.to_thread` so a slow or locked database never stalls the event loop.
+    """
+
+    async def generate_json(
+        self,
+        prompt: str,
+        *,
+        parts: Optional[Sequence[Any]] = None,
+        model: str = "image",
+        temperature: Optional[float] = None,
+        max_output_tokens: int = 2048,
+    ) -> dict[str, Any]:
+        request = self._prepare_request(
+            prompt,
+            parts=parts,
+            model=model,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+        )
+        if request.fingerprint is not None and self.response_cache is not None:
+            cached = await asyncio.to_thread(self._cached_response, request)
+            if cached is not None:
+                return cached
+        if self.coalescer is not None and request.fingerprint is not None:
+            return await self.coalescer.run_async(request.fingerprint, lambda: self._call_upstream(request))
+        return await self._call_upstream(request)
+
+    async def _call_upstream(self, request: _PreparedRequest) -> dict[str, Any]:
+        response = await call_with_retry_async(
+            lambda: self._generate_content(request),
+            policy=self.retry_policy,
+            limiter=self.rate_limiter,
+            model=request.model_name,
+            estimated_tokens=request.estimated_tokens,
+        )
+        if request.fingerprint is not None and self.response_cache is not None:
+            return await asyncio.to_thread(self._finish_response, request, response)
+        return self._finish_response(request, response)
+
+    async def _generate_content(self, request: _PreparedRequest) -> Any:
+        def call() -> Awaitable[Any]:
+            return self._backend.generate_content_async(
+                model_name=request.model_name,
+                contents=request.contents,
+                generation_config=request.generation_config,
+            )
+
+        if self.hedging is None:
+            return await call()
+        return await self.hedging.run_async(request.model_name, call, can_hedge=lambda: self._can_hedge(request))
+
+    async def upload_video(self, video_path: str, *, preprocess_seconds: Optional[int] = 10) -> Any:
+        path = Path(video_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Video not found: {video_path}")
+
+        content_key: Optional[str] = None
+        if self.upload_registry is not None:
+            content_key = await asyncio.to_thread(video_content_key, path, preprocess_seconds)
+            reused = await self._find_registered_upload(content_key)
+            if reused is not None:
+                return reused
+
+        upload_path = path
+        temporary_clip: Optional[Path] = None
+        if preprocess_seconds:
+            temporary_clip = await asyncio.to_thread(self._trim_video, path, preprocess_seconds)
+            upload_path = temporary_clip
+
+        try:
+            uploaded = await call_with_retry_async(
+                lambda: self._backend.upload_file_async(path=str(upload_path), mime_type="video/mp4"),
+                policy=self.retry_policy,
+                limiter=self.rate_limiter,
+                model=self.video_model,
+                throttle=False,
+            )
+            file_name = getattr(uploaded, "name", "")
+            if not file_name:
+                return uploaded
+            file_obj = await self._wait_for_uploaded_file(file_name)
+        finally:
+            if temporary_clip and temporary_clip.exists():
+                temporary_clip.unlink(missing_ok=True)
+        if content_key is not None:
+            await asyncio.to_thread(self._register_upload, content_key, file_obj)
+        return file_obj
+
+    async def release_uploaded_file(self, uploaded_file_or_name: Any) -> None:
+        registered = self.upload_registry is not None and await asyncio.to_thread(
+            self._is_registered_upload, uploaded_file_or_name
+        )
+        if not registered:
+            await self.delete_uploaded_file(uploaded_file_or_name)
+
+    async def delete_uploaded_file(self, uploaded_file_or_name: Any) -> None:
+        name = self._uploaded_file_name(uploaded_file_or_name)
+        if not name:
+            return
+        if self.upload_registry is not None:
+            await asyncio.to_thread(self.upload_registry.evict_file, name)
+        try:
+            await self._backend.delete_file_async(name=name)
+        except Exception:
+            return
+
+    async def _find_registered_upload(self, content_key: str) -> Any:
+        assert self.upload_registry is not None
+        entry = await asyncio.to_thread(self.upload_registry.lookup, content_key)
+        if entry is None:
+            return None
+        try:
+            file_obj = await self._backend.get_file_async(name=entry.file_name)
+        except Exception as exc:
+            if is_retryable_error(exc):
+                return None
+            file_obj = None
+        if self._reusable_upload(file_obj):
+            return file_obj
+        await asyncio.to_thread(self.upload_registry.evict_file, entry.file_name)
+        return None
+
+    async def _wait_for_uploaded_file(self, file_name: str) -> Any:
+        deadline = time.time() + self.upload_timeout_seconds
+        while time.time() < deadline:
+            file_obj = await self._backend.get_file_async(name=file_name)
+            state = self._backend.file_state_name(file_obj)
+            if state == "ACTIVE":
+                return file_obj
+            if state == "FAILED":
+                raise RuntimeError(f"Gemini file processing failed for {file_name}.")
+            await asyncio.sleep(self.upload_poll_interval_seconds)
+
+        raise TimeoutError(f"Timed out waiting for Gemini to process file {file_name}.")
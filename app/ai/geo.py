@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+EARTH_RADIUS_KM = 6371.0
+_KM_PER_DEGREE_LATITUDE = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+@dataclass(frozen=True)
+class BoundingBox:
+    min_latitude: float
+    max_latitude: float
+    min_longitude: float
+    max_longitude: float
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = math.sin(d_lat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_km_array(latitude: float, longitude: float, latitudes: Any, longitudes: Any) -> Any:
+    """Vectorised `haversine_km` from one point to arrays of points; NaN in, NaN out."""
+    if np is None:
+        raise RuntimeError("numpy is required for vectorised distance computation.")
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    d_lat = lat2 - lat1
+    d_lon = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+    a = np.sin(d_lat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> BoundingBox:
+    """Smallest lat/lon box containing every point within `radius_km`.
+
+    Near the poles, or when the box would cross the antimeridian, the longitude
+    range widens to the whole globe rather than splitting into two boxes.
+    """
+    d_lat = radius_km / _KM_PER_DEGREE_LATITUDE
+    min_lat = max(-90.0, latitude - d_lat)
+    max_lat = min(90.0, latitude + d_lat)
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 90.0:
+        return BoundingBox(min_lat, max_lat, -180.0, 180.0)
+
+    d_lon = d_lat / math.cos(math.radians(widest))
+    min_lon = longitude - d_lon
+    max_lon = longitude + d_lon
+    if min_lon < -180.0 or max_lon > 180.0:
+        return BoundingBox(min_lat, max_lat, -180.0, 180.0)
+    return BoundingBox(min_lat, max_lat, min_lon, max_lon)
+
+
+def to_epoch_seconds(value: datetime) -> float:
+    """POSIX timestamp; naive datetimes are taken to be UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies per model."""
+
+    def __init__(self, window: int = 200) -> None:
+        self.window = max(1, int(window))
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = deque(maxlen=self.window)
+                self._samples[model] = samples
+            samples.append(seconds)
+
+    def percentile(self, model: str, pct: float, *, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, max(0, int(round(pct / 100.0 * (len(samples) - 1)))))
+        return samples[index]
+
+    def models(self) -> list[str]:
+        with self._lock:
+            return list(self._samples)
+
+
+class HedgingPolicy:
+    """Send a duplicate request when the first runs past a latency percentile.
+
+    The hedge delay is the `percentile` latency observed for the model over the
+    rolling window (never below `min_delay_seconds`); until `min_samples` calls
+    have completed nothing is hedged. Whichever attempt finishes first wins and
+    the other is cancelled: asyncio attempts are cancelled outright, thread
+    attempts that are already running are left to finish and their result is
+    discarded. Hedges are capped at `max_hedge_ratio` of primary requests
+    (at most 1.0), so hedging can never more than double quota use.
+
+    Sync attempts run on one shared pool of `max_workers` threads, of which at
+    most `max_hedges` run hedges. An attempt only starts when a worker is free,
+    so nothing waits in a queue and latency samples never include queueing: a
+    hedge without a free worker is skipped, and a primary without one runs on
+    the caller's thread, unhedged.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        window: int = 200,
+        max_hedge_ratio: float = 0.1,
+        min_delay_seconds: float = 0.5,
+        max_workers: int = 32,
+        max_hedges: int = 8,
+    ) -> None:
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max(0.0, min(1.0, max_hedge_ratio))
+        self.min_delay_seconds = min_delay_seconds
+        self.max_workers = max(0, int(max_workers))
+        self.max_hedges = max(0, min(self.max_workers, int(max_hedges)))
+        self.latencies = LatencyTracker(window)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._busy_workers = 0
+        self._running_hedges = 0
+        self._closed = False
+        self._counters = {
+            "requests": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "hedges_denied": 0,
+            "hedges_no_worker": 0,
+            "primaries_inline": 0,
+        }
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        threshold = self.latencies.percentile(model, self.percentile, min_samples=self.min_samples)
+        if threshold is None:
+            return None
+        return max(self.min_delay_seconds, threshold)
+
+    def run(self, model: str, call: Callable[[], T], *, can_hedge: Callable[[], bool] = lambda: True) -> T:
+        self._count("requests")
+        delay = self.hedge_delay(model)
+        if delay is None:
+            return self._timed(model, call)
+
+        primary = self._start(model, call, hedge=False) if self._reserve_worker(hedge=False) else None
+        if primary is None:
+            # No free worker (or closed); queueing would only add latency, so run unhedged here.
+            return self._timed(model, call)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        hedge = self._submit_hedge(model, call, can_hedge)
+        if hedge is None:
+            return primary.result()
+        return self._first_success(primary, hedge)
+
+    async def run_async(
+        self,
+        model: str,
+        call: Callable[[], Awaitable[T]],
+        *,
+        can_hedge: Callable[[], bool] = lambda: True,
+    ) -> T:
+        self._count("requests")
+        delay = self.hedge_delay(model)
+        if delay is None:
+            return await self._timed_async(model, call)
+
+        primary = asyncio.ensure_future(self._timed_async(model, call))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._allow_hedge(can_hedge):
+                return await primary
+
+            hedge = asyncio.ensure_future(self._timed_async(model, call))
+            tasks.append(hedge)
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = error or task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def close(self) -> None:
+        """Stop using the pool, so later sync calls run unhedged inline; running attempts finish on their own."""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        latency_ms: dict[str, dict[str, Optional[float]]] = {}
+        for model in self.latencies.models():
+            latency_ms[model] = {
+                f"p{pct}": self._ms(self.latencies.percentile(model, pct)) for pct in (50, 95, 99)
+            }
+        return {
+            **counters,
+            "percentile": self.percentile,
+            "max_hedge_ratio": self.max_hedge_ratio,
+            "latency_ms": latency_ms,
+        }
+
+    def _first_success(self, primary: Future[T], hedge: Future[T]) -> T:
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = error or future.exception()
+        assert error is not None
+        raise error
+
+    def _submit_hedge(self, model: str, call: Callable[[], T], can_hedge: Callable[[], bool]) -> Optional[Future[T]]:
+        if not self._reserve_worker(hedge=True):
+            # A hedge queued behind other attempts would start too late to help.
+            return None
+        if not self._allow_hedge(can_hedge):
+            self._release_worker(hedge=True)
+            return None
+        return self._start(model, call, hedge=True)
+
+    def _reserve_worker(self, *, hedge: bool) -> bool:
+        with self._lock:
+            full = self._busy_workers >= self.max_workers or (hedge and self._running_hedges >= self.max_hedges)
+            if self._closed or full:
+                self._counters["hedges_no_worker" if hedge else "primaries_inline"] += 1
+                return False
+            self._busy_workers += 1
+            if hedge:
+                self._running_hedges += 1
+            return True
+
+    def _release_worker(self, *, hedge: bool) -> None:
+        with self._lock:
+            self._busy_workers -= 1
+            if hedge:
+                self._running_hedges -= 1
+
+    def _start(self, model: str, call: Callable[[], T], *, hedge: bool) -> Optional[Future[T]]:
+        """Run a reserved attempt on the pool; None (and the reservation released) once closed."""
+        with self._lock:
+            executor = None
+            if not self._closed:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=max(1, self.max_workers),
+                        thread_name_prefix="gemini-hedging",
+                    )
+                executor = self._executor
+        try:
+            if executor is None:
+                raise RuntimeError("HedgingPolicy is closed")
+            future = executor.submit(self._timed, model, call)
+        except RuntimeError:
+            # Closed (or shut down by a concurrent close()) after the worker was reserved.
+            self._release_worker(hedge=hedge)
+            return None
+        future.add_done_callback(lambda _: self._release_worker(hedge=hedge))
+        return future
+
+    def _allow_hedge(self, can_hedge: Callable[[], bool]) -> bool:
+        with self._lock:
+            budget = self.max_hedge_ratio * self._counters["requests"]
+            if self._counters["hedges"] + 1 > budget:
+                self._counters["hedges_denied"] += 1
+                return False
+        if not can_hedge():
+            self._count("hedges_denied")
+            return False
+        self._count("hedges")
+        return True
+
+    def _timed(self, model: str, call: Callable[[], T]) -> T:
+        started = time.monotonic()
+        result = call()
+        self.latencies.record(model, time.monotonic() - started)
+        return result
+
+    async def _timed_async(self, model: str, call: Callable[[], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        result = await call()
+        self.latencies.record(model, time.monotonic() - started)
+        return result
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    @staticmethod
+    def _ms(seconds: Optional[float]) -> Optional[float]:
+        return None if seconds is None else round(seconds * 1000, 1)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .image_payload import ImageBytes
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+    np = None
+
+
+_FORMATS = {
+    "jpeg": (".jpg", "image/jpeg"),
+    "webp": (".webp", "image/webp"),
+}
+
+
+@dataclass(frozen=True)
+class PreprocessedImage:
+    data: ImageBytes
+    mime_type: str
+    original_bytes: int
+    resized: bool = False
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.data)
+
+
+class ImagePreprocessor:
+    """Downscale and re-encode images before they are sent to Gemini.
+
+    Decoding with OpenCV applies the EXIF orientation, and re-encoding drops all
+    EXIF metadata. Images that cannot be decoded (or when opencv-python is not
+    installed) pass through unchanged, as do images the re-encode would not
+    make smaller, so `bytes_saved` is never negative.
+    """
+
+    def __init__(self, *, max_edge: int = 1024, output_format: str = "jpeg", quality: int = 85) -> None:
+        if output_format not in _FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}. Use one of {sorted(_FORMATS)}.")
+        self.max_edge = max(1, int(max_edge))
+        self.output_format = output_format
+        self.quality = max(1, min(100, int(quality)))
+        self._lock = threading.Lock()
+        self._counters = {"images": 0, "passthrough": 0, "resized": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def process(self, data: ImageBytes, mime_type: Optional[str] = None) -> PreprocessedImage:
+        result = self._process(data, mime_type or "image/jpeg")
+        with self._lock:
+            self._counters["images"] += 1
+            self._counters["bytes_in"] += result.original_bytes
+            self._counters["bytes_out"] += len(result.data)
+            if result.resized:
+                self._counters["resized"] += 1
+            if result.data is data:
+                self._counters["passthrough"] += 1
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "bytes_saved": counters["bytes_in"] - counters["bytes_out"],
+            "max_edge": self.max_edge,
+            "output_format": self.output_format,
+            "quality": self.quality,
+        }
+
+    def _process(self, data: ImageBytes, mime_type: str) -> PreprocessedImage:
+        if cv2 is None or np is None or not data:
+            return PreprocessedImage(data=data, mime_type=mime_type, original_bytes=len(data))
+
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return PreprocessedImage(data=data, mime_type=mime_type, original_bytes=len(data))
+
+        height, width = image.shape[:2]
+        longest = max(height, width)
+        resized = longest > self.max_edge
+        if resized:
+            scale = self.max_edge / float(longest)
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+        extension, output_mime = _FORMATS[self.output_format]
+        if self.output_format == "webp":
+            params = [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+        else:
+            params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        ok, encoded = cv2.imencode(extension, image, params)
+        if not ok or encoded.nbytes >= len(data):
+            return PreprocessedImage(data=data, mime_type=mime_type, original_bytes=len(data))
+        return PreprocessedImage(
+            data=encoded.tobytes(),
+            mime_type=output_mime,
+            original_bytes=len(data),
+            resized=resized,
+        )
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+    np = None
+
+
+KEYFRAME_STRATEGIES = ("uniform", "motion")
+
+_MOTION_PROBE_WIDTH = 64
+
+
+@dataclass(frozen=True)
+class Keyframe:
+    index: int
+    timestamp_seconds: float
+    data: bytes
+    mime_type: str = "image/jpeg"
+
+
+class KeyframeSampler:
+    """Pick representative frames from a video locally and encode them as JPEG.
+
+    `uniform` takes the middle frame of `count` equal-length segments. `motion`
+    spaces frames evenly over cumulative inter-frame motion instead of time, so
+    busy stretches of the clip get more frames and a still clip degrades to
+    uniform sampling. Only the first `max_seconds` of the video are considered.
+    """
+
+    def __init__(
+        self,
+        *,
+        count: int = 8,
+        strategy: str = "uniform",
+        max_edge: int = 768,
+        quality: int = 85,
+    ) -> None:
+        _check_strategy(strategy)
+        self.count = max(1, int(count))
+        self.strategy = strategy
+        self.max_edge = max(1, int(max_edge))
+        self.quality = max(1, min(100, int(quality)))
+
+    def sample(
+        self,
+        video_path: str | Path,
+        *,
+        max_seconds: Optional[float] = None,
+        count: Optional[int] = None,
+        strategy: Optional[str] = None,
+    ) -> list[Keyframe]:
+        if cv2 is None or np is None:
+            raise RuntimeError("opencv-python is required for keyframe sampling.")
+        strategy = strategy or self.strategy
+        _check_strategy(strategy)
+        count = max(1, int(count or self.count))
+
+        path = Path(video_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Video not found: {video_path}")
+
+        fps, frame_total = self._probe(path, max_seconds)
+        if strategy == "motion":
+            indices = self._motion_indices(path, frame_total, count)
+        else:
+            indices = self._uniform_indices(frame_total, count)
+
+        frames = self._read_frames(path, indices)
+        if not frames:
+            raise ValueError(f"Unable to read frames from video: {path}")
+        return [
+            Keyframe(index=index, timestamp_seconds=round(index / fps, 3), data=self._encode(frame))
+            for index, frame in frames
+        ]
+
+    @staticmethod
+    def _probe(path: Path, max_seconds: Optional[float]) -> tuple[float, int]:
+        capture = cv2.VideoCapture(str(path))
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video file: {path}")
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS)
+            if not fps or fps <= 0:
+                fps = 30.0
+            frame_total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            if frame_total <= 0:
+                # Some containers do not report a frame count; count by grabbing.
+                while capture.grab():
+                    frame_total += 1
+        finally:
+            capture.release()
+
+        if max_seconds and max_seconds > 0:
+            frame_total = min(frame_total, max(1, int(fps * max_seconds)))
+        if frame_total <= 0:
+            raise ValueError(f"No frames found in video: {path}")
+        return fps, frame_total
+
+    @staticmethod
+    def _uniform_indices(frame_total: int, count: int) -> list[int]:
+        count = min(count, frame_total)
+        return sorted({int((slot + 0.5) * frame_total / count) for slot in range(count)})
+
+    def _motion_indices(self, path: Path, frame_total: int, count: int) -> list[int]:
+        motion = self._motion_profile(path, frame_total)
+        if len(motion) <= count:
+            return list(range(len(motion)))
+        # A small floor keeps time moving forward through still stretches.
+        weights = motion + max(float(motion.mean()), 1.0) * 0.05
+        cumulative = np.cumsum(weights)
+        targets = (np.arange(count) + 0.5) / count * cumulative[-1]
+        picked = np.searchsorted(cumulative, targets)
+        return sorted({int(min(index, len(motion) - 1)) for index in picked})
+
+    @staticmethod
+    def _motion_profile(path: Path, frame_total: int) -> "np.ndarray":
+        """Mean absolute difference of each frame to the previous one, on a tiny grayscale probe."""
+        capture = cv2.VideoCapture(str(path))
+        scores: list[float] = []
+        previous = None
+        try:
+            while len(scores) < frame_total:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                height, width = frame.shape[:2]
+                probe_size = (_MOTION_PROBE_WIDTH, max(1, round(height * _MOTION_PROBE_WIDTH / width)))
+                gray = cv2.cvtColor(cv2.resize(frame, probe_size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+                scores.append(0.0 if previous is None else float(cv2.absdiff(gray, previous).mean()))
+                previous = gray
+        finally:
+            capture.release()
+        return np.asarray(scores, dtype=np.float64)
+
+    @staticmethod
+    def _read_frames(path: Path, indices: list[int]) -> list[tuple[int, "np.ndarray"]]:
+        wanted = set(indices)
+        last = max(indices, default=-1)
+        capture = cv2.VideoCapture(str(path))
+        frames: list[tuple[int, np.ndarray]] = []
+        try:
+            # Sequential grab/retrieve is frame-accurate where CAP_PROP_POS_FRAMES seeking is not.
+            for index in range(last + 1):
+                if not capture.grab():
+                    break
+                if index in wanted:
+                    ok, frame = capture.retrieve()
+                    if ok:
+                        frames.append((index, frame))
+        finally:
+            capture.release()
+        return frames
+
+    def _encode(self, frame: "np.ndarray") -> bytes:
+        height, width = frame.shape[:2]
+        longest = max(height, width)
+        if longest > self.max_edge:
+            scale = self.max_edge / float(longest)
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("Failed to encode video keyframe as JPEG.")
+        return encoded.tobytes()
+
+
+def _check_strategy(strategy: str) -> None:
+    if strategy not in KEYFRAME_STRATEGIES:
+        raise ValueError(f"Unsupported keyframe strategy: {strategy}. Use one of {list(KEYFRAME_STRATEGIES)}.")
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from .hedging import LatencyTracker
+
+
+DEFAULT_SCREEN_PROMPT_PATH = Path(__file__).resolve().parents[2] / "prompts" / "lost_dog_match_screen_prompt.txt"
+
+
+class MatchCascade:
+    """Two-tier candidate scoring for DogMatcher.
+
+    Every candidate is first scored by `screen_tier` with a reduced-output
+    prompt. Only scores within `band` points of the matcher's
+    similarity_threshold are close enough to be unsure about; those candidates
+    are escalated to `escalation_tier` with the full prompt, and that score is
+    the one kept. Tiers are model names resolved by the client
+    (`GeminiClient.model_tiers`).
+    """
+
+    def __init__(
+        self,
+        *,
+        screen_tier: str = "fast",
+        escalation_tier: str = "strong",
+        band: float = 10.0,
+        screen_prompt_path: Path = DEFAULT_SCREEN_PROMPT_PATH,
+        screen_max_output_tokens: int = 256,
+    ) -> None:
+        self.screen_tier = screen_tier
+        self.escalation_tier = escalation_tier
+        self.band = max(0.0, float(band))
+        self.screen_prompt_path = screen_prompt_path
+        self.screen_max_output_tokens = screen_max_output_tokens
+        self._latency = LatencyTracker()
+        self._lock = threading.Lock()
+        self._calls: dict[str, int] = {}
+        self._screened = 0
+        self._escalated = 0
+
+    def load_screen_prompt(self) -> str:
+        if not self.screen_prompt_path.exists():
+            raise FileNotFoundError(f"Prompt file not found: {self.screen_prompt_path}")
+        return self.screen_prompt_path.read_text(encoding="utf-8")
+
+    def should_escalate(self, similarity: float, threshold: float) -> bool:
+        escalate = abs(similarity - threshold) <= self.band
+        with self._lock:
+            self._screened += 1
+            if escalate:
+                self._escalated += 1
+        return escalate
+
+    def record_call(self, tier: str, seconds: float) -> None:
+        """Count one model call (cache hits excluded) and its latency."""
+        self._latency.record(tier, seconds)
+        with self._lock:
+            self._calls[tier] = self._calls.get(tier, 0) + 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            calls = dict(self._calls)
+            screened, escalated = self._screened, self._escalated
+        tiers: dict[str, Any] = {}
+        for tier, count in calls.items():
+            tiers[tier] = {
+                "calls": count,
+                "p50_latency_ms": _millis(self._latency.percentile(tier, 50.0)),
+                "p95_latency_ms": _millis(self._latency.percentile(tier, 95.0)),
+            }
+        return {
+            "band": self.band,
+            "screened": screened,
+            "escalated": escalated,
+            "tiers": tiers,
+        }
+
+
+def _millis(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, Protocol
+
+
+logger = logging.getLogger(__name__)
+
+MATCH_JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class MatchJob:
+    job_id: str
+    status: str
+    payload: dict[str, Any]
+    attempts: int = 0
+    progress_done: int = 0
+    progress_total: int = 0
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    run_seconds: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        queue_seconds = None if self.started_at is None else round(self.started_at - self.created_at, 3)
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "progress": {"done": self.progress_done, "total": self.progress_total},
+            "result": self.result,
+            "error": self.error,
+            "timing": {
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "queue_seconds": queue_seconds,
+                "run_seconds": round(self.run_seconds, 3),
+            },
+        }
+
+
+class MatchJobRepository(Protocol):
+    """Storage contract for MatchJobWorkerPool; see SQLiteMatchJobRepository."""
+
+    def claim(self, worker_id: str, *, lease_seconds: float, max_attempts: int) -> Optional[MatchJob]:
+        ...
+
+    def update_progress(self, job_id: str, worker_id: str, done: int, total: int, *, lease_seconds: float) -> None:
+        ...
+
+    def complete(self, job_id: str, worker_id: str, result: dict[str, Any], *, run_seconds: float) -> None:
+        ...
+
+    def retry_later(self, job_id: str, worker_id: str, error: str, *, run_seconds: float, delay_seconds: float) -> None:
+        ...
+
+    def fail(self, job_id: str, worker_id: str, error: str, *, run_seconds: float) -> None:
+        ...
+
+    def release(self, job_id: str, worker_id: str) -> None:
+        ...
+
+
+JobRunner = Callable[[MatchJob, ProgressCallback], Awaitable[dict[str, Any]]]
+
+
+class MatchJobWorkerPool:
+    """Asyncio workers that claim queued match jobs and run them.
+
+    Jobs are leased rather than locked: every progress write extends the lease,
+    and a job whose lease lapses (its worker or process died) is claimed again by
+    the next free worker, so queued and interrupted work survives restarts. A run
+    that raises is retried after `retry_delay_seconds` until `max_attempts`; a
+    job whose lease lapses after its last attempt is failed rather than claimed.
+    Progress is written at most once per `progress_interval_seconds`, plus the
+    final count.
+    """
+
+    def __init__(
+        self,
+        repository: MatchJobRepository,
+        run_job: JobRunner,
+        *,
+        workers: int = 1,
+        poll_interval_seconds: float = 1.0,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        retry_delay_seconds: float = 30.0,
+        progress_interval_seconds: float = 1.0,
+    ) -> None:
+        self.repository = repository
+        self.run_job = run_job
+        self.workers = max(1, int(workers))
+        self.poll_interval_seconds = poll_interval_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_delay_seconds = retry_delay_seconds
+        # Progress writes also renew the lease, so they must stay well inside it.
+        self.progress_interval_seconds = min(progress_interval_seconds, lease_seconds / 3)
+        self._name = uuid.uuid4().hex[:8]
+        self._stopping: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._work(f"{self._name}-{index}"), name=f"match-job-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        if self._stopping is not None:
+            self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_forever(self) -> None:
+        self.start()
+        await asyncio.gather(*self._tasks)
+
+    async def _work(self, worker_id: str) -> None:
+        assert self._stopping is not None
+        while not self._stopping.is_set():
+            try:
+                job = await asyncio.to_thread(
+                    self.repository.claim,
+                    worker_id,
+                    lease_seconds=self.lease_seconds,
+                    max_attempts=self.max_attempts,
+                )
+            except Exception:
+                logger.exception("Claiming a match job failed")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job, worker_id)
+
+    async def _run(self, job: MatchJob, worker_id: str) -> None:
+        started = time.monotonic()
+        last_write = float("-inf")
+        last_progress = (-1, -1)
+
+        async def progress(done: int, total: int) -> None:
+            # One write per candidate would be a transaction per outcome; keep
+            # at most one per interval, plus the final count.
+            nonlocal last_write, last_progress
+            now = time.monotonic()
+            finished = done >= total and (done, total) != last_progress
+            if not finished and now - last_write < self.progress_interval_seconds:
+                return
+            last_write, last_progress = now, (done, total)
+            await asyncio.to_thread(
+                self.repository.update_progress,
+                job.job_id,
+                worker_id,
+                done,
+                total,
+                lease_seconds=self.lease_seconds,
+            )
+
+        try:
+            result = await self.run_job(job, progress)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back instead of waiting out the lease.
+            await asyncio.to_thread(self.repository.release, job.job_id, worker_id)
+            raise
+        except Exception as exc:
+            elapsed = time.monotonic() - started
+            error = f"{type(exc).__name__}: {exc}"
+            if job.attempts < self.max_attempts:
+                await asyncio.to_thread(
+                    self.repository.retry_later,
+                    job.job_id,
+                    worker_id,
+                    error,
+                    run_seconds=elapsed,
+                    delay_seconds=self.retry_delay_seconds,
+                )
+            else:
+                await asyncio.to_thread(self.repository.fail, job.job_id, worker_id, error, run_seconds=elapsed)
+            return
+        await asyncio.to_thread(
+            self.repository.complete,
+            job.job_id,
+            worker_id,
+            result,
+            run_seconds=time.monotonic() - started,
+        )
@@ -1,17 +1,29 @@
 from __future__ import annotations
 
-import base64
+import asyncio
 import hashlib
 import mimetypes
+from functools import partial
 from pathlib import Path
 from typing import Any, Optional, Sequence
 
+from .image_payload import ImageBytes, decode_base64_image
+from .image_preprocessor import ImagePreprocessor
+from .response_cache import ResponseCache, request_fingerprint
+
 
 class MockGeminiClient:
     """Offline fake client for local API testing without Gemini credentials."""
 
-    def __init__(self, *_: Any, **__: Any) -> None:
-        pass
+    def __init__(
+        self,
+        *_: Any,
+        response_cache: Optional[ResponseCache] = None,
+        image_preprocessor: Optional[ImagePreprocessor] = None,
+        **__: Any,
+    ) -> None:
+        self.response_cache = response_cache
+        self.image_preprocessor = image_preprocessor
 
     def generate_json(
         self,
@@ -22,7 +34,30 @@ class MockGeminiClient:
         temperature: Optional[float] = None,
         max_output_tokens: int = 2048,
     ) -> dict[str, Any]:
-        del model, temperature, max_output_tokens
+        cache_key: Optional[str] = None
+        if self.response_cache is not None:
+            cache_key = request_fingerprint(
+                model_name=self._resolve_model_name(model),
+                prompt=prompt,
+                parts=parts,
+                temperature=0.0 if temperature is None else temperature,
+                max_output_tokens=max_output_tokens,
+            )
+            if cache_key is not None:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+        result = self._generate(prompt, parts or [])
+        if cache_key is not None and self.response_cache is not None:
+            self.response_cache.set(cache_key, result)
+        return result
+
+    @staticmethod
+    def _resolve_model_name(model: str) -> str:
+        return f"mock-{model}"
+
+    def _generate(self, prompt: str, parts: Sequence[Any]) -> dict[str, Any]:
         lower_prompt = prompt.lower()
 
         if '"activity_level"' in lower_prompt and '"approach_speed"' in lower_prompt:
@@ -34,8 +69,16 @@ class MockGeminiClient:
                 "body_language_score": 7.1,
             }
 
+        if '"results"' in lower_prompt and '"index"' in lower_prompt:
+            # Batched comparison: the notice first, then each candidate scored as a pair would be.
+            results = []
+            for index, part in enumerate(parts[1:], start=1):
+                score = self._mock_similarity([parts[0], part])
+                results.append({"index": index, "similarity_score": score, "is_match": score >= 70})
+            return {"results": results}
+
         if '"similarity_score"' in lower_prompt and '"is_match"' in lower_prompt:
-            score = self._mock_similarity(parts or [])
+            score = self._mock_similarity(parts)
             return {
                 "breed_match": score >= 60,
                 "coat_pattern_similarity": max(0.0, min(100.0, score - 5)),
@@ -58,22 +101,34 @@ class MockGeminiClient:
     def build_image_part(
         self,
         *,
+        image_bytes: Optional[ImageBytes] = None,
         image_base64: Optional[str] = None,
         image_path: Optional[str] = None,
         mime_type: Optional[str] = None,
     ) -> dict[str, Any]:
-        if bool(image_base64) == bool(image_path):
-            raise ValueError("Provide exactly one of image_base64 or image_path.")
-
-        if image_path:
+        if sum(1 for source in (image_bytes, image_base64, image_path) if source) != 1:
+            raise ValueError("Provide exactly one of image_bytes, image_base64 or image_path.")
+
+        data: ImageBytes
+        if image_bytes:
+            mime = mime_type or "image/jpeg"
+            data = image_bytes
+        elif image_path:
             path = Path(image_path)
             if not path.exists():
                 raise FileNotFoundError(f"Image not found: {image_path}")
             guessed = mimetypes.guess_type(path.name)[0]
-            return {"mime_type": mime_type or guessed or "image/jpeg", "data": path.read_bytes()}
-
-        assert image_base64 is not None
-        return {"mime_type": mime_type or "image/jpeg", "data": self._decode_base64(image_base64)}
+            mime = mime_type or guessed or "image/jpeg"
+            data = path.read_bytes()
+        else:
+            assert image_base64 is not None
+            mime = mime_type or "image/jpeg"
+            data = self._decode_base64(image_base64)
+
+        if self.image_preprocessor is not None:
+            processed = self.image_preprocessor.process(data, mime)
+            data, mime = processed.data, processed.mime_type
+        return {"mime_type": mime, "data": data}
 
     def upload_video(self, video_path: str, *, preprocess_seconds: Optional[int] = 10) -> Any:
         del preprocess_seconds
@@ -82,17 +137,16 @@ class MockGeminiClient:
             raise FileNotFoundError(f"Video not found: {video_path}")
         return {"name": "mock-video", "path": str(path)}
 
+    def release_uploaded_file(self, uploaded_file_or_name: Any) -> None:
+        self.delete_uploaded_file(uploaded_file_or_name)
+
     def delete_uploaded_file(self, uploaded_file_or_name: Any) -> None:
         del uploaded_file_or_name
         return
 
     @staticmethod
-    def _decode_base64(payload: str) -> bytes:
-        cleaned = payload.strip()
-        if cleaned.startswith("data:") and "," in cleaned:
-            cleaned = cleaned.split(",", 1)[1]
-        cleaned = "".join(cleaned.split())
-        return base64.b64decode(cleaned, validate=False)
+    def _decode_base64(payload: str) -> bytearray:
+        return decode_base64_image(payload, validate=False)
 
     def _mock_similarity(self, parts: Sequence[Any]) -> float:
         if len(parts) < 2:
@@ -113,6 +167,66 @@ class MockGeminiClient:
     def _extract_bytes(part: Any) -> bytes:
         if isinstance(part, dict):
             data = part.get("data")
-            if isinstance(data, bytes):
-                return data
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                return bytes(data)
         return b""
+
+
+class AsyncMockGeminiClient:
+    """Async facade over MockGeminiClient matching the AsyncGeminiClient surface."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._client = MockGeminiClient(*args, **kwargs)
+
+    @property
+    def response_cache(self) -> Optional[ResponseCache]:
+        return self._client.response_cache
+
+    def _resolve_model_name(self, model: str) -> str:
+        return self._client._resolve_model_name(model)
+
+    async def generate_json(
+        self,
+        prompt: str,
+        *,
+        parts: Optional[Sequence[Any]] = None,
+        model: str = "image",
+        temperature: Optional[float] = None,
+        max_output_tokens: int = 2048,
+    ) -> dict[str, Any]:
+        call = partial(
+            self._client.generate_json,
+            prompt,
+            parts=parts,
+            model=model,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+        )
+        # Like AsyncGeminiClient, keep the SQLite-backed cache tier off the event loop.
+        if self.response_cache is not None:
+            return await asyncio.to_thread(call)
+        return call()
+
+    def build_image_part(
+        self,
+        *,
+        image_bytes: Optional[ImageBytes] = None,
+        image_base64: Optional[str] = None,
+        image_path: Optional[str] = None,
+        mime_type: Optional[str] = None,
+    ) -> dict[str, Any]:
+        return self._client.build_image_part(
+            image_bytes=image_bytes,
+            image_base64=image_base64,
+            image_path=image_path,
+            mime_type=mime_type,
+        )
+
+    async def upload_video(self, video_path: str, *, preprocess_seconds: Optional[int] = 10) -> Any:
+        return self._client.upload_video(video_path, preprocess_seconds=preprocess_seconds)
+
+    async def release_uploaded_file(self, uploaded_file_or_name: Any) -> None:
+        self._client.release_uploaded_file(uploaded_file_or_name)
+
+    async def delete_uploaded_file(self, uploaded_file_or_name: Any) -> None:
+        self._client.delete_uploaded_file(uploaded_file_or_name)
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Any, Optional, Protocol
 
-from .gemini_client import GeminiClient
+from .gemini_client import AsyncGeminiClient, GeminiClient
+from .image_payload import ImageBytes
 
 
 DEFAULT_PROMPT_PATH = Path(__file__).resolve().parents[2] / "prompts" / "photo_analysis_prompt.txt"
@@ -29,10 +31,10 @@ class PhotoAnalysisResult:
         return asdict(self)
 
 
-class PhotoAnalyzer:
+class _PhotoAnalyzerBase:
     def __init__(
         self,
-        client: GeminiClient,
+        client: Any,
         prompt_path: Path = DEFAULT_PROMPT_PATH,
         temperature: float = 0.3,
     ) -> None:
@@ -40,34 +42,6 @@ class PhotoAnalyzer:
         self.prompt_path = prompt_path
         self.temperature = temperature
 
-    def analyze_photo(
-        self,
-        *,
-        image_base64: Optional[str] = None,
-        image_path: Optional[str] = None,
-    ) -> dict[str, Any]:
-        prompt = self._load_prompt()
-        image_part = self.client.build_image_part(image_base64=image_base64, image_path=image_path)
-        raw = self.client.generate_json(
-            prompt,
-            parts=[image_part],
-            model="image",
-            temperature=self.temperature,
-        )
-        return self._normalize_result(raw).to_dict()
-
-    def analyze_and_persist(
-        self,
-        *,
-        pet_id: str,
-        repository: PetAIRepository,
-        image_base64: Optional[str] = None,
-        image_path: Optional[str] = None,
-    ) -> dict[str, Any]:
-        result = self.analyze_photo(image_base64=image_base64, image_path=image_path)
-        repository.update_pet_ai_tags(pet_id, result)
-        return result
-
     def _load_prompt(self) -> str:
         if not self.prompt_path.exists():
             raise FileNotFoundError(f"Prompt file not found: {self.prompt_path}")
@@ -121,3 +95,110 @@ class PhotoAnalyzer:
             pieces = [part.strip() for part in value.split(",")]
             return [part for part in pieces if part]
         return []
+
+
+class PhotoAnalyzer(_PhotoAnalyzerBase):
+    def __init__(
+        self,
+        client: GeminiClient,
+        prompt_path: Path = DEFAULT_PROMPT_PATH,
+        temperature: float = 0.3,
+    ) -> None:
+        super().__init__(client, prompt_path=prompt_path, temperature=temperature)
+
+    def analyze_photo(
+        self,
+        *,
+        image_bytes: Optional[ImageBytes] = None,
+        image_base64: Optional[str] = None,
+        image_path: Optional[str] = None,
+        mime_type: Optional[str] = None,
+    ) -> dict[str, Any]:
+        prompt = self._load_prompt()
+        image_part = self.client.build_image_part(
+            image_bytes=image_bytes,
+            image_base64=image_base64,
+            image_path=image_path,
+            mime_type=mime_type,
+        )
+        raw = self.client.generate_json(
+            prompt,
+            parts=[image_part],
+            model="image",
+            temperature=self.temperature,
+        )
+        return self._normalize_result(raw).to_dict()
+
+    def analyze_and_persist(
+        self,
+        *,
+        pet_id: str,
+        repository: PetAIRepository,
+        image_bytes: Optional[ImageBytes] = None,
+        image_base64: Optional[str] = None,
+        image_path: Optional[str] = None,
+        mime_type: Optional[str] = None,
+    ) -> dict[str, Any]:
+        result = self.analyze_photo(
+            image_bytes=image_bytes,
+            image_base64=image_base64,
+            image_path=image_path,
+            mime_type=mime_type,
+        )
+        repository.update_pet_ai_tags(pet_id, result)
+        return result
+
+
+class AsyncPhotoAnalyzer(_PhotoAnalyzerBase):
+    """PhotoAnalyzer counterpart for AsyncGeminiClient; persistence runs in a worker thread."""
+
+    def __init__(
+        self,
+        client: AsyncGeminiClient,
+        prompt_path: Path = DEFAULT_PROMPT_PATH,
+        temperature: float = 0.3,
+    ) -> None:
+        super().__init__(client, prompt_path=prompt_path, temperature=temperature)
+
+    async def analyze_photo(
+        self,
+        *,
+        image_bytes: Optional[ImageBytes] = None,
+        image_base64: Optional[str] = None,
+        image_path: Optional[str] = None,
+        mime_type: Optional[str] = None,
+    ) -> dict[str, Any]:
+        prompt = self._load_prompt()
+        image_part = await asyncio.to_thread(
+            self.client.build_image_part,
+            image_bytes=image_bytes,
+            image_base64=image_base64,
+            image_path=image_path,
+            mime_type=mime_type,
+        )
+        raw = await self.client.generate_json(
+            prompt,
+            parts=[image_part],
+            model="image",
+            temperature=self.temperature,
+        )
+        return self._normalize_result(raw).to_dict()
+
+    async def analyze_and_persist(
+        self,
+        *,
+        pet_id: str,
+        repository: PetAIRepository,
+        image_bytes: Optional[ImageBytes] = None,
+        image_base64: Optional[str] = None,
+        image_path: Optional[str] = None,
+        mime_type: Optional[str] = None,
+    ) -> dict[str, Any]:
+        result = await self.analyze_photo(
+            image_bytes=image_bytes,
+            image_base64=image_base64,
+            image_path=image_path,
+            mime_type=mime_type,
+        )
+        await asyncio.to_thread(repository.update_pet_ai_tags, pet_id, result)
+        return result
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, Sequence, TypeVar
+
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRYABLE_STATUS_NAMES = ("RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED")
+
+# Rough input-token costs used for TPM accounting before the call is made.
+IMAGE_PART_TOKENS = 258
+FILE_PART_TOKENS = 2630
+_CHARS_PER_TOKEN = 4
+
+_RETRY_DELAY_RE = re.compile(r"retryDelay['\"]?\s*:\s*['\"](\d+(?:\.\d+)?)s")
+
+
+def estimate_request_tokens(prompt: str, parts: Optional[Sequence[Any]]) -> int:
+    tokens = len(prompt) // _CHARS_PER_TOKEN + 1
+    for part in parts or []:
+        if isinstance(part, str):
+            tokens += len(part) // _CHARS_PER_TOKEN + 1
+        elif _is_inline_part(part):
+            tokens += IMAGE_PART_TOKENS
+        else:
+            tokens += FILE_PART_TOKENS
+    return tokens
+
+
+def _is_inline_part(part: Any) -> bool:
+    if isinstance(part, dict):
+        return "data" in part
+    return getattr(part, "inline_data", None) is not None
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+        return True
+    status = str(getattr(exc, "status", "") or "").upper()
+    message = str(exc).upper()
+    return any(name in status or name in message for name in RETRYABLE_STATUS_NAMES)
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Extract a server retry hint from a `Retry-After` header or a google.rpc.RetryInfo detail."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            value = headers.get("retry-after")
+        except Exception:
+            value = None
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                pass
+
+    text = f"{getattr(exc, 'details', '')} {exc}"
+    match = _RETRY_DELAY_RE.search(text)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 5
+    base_delay_seconds: float = 1.0
+    max_delay_seconds: float = 32.0
+    total_budget_seconds: float = 60.0
+
+    def backoff_seconds(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number `attempt` (1-based): full jitter, or the server hint plus a little jitter."""
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay_seconds)
+        ceiling = min(self.max_delay_seconds, self.base_delay_seconds * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float, now: float) -> None:
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` tokens, going into debt if needed; returns seconds until the debt is repaid."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.refill_per_second
+
+    def available(self, amount: float, now: float) -> bool:
+        tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        return tokens >= min(amount, self.capacity)
+
+
+class QuotaRateLimiter:
+    """Per-model requests-per-minute and tokens-per-minute buckets.
+
+    Callers reserve capacity before each upstream call and sleep for however long
+    the buckets are in debt, so sustained load settles just under quota. A server
+    retry hint pauses the model for every caller, not just the one that saw it.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.requests_per_minute = requests_per_minute or None
+        self.tokens_per_minute = tokens_per_minute or None
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._request_buckets: dict[str, TokenBucket] = {}
+        self._token_buckets: dict[str, TokenBucket] = {}
+        self._paused_until: dict[str, float] = {}
+        self._counters = {
+            "acquired": 0,
+            "throttled": 0,
+            "throttled_seconds": 0.0,
+            "retries": 0,
+            "server_backoffs": 0,
+            "retry_exhausted": 0,
+        }
+
+    def acquire(self, model: str, estimated_tokens: int = 0) -> None:
+        wait = self.reserve(model, estimated_tokens)
+        if wait > 0:
+            self._sleep(wait)
+
+    async def acquire_async(self, model: str, estimated_tokens: int = 0) -> None:
+        wait = self.reserve(model, estimated_tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def reserve(self, model: str, estimated_tokens: int = 0) -> float:
+        now = self._clock()
+        with self._lock:
+            wait = max(0.0, self._paused_until.get(model, 0.0) - now)
+            if self.requests_per_minute:
+                bucket = self._bucket(self._request_buckets, model, self.requests_per_minute, now)
+                wait = max(wait, bucket.reserve(1, now))
+            if self.tokens_per_minute and estimated_tokens > 0:
+                bucket = self._bucket(self._token_buckets, model, self.tokens_per_minute, now)
+                wait = max(wait, bucket.reserve(estimated_tokens, now))
+            self._counters["acquired"] += 1
+            if wait > 0:
+                self._counters["throttled"] += 1
+                self._counters["throttled_seconds"] += wait
+            return wait
+
+    def try_acquire(self, model: str, estimated_tokens: int = 0) -> bool:
+        """Reserve capacity only if it is available right now; used for optional extra calls."""
+        now = self._clock()
+        with self._lock:
+            if self._paused_until.get(model, 0.0) > now:
+                return False
+            checks: list[tuple[TokenBucket, float]] = []
+            if self.requests_per_minute:
+                checks.append((self._bucket(self._request_buckets, model, self.requests_per_minute, now), 1))
+            if self.tokens_per_minute and estimated_tokens > 0:
+                bucket = self._bucket(self._token_buckets, model, self.tokens_per_minute, now)
+                checks.append((bucket, estimated_tokens))
+            if not all(bucket.available(amount, now) for bucket, amount in checks):
+                return False
+            for bucket, amount in checks:
+                bucket.reserve(amount, now)
+            self._counters["acquired"] += 1
+            return True
+
+    def pause(self, model: str, seconds: float) -> None:
+        with self._lock:
+            self._counters["server_backoffs"] += 1
+            until = self._clock() + seconds
+            self._paused_until[model] = max(self._paused_until.get(model, 0.0), until)
+
+    def record_retry(self, *, exhausted: bool = False) -> None:
+        with self._lock:
+            self._counters["retry_exhausted" if exhausted else "retries"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "throttled_seconds": round(self._counters["throttled_seconds"], 3),
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+            }
+
+    def clock(self) -> float:
+        return self._clock()
+
+    def sleep(self, seconds: float) -> None:
+        self._sleep(seconds)
+
+    @staticmethod
+    def _bucket(buckets: dict[str, TokenBucket], model: str, per_minute: float, now: float) -> TokenBucket:
+        bucket = buckets.get(model)
+        if bucket is None:
+            bucket = TokenBucket(capacity=per_minute, refill_per_second=per_minute / 60.0, now=now)
+            buckets[model] = bucket
+        return bucket
+
+
+def call_with_retry(
+    call: Callable[[], T],
+    *,
+    policy: RetryPolicy,
+    limiter: QuotaRateLimiter,
+    model: str,
+    estimated_tokens: int = 0,
+    throttle: bool = True,
+) -> T:
+    started = limiter.clock()
+    attempt = 0
+    while True:
+        attempt += 1
+        if throttle:
+            limiter.acquire(model, estimated_tokens)
+        try:
+            return call()
+        except Exception as exc:
+            delay = _next_delay(exc, attempt, started, policy, limiter, model)
+            if delay is None:
+                raise
+        limiter.sleep(delay)
+
+
+async def call_with_retry_async(
+    call: Callable[[], Awaitable[T]],
+    *,
+    policy: RetryPolicy,
+    limiter: QuotaRateLimiter,
+    model: str,
+    estimated_tokens: int = 0,
+    throttle: bool = True,
+) -> T:
+    started = limiter.clock()
+    attempt = 0
+    while True:
+        attempt += 1
+        if throttle:
+            await limiter.acquire_async(model, estimated_tokens)
+        try:
+            return await call()
+        except Exception as exc:
+            delay = _next_delay(exc, attempt, started, policy, limiter, model)
+            if delay is None:
+                raise
+        await asyncio.sleep(delay)
+
+
+def _next_delay(
+    exc: Exception,
+    attempt: int,
+    started: float,
+    policy: RetryPolicy,
+    limiter: QuotaRateLimiter,
+    model: str,
+) -> Optional[float]:
+    """Return the backoff before the next attempt, or None when the error should propagate."""
+    if not is_retryable_error(exc):
+        return None
+    hint = retry_after_seconds(exc)
+    delay = policy.backoff_seconds(attempt, hint)
+    elapsed = limiter.clock() - started
+    if attempt >= policy.max_attempts or elapsed + delay > policy.total_budget_seconds:
+        limiter.record_retry(exhausted=True)
+        return None
+    if hint is not None:
+        limiter.pause(model, delay)
+    limiter.record_retry()
+    return delay
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import threading
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class RequestCoalescer:
+    """Single-flight execution: concurrent calls with the same key share one upstream call.
+
+    The first caller for a key (the leader) runs the call; callers arriving while it
+    is in flight wait for and receive its result or exception. Followers get a deep
+    copy of the result so callers can mutate what they receive independently.
+    Thread callers use `run`, asyncio callers use `run_async`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+        self._tasks: dict[tuple[int, str], asyncio.Task[Any]] = {}
+        self._counters = {"requests": 0, "upstream_calls": 0, "coalesced": 0}
+
+    def run(self, key: str, call: Callable[[], T]) -> T:
+        with self._lock:
+            self._counters["requests"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._counters["upstream_calls"] += 1
+            else:
+                self._counters["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = call()
+            return flight.result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def run_async(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            self._counters["requests"] += 1
+            task = self._tasks.get(task_key)
+            leader = task is None
+            if task is None:
+                task = loop.create_task(self._await(call))
+                self._tasks[task_key] = task
+                task.add_done_callback(lambda done: self._finish_task(task_key, done))
+                self._counters["upstream_calls"] += 1
+            else:
+                self._counters["coalesced"] += 1
+
+        # Shield the shared call so one cancelled waiter does not cancel it for the others.
+        result = await asyncio.shield(task)
+        return result if leader else copy.deepcopy(result)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "in_flight": len(self._flights) + len(self._tasks),
+            }
+
+    @staticmethod
+    async def _await(call: Callable[[], Awaitable[T]]) -> T:
+        return await call()
+
+    def _finish_task(self, task_key: tuple[int, str], task: asyncio.Task[Any]) -> None:
+        with self._lock:
+            self._tasks.pop(task_key, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter was cancelled.
+            task.exception()
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Sequence
+
+from app.db.sqlite import SQLiteDatabase
+
+
+def request_fingerprint(
+    *,
+    model_name: str,
+    prompt: str,
+    parts: Optional[Sequence[Any]],
+    temperature: float,
+    max_output_tokens: int,
+) -> Optional[str]:
+    """Hash everything that determines a `generate_json` response.
+
+    Returns None when a part cannot be identified by content or remote file name,
+    in which case the request must not be cached.
+    """
+    digest = hashlib.sha256()
+    _update(digest, "model", model_name.encode("utf-8"))
+    _update(digest, "prompt", prompt.encode("utf-8"))
+    _update(digest, "temperature", repr(float(temperature)).encode("ascii"))
+    _update(digest, "max_output_tokens", str(int(max_output_tokens)).encode("ascii"))
+    for part in parts or []:
+        identity = _part_identity(part)
+        if identity is None:
+            return None
+        kind, payload = identity
+        _update(digest, kind, payload)
+    return digest.hexdigest()
+
+
+def _update(digest: Any, label: str, payload: bytes) -> None:
+    # Length-prefix every field so adjacent values cannot collide.
+    header = f"{label}:{len(payload)}:".encode("ascii")
+    digest.update(header)
+    digest.update(payload)
+
+
+def part_digest(part: Any) -> Optional[str]:
+    """Content hash of a single request part; None when it has no stable identity."""
+    identity = _part_identity(part)
+    if identity is None:
+        return None
+    digest = hashlib.sha256()
+    _update(digest, *identity)
+    return digest.hexdigest()
+
+
+def _part_identity(part: Any) -> Optional[tuple[str, bytes]]:
+    if isinstance(part, (bytes, bytearray, memoryview)):
+        return "bytes", hashlib.sha256(part).digest()
+    if isinstance(part, str):
+        return "text", part.encode("utf-8")
+    if isinstance(part, dict):
+        data = part.get("data")
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            mime = str(part.get("mime_type", "")).encode("utf-8")
+            return "inline", mime + b"\x00" + hashlib.sha256(data).digest()
+        name = part.get("uri") or part.get("name")
+        if name:
+            return "file", str(name).encode("utf-8")
+        return None
+
+    inline_data = getattr(part, "inline_data", None)
+    data = getattr(inline_data, "data", None)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        mime = str(getattr(inline_data, "mime_type", "") or "").encode("utf-8")
+        return "inline", mime + b"\x00" + hashlib.sha256(data).digest()
+
+    file_data = getattr(part, "file_data", None)
+    file_uri = getattr(file_data, "file_uri", None)
+    if file_uri:
+        return "file", str(file_uri).encode("utf-8")
+
+    text = getattr(part, "text", None)
+    if isinstance(text, str) and text:
+        return "text", text.encode("utf-8")
+
+    name = getattr(part, "uri", None) or getattr(part, "name", None)
+    if isinstance(name, str) and name:
+        return "file", name.encode("utf-8")
+    return None
+
+
+class ResponseCache:
+    """Two-tier cache for parsed Gemini JSON responses.
+
+    The memory tier is an LRU bounded by total payload bytes; the optional
+    SQLite tier (the `response_cache` table of `db`) survives restarts. Both
+    tiers expire entries after `ttl_seconds`. Disk writes are not waited for:
+    a lost cache entry only costs a repeat call.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl_seconds: float = 3600.0,
+        db: Optional[SQLiteDatabase] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl_seconds = float(ttl_seconds)
+        self.db = db
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._memory_bytes = 0
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+        if self.db is not None:
+            now = self._clock()
+            self.db.write(lambda conn: conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,)))
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return json.loads(payload)
+                self._drop(key)
+                self._counters["expirations"] += 1
+
+        disk_entry = self._disk_get(key, now)
+        with self._lock:
+            if disk_entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._store_memory(key, disk_entry[0], disk_entry[1])
+        return json.loads(disk_entry[1])
+
+    def set(self, key: str, value: dict[str, Any]) -> None:
+        payload = json.dumps(value, ensure_ascii=True, separators=(",", ":")).encode("utf-8")
+        expires_at = self._clock() + self.ttl_seconds
+        with self._lock:
+            self._counters["stores"] += 1
+            self._store_memory(key, expires_at, payload)
+        self._disk_set(key, expires_at, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+        if self.db is not None:
+            self.db.write(lambda conn: conn.execute("DELETE FROM response_cache"))
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "max_bytes": self.max_bytes,
+                "disk_enabled": self.db is not None,
+            }
+
+    def _store_memory(self, key: str, expires_at: float, payload: bytes) -> None:
+        if key in self._entries:
+            self._drop(key)
+        if len(payload) > self.max_bytes:
+            return
+        self._entries[key] = (expires_at, payload)
+        self._memory_bytes += len(payload)
+        while self._memory_bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self._counters["evictions"] += 1
+
+    def _drop(self, key: str) -> None:
+        _, payload = self._entries.pop(key)
+        self._memory_bytes -= len(payload)
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple[float, bytes]]:
+        if self.db is None:
+            return None
+        with self.db.connection() as conn:
+            row = conn.execute(
+                "SELECT payload, expires_at FROM response_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        payload, expires_at = bytes(row[0]), float(row[1])
+        if expires_at <= now:
+            self.db.write(lambda conn: _delete_expired(conn, key, now), wait=False)
+            with self._lock:
+                self._counters["expirations"] += 1
+            return None
+        return expires_at, payload
+
+    def _disk_set(self, key: str, expires_at: float, payload: bytes) -> None:
+        if self.db is None:
+            return
+
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                """
+                INSERT INTO response_cache (key, payload, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    payload = excluded.payload,
+                    expires_at = excluded.expires_at
+                """,
+                (key, payload, expires_at),
+            )
+
+        self.db.write(write, wait=False)
+
+
+def _delete_expired(conn: sqlite3.Connection, key: str, now: float) -> None:
+    # Re-checked in the delete: a concurrent set may have refreshed the entry.
+    conn.execute("DELETE FROM response_cache WHERE key = ? AND expires_at <= ?", (key, now))
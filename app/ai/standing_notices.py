@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Callable, Optional, Sequence
+
+from .comparison_cache import ComparisonCache
+from .dog_attributes import AttributePruner
+from .dog_matcher import AsyncDogMatcher, MatchNotifier, StandingNotice, StrayDogReport
+from .gemini_client import AsyncGeminiClient
+from .match_cascade import MatchCascade
+
+
+logger = logging.getLogger(__name__)
+
+NoticeLookup = Callable[[StrayDogReport], Sequence[StandingNotice]]
+
+
+class StandingNoticeMatcher:
+    """Compare one newly reported stray against the standing notices that could contain it.
+
+    `find_notices` narrows the search to open notices whose area and time window
+    cover the report (see SQLiteLostNoticeRepository.find_notices_for_report), so
+    each new report costs one comparison per nearby notice instead of a full
+    search per owner. Scoring goes through AsyncDogMatcher with each notice's
+    own limits; a notice notifies its owner at most once per matched report,
+    and a notice registered without an owner only logs its matches.
+    """
+
+    def __init__(
+        self,
+        client: AsyncGeminiClient,
+        find_notices: NoticeLookup,
+        *,
+        notifier: Optional[MatchNotifier] = None,
+        similarity_threshold: float = 70.0,
+        max_distance_km: float = 5.0,
+        max_time_gap_hours: int = 72,
+        temperature: float = 0.2,
+        max_concurrency: int = 1,
+        comparison_cache: Optional[ComparisonCache] = None,
+        attribute_pruner: Optional[AttributePruner] = None,
+        cascade: Optional[MatchCascade] = None,
+    ) -> None:
+        self.client = client
+        self.find_notices = find_notices
+        self.notifier = notifier
+        self.similarity_threshold = similarity_threshold
+        self.max_distance_km = max_distance_km
+        self.max_time_gap_hours = max_time_gap_hours
+        self.temperature = temperature
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.comparison_cache = comparison_cache
+        self.attribute_pruner = attribute_pruner
+        self.cascade = cascade
+
+    async def match_new_report(self, report: StrayDogReport) -> dict[str, dict[str, Any]]:
+        """Score `report` against every standing notice it falls inside; results keyed by notice_id.
+
+        A notice whose comparison fails is logged and left out; the rest still run.
+        """
+        notices = await asyncio.to_thread(self.find_notices, report)
+        if not notices:
+            return {}
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(standing: StandingNotice) -> Optional[dict[str, Any]]:
+            async with semaphore:
+                try:
+                    result = await self._matcher_for(standing).match_lost_dog(
+                        notice=standing.notice,
+                        candidate_reports=[report],
+                    )
+                    if result["is_match"] and self.notifier is not None:
+                        if standing.owner_id is None:
+                            # match_notifications.owner_id is NOT NULL; the insert would be silently ignored.
+                            logger.info(
+                                "Report %s matched notice %s, which has no owner to notify",
+                                report.report_id,
+                                standing.notice_id,
+                            )
+                        else:
+                            # Keyed by notice, so re-matching the same report (e.g. from the cache) is a no-op.
+                            await asyncio.to_thread(
+                                self.notifier.notify_possible_match,
+                                owner_id=standing.owner_id,
+                                matched_report_ids=result["matched_report_ids"],
+                                similarity_score=result["similarity_score"],
+                                notice_id=standing.notice_id,
+                            )
+                    return result
+                except Exception:
+                    logger.exception(
+                        "Matching report %s against notice %s failed", report.report_id, standing.notice_id
+                    )
+                    return None
+
+        results = await asyncio.gather(*(run(standing) for standing in notices))
+        return {
+            standing.notice_id: result for standing, result in zip(notices, results) if result is not None
+        }
+
+    def _matcher_for(self, standing: StandingNotice) -> AsyncDogMatcher:
+        return AsyncDogMatcher(
+            client=self.client,
+            similarity_threshold=(
+                self.similarity_threshold if standing.similarity_threshold is None else standing.similarity_threshold
+            ),
+            max_distance_km=self.max_distance_km if standing.max_distance_km is None else standing.max_distance_km,
+            max_time_gap_hours=(
+                self.max_time_gap_hours if standing.max_time_gap_hours is None else standing.max_time_gap_hours
+            ),
+            temperature=self.temperature,
+            comparison_cache=self.comparison_cache,
+            attribute_pruner=self.attribute_pruner,
+            cascade=self.cascade,
+        )
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from app.db.sqlite import SQLiteDatabase
+
+
+# Gemini Files API uploads are kept for 48 hours; assume a little less when the
+# SDK does not report an expiration time.
+DEFAULT_FILE_TTL_SECONDS = 47 * 3600.0
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class RegisteredFile:
+    key: str
+    file_name: str
+    file_uri: Optional[str]
+    mime_type: str
+    expires_at: float
+
+
+def video_content_key(path: Path, preprocess_seconds: Optional[int]) -> str:
+    """Hash of the source video bytes plus the trim window.
+
+    Trimming is deterministic for a given source and window, so this identifies
+    the uploaded clip without having to re-trim it first.
+    """
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(_HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    digest.update(f"|preprocess_seconds={int(preprocess_seconds or 0)}".encode("ascii"))
+    return digest.hexdigest()
+
+
+class UploadedFileRegistry:
+    """Map from video content hash to a still-active Gemini file, in `db`'s `gemini_uploaded_files` table.
+
+    Entries are dropped within `min_remaining_seconds` of expiry, or once the remote file is gone.
+    """
+
+    def __init__(
+        self,
+        db: SQLiteDatabase,
+        *,
+        default_ttl_seconds: float = DEFAULT_FILE_TTL_SECONDS,
+        min_remaining_seconds: float = 600.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.db = db
+        self.default_ttl_seconds = float(default_ttl_seconds)
+        self.min_remaining_seconds = float(min_remaining_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "registered": 0, "expirations": 0, "evictions": 0}
+
+    def lookup(self, key: str) -> Optional[RegisteredFile]:
+        now = self._clock()
+        with self.db.connection() as conn:
+            row = conn.execute(
+                """
+                SELECT key, file_name, file_uri, mime_type, expires_at
+                FROM gemini_uploaded_files
+                WHERE key = ?
+                """,
+                (key,),
+            ).fetchone()
+        if row is not None and float(row["expires_at"]) - self.min_remaining_seconds <= now:
+            self.db.write(lambda conn: conn.execute("DELETE FROM gemini_uploaded_files WHERE key = ?", (key,)))
+            self._count("expirations")
+            row = None
+        if row is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return RegisteredFile(
+            key=str(row["key"]),
+            file_name=str(row["file_name"]),
+            file_uri=row["file_uri"],
+            mime_type=str(row["mime_type"]),
+            expires_at=float(row["expires_at"]),
+        )
+
+    def register(
+        self,
+        key: str,
+        *,
+        file_name: str,
+        file_uri: Optional[str] = None,
+        mime_type: str = "video/mp4",
+        expires_at: Optional[float] = None,
+    ) -> None:
+        now = self._clock()
+        expiry = expires_at if expires_at is not None else now + self.default_ttl_seconds
+        with self.db.connection(write=True) as conn:
+            conn.execute("DELETE FROM gemini_uploaded_files WHERE expires_at <= ?", (now,))
+            conn.execute(
+                """
+                INSERT INTO gemini_uploaded_files (key, file_name, file_uri, mime_type, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    file_name = excluded.file_name,
+                    file_uri = excluded.file_uri,
+                    mime_type = excluded.mime_type,
+                    expires_at = excluded.expires_at
+                """,
+                (key, file_name, file_uri, mime_type, expiry),
+            )
+        self._count("registered")
+
+    def contains_file(self, file_name: str) -> bool:
+        with self.db.connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM gemini_uploaded_files WHERE file_name = ? LIMIT 1",
+                (file_name,),
+            ).fetchone()
+        return row is not None
+
+    def evict_file(self, file_name: str) -> None:
+        with self.db.connection(write=True) as conn:
+            deleted = conn.execute("DELETE FROM gemini_uploaded_files WHERE file_name = ?", (file_name,)).rowcount
+        if deleted:
+            self._count("evictions")
+
+    def stats(self) -> dict[str, Any]:
+        with self.db.connection() as conn:
+            active = conn.execute(
+                "SELECT COUNT(*) FROM gemini_uploaded_files WHERE expires_at > ?",
+                (self._clock(),),
+            ).fetchone()[0]
+        with self._lock:
+            return {**self._counters, "active_files": int(active)}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
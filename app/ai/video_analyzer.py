@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Any, Protocol
+from typing import Any, Optional, Protocol, Sequence
 
-from .gemini_client import GeminiClient
+from .gemini_client import AsyncGeminiClient, GeminiClient
+from .keyframes import Keyframe, KeyframeSampler
 
 
 DEFAULT_PROMPT_PATH = Path(__file__).resolve().parents[2] / "prompts" / "video_behavior_prompt.txt"
+DEFAULT_KEYFRAME_PROMPT_PATH = Path(__file__).resolve().parents[2] / "prompts" / "video_keyframes_prompt.txt"
+
+# `upload` sends the trimmed clip through the Files API; `keyframes` samples frames
+# locally and sends them inline, skipping the upload and ACTIVE polling.
+VIDEO_ANALYSIS_MODES = ("upload", "keyframes")
 
 
 class PetDynamicInfoRepository(Protocol):
@@ -29,49 +36,42 @@ class VideoAnalysisResult:
         return asdict(self)
 
 
-class VideoAnalyzer:
+class _VideoAnalyzerBase:
     def __init__(
         self,
-        client: GeminiClient,
+        client: Any,
         prompt_path: Path = DEFAULT_PROMPT_PATH,
         temperature: float = 0.3,
+        *,
+        mode: str = "upload",
+        keyframe_sampler: Optional[KeyframeSampler] = None,
+        keyframe_prompt_path: Path = DEFAULT_KEYFRAME_PROMPT_PATH,
     ) -> None:
         self.client = client
         self.prompt_path = prompt_path
         self.temperature = temperature
+        self.mode = self._check_mode(mode)
+        self.keyframe_sampler = keyframe_sampler or KeyframeSampler()
+        self.keyframe_prompt_path = keyframe_prompt_path
 
-    def analyze_video(self, video_path: str, *, preprocess_seconds: int = 10) -> dict[str, Any]:
-        prompt = self._load_prompt()
-        uploaded_video = self.client.upload_video(video_path, preprocess_seconds=preprocess_seconds)
-
-        try:
-            raw = self.client.generate_json(
-                prompt,
-                parts=[uploaded_video],
-                model="video",
-                temperature=self.temperature,
-            )
-        finally:
-            self.client.delete_uploaded_file(uploaded_video)
-
-        return self._normalize_result(raw).to_dict()
+    @staticmethod
+    def _check_mode(mode: str) -> str:
+        if mode not in VIDEO_ANALYSIS_MODES:
+            raise ValueError(f"Unsupported video analysis mode: {mode}. Use one of {list(VIDEO_ANALYSIS_MODES)}.")
+        return mode
 
-    def analyze_and_persist(
-        self,
-        *,
-        pet_id: str,
-        video_path: str,
-        repository: PetDynamicInfoRepository,
-        preprocess_seconds: int = 10,
-    ) -> dict[str, Any]:
-        result = self.analyze_video(video_path, preprocess_seconds=preprocess_seconds)
-        repository.create_pet_dynamic_info(pet_id, result)
-        return result
+    def _load_prompt(self, prompt_path: Optional[Path] = None) -> str:
+        path = prompt_path or self.prompt_path
+        if not path.exists():
+            raise FileNotFoundError(f"Prompt file not found: {path}")
+        return path.read_text(encoding="utf-8")
 
-    def _load_prompt(self) -> str:
-        if not self.prompt_path.exists():
-            raise FileNotFoundError(f"Prompt file not found: {self.prompt_path}")
-        return self.prompt_path.read_text(encoding="utf-8")
+    def _keyframe_parts(self, keyframes: Sequence[Keyframe]) -> list[Any]:
+        parts: list[Any] = []
+        for number, keyframe in enumerate(keyframes, start=1):
+            parts.append(f"Frame {number} at {keyframe.timestamp_seconds:.2f}s")
+            parts.append(self.client.build_image_part(image_bytes=keyframe.data, mime_type=keyframe.mime_type))
+        return parts
 
     def _normalize_result(self, payload: dict[str, Any]) -> VideoAnalysisResult:
         return VideoAnalysisResult(
@@ -100,3 +100,169 @@ class VideoAnalyzer:
         }
         normalized = str(value or "").strip().lower()
         return mapping.get(normalized, normalized or "mixed")
+
+
+class VideoAnalyzer(_VideoAnalyzerBase):
+    def __init__(
+        self,
+        client: GeminiClient,
+        prompt_path: Path = DEFAULT_PROMPT_PATH,
+        temperature: float = 0.3,
+        *,
+        mode: str = "upload",
+        keyframe_sampler: Optional[KeyframeSampler] = None,
+        keyframe_prompt_path: Path = DEFAULT_KEYFRAME_PROMPT_PATH,
+    ) -> None:
+        super().__init__(
+            client,
+            prompt_path=prompt_path,
+            temperature=temperature,
+            mode=mode,
+            keyframe_sampler=keyframe_sampler,
+            keyframe_prompt_path=keyframe_prompt_path,
+        )
+
+    def analyze_video(
+        self,
+        video_path: str,
+        *,
+        preprocess_seconds: int = 10,
+        mode: Optional[str] = None,
+        keyframe_count: Optional[int] = None,
+        keyframe_strategy: Optional[str] = None,
+    ) -> dict[str, Any]:
+        if self._check_mode(mode or self.mode) == "keyframes":
+            keyframes = self.keyframe_sampler.sample(
+                video_path,
+                max_seconds=preprocess_seconds,
+                count=keyframe_count,
+                strategy=keyframe_strategy,
+            )
+            raw = self.client.generate_json(
+                self._load_prompt(self.keyframe_prompt_path),
+                parts=self._keyframe_parts(keyframes),
+                model="video",
+                temperature=self.temperature,
+            )
+            return self._normalize_result(raw).to_dict()
+
+        prompt = self._load_prompt()
+        uploaded_video = self.client.upload_video(video_path, preprocess_seconds=preprocess_seconds)
+
+        try:
+            raw = self.client.generate_json(
+                prompt,
+                parts=[uploaded_video],
+                model="video",
+                temperature=self.temperature,
+            )
+        finally:
+            self.client.release_uploaded_file(uploaded_video)
+
+        return self._normalize_result(raw).to_dict()
+
+    def analyze_and_persist(
+        self,
+        *,
+        pet_id: str,
+        video_path: str,
+        repository: PetDynamicInfoRepository,
+        preprocess_seconds: int = 10,
+        mode: Optional[str] = None,
+        keyframe_count: Optional[int] = None,
+        keyframe_strategy: Optional[str] = None,
+    ) -> dict[str, Any]:
+        result = self.analyze_video(
+            video_path,
+            preprocess_seconds=preprocess_seconds,
+            mode=mode,
+            keyframe_count=keyframe_count,
+            keyframe_strategy=keyframe_strategy,
+        )
+        repository.create_pet_dynamic_info(pet_id, result)
+        return result
+
+
+class AsyncVideoAnalyzer(_VideoAnalyzerBase):
+    """VideoAnalyzer counterpart for AsyncGeminiClient; persistence runs in a worker thread."""
+
+    def __init__(
+        self,
+        client: AsyncGeminiClient,
+        prompt_path: Path = DEFAULT_PROMPT_PATH,
+        temperature: float = 0.3,
+        *,
+        mode: str = "upload",
+        keyframe_sampler: Optional[KeyframeSampler] = None,
+        keyframe_prompt_path: Path = DEFAULT_KEYFRAME_PROMPT_PATH,
+    ) -> None:
+        super().__init__(
+            client,
+            prompt_path=prompt_path,
+            temperature=temperature,
+            mode=mode,
+            keyframe_sampler=keyframe_sampler,
+            keyframe_prompt_path=keyframe_prompt_path,
+        )
+
+    async def analyze_video(
+        self,
+        video_path: str,
+        *,
+        preprocess_seconds: int = 10,
+        mode: Optional[str] = None,
+        keyframe_count: Optional[int] = None,
+        keyframe_strategy: Optional[str] = None,
+    ) -> dict[str, Any]:
+        if self._check_mode(mode or self.mode) == "keyframes":
+            keyframes = await asyncio.to_thread(
+                self.keyframe_sampler.sample,
+                video_path,
+                max_seconds=preprocess_seconds,
+                count=keyframe_count,
+                strategy=keyframe_strategy,
+            )
+            parts = await asyncio.to_thread(self._keyframe_parts, keyframes)
+            raw = await self.client.generate_json(
+                self._load_prompt(self.keyframe_prompt_path),
+                parts=parts,
+                model="video",
+                temperature=self.temperature,
+            )
+            return self._normalize_result(raw).to_dict()
+
+        prompt = self._load_prompt()
+        uploaded_video = await self.client.upload_video(video_path, preprocess_seconds=preprocess_seconds)
+
+        try:
+            raw = await self.client.generate_json(
+                prompt,
+                parts=[uploaded_video],
+                model="video",
+                temperature=self.temperature,
+            )
+        finally:
+            await self.client.release_uploaded_file(uploaded_video)
+
+        return self._normalize_result(raw).to_dict()
+
+    async def analyze_and_persist(
+        self,
+        *,
+        pet_id: str,
+        video_path: str,
+        repository: PetDynamicInfoRepository,
+        preprocess_seconds: int = 10,
+        mode: Optional[str] = None,
+        keyframe_count: Optional[int] = None,
+        keyframe_strategy: Optional[str] = None,
+    ) -> dict[str, Any]:
+        result = await self.analyze_video(
+            video_path,
+            preprocess_seconds=preprocess_seconds,
+            mode=mode,
+            keyframe_count=keyframe_count,
+            keyframe_strategy=keyframe_strategy,
+        )
+        await asyncio.to_thread(repository.create_pet_dynamic_info, pet_id, result)
+        return result
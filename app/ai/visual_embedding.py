@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .image_payload import ImageBytes, decode_base64_image
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+    np = None
+
+
+_HUE_BINS = 16
+_SATURATION_BINS = 4
+_VALUE_BINS = 8
+HISTOGRAM_SIZE = _HUE_BINS * _SATURATION_BINS + _VALUE_BINS
+_FORMAT_VERSION = 1
+_PACKED = struct.Struct(f"<B{HISTOGRAM_SIZE}fQ")
+_PROBE_EDGE = 128
+# Colour distribution survives pose and framing changes better than layout does,
+# so it carries most of the weight.
+_HISTOGRAM_WEIGHT = 0.7
+
+
+@dataclass(frozen=True)
+class VisualEmbedding:
+    """Compact local descriptor: an HSV colour histogram plus a 64-bit difference hash."""
+
+    histogram: tuple[float, ...]
+    dhash: int
+
+    def similarity(self, other: "VisualEmbedding") -> float:
+        """0-100; histogram intersection blended with dHash Hamming similarity."""
+        overlap = sum(min(left, right) for left, right in zip(self.histogram, other.histogram))
+        hash_similarity = 1.0 - bin(self.dhash ^ other.dhash).count("1") / 64.0
+        return round(100.0 * (_HISTOGRAM_WEIGHT * overlap + (1 - _HISTOGRAM_WEIGHT) * hash_similarity), 2)
+
+    def to_bytes(self) -> bytes:
+        return _PACKED.pack(_FORMAT_VERSION, *self.histogram, self.dhash)
+
+    @classmethod
+    def from_bytes(cls, payload: Optional[bytes]) -> Optional["VisualEmbedding"]:
+        if not payload or len(payload) != _PACKED.size or payload[0] != _FORMAT_VERSION:
+            return None
+        values = _PACKED.unpack(payload)
+        return cls(histogram=tuple(values[1:-1]), dhash=int(values[-1]))
+
+
+def embed_image(data: Optional[ImageBytes]) -> Optional[VisualEmbedding]:
+    """Embed encoded image bytes; None when opencv is missing or the image cannot be decoded."""
+    if cv2 is None or np is None or not data:
+        return None
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+
+    height, width = image.shape[:2]
+    scale = _PROBE_EDGE / float(max(height, width))
+    if scale < 1.0:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    hue_saturation = cv2.calcHist([hsv], [0, 1], None, [_HUE_BINS, _SATURATION_BINS], [0, 180, 0, 256])
+    value = cv2.calcHist([hsv], [2], None, [_VALUE_BINS], [0, 256])
+    # Each block sums to 0.5 so the whole histogram is L1-normalised.
+    histogram = np.concatenate(
+        [hue_saturation.ravel() / (2 * hue_saturation.sum()), value.ravel() / (2 * value.sum())]
+    ).astype(np.float32)
+
+    gray = cv2.resize(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (gray[:, 1:] > gray[:, :-1]).ravel()
+    dhash = int(np.packbits(bits).view(">u8")[0])
+    return VisualEmbedding(histogram=tuple(float(item) for item in histogram), dhash=dhash)
+
+
+def embed_image_source(
+    *,
+    image_bytes: Optional[ImageBytes] = None,
+    image_base64: Optional[str] = None,
+    image_path: Optional[str] = None,
+) -> Optional[VisualEmbedding]:
+    """Embed whichever image source a notice or report carries; None if unavailable."""
+    data: Optional[ImageBytes] = image_bytes
+    try:
+        if not data and image_base64:
+            data = decode_base64_image(image_base64)
+        if not data and image_path:
+            path = Path(image_path)
+            data = path.read_bytes() if path.exists() else None
+    except (OSError, ValueError):
+        return None
+    return embed_image(data)
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
+import json
+import logging
 import tempfile
+from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Literal, Optional
 
-from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field, model_validator
+from starlette.concurrency import run_in_threadpool
 
-from app.ai import DogMatcher, GeoLocation, LostDogNotice, StrayDogReport
+from app.ai import AsyncDogMatcher, DogAttributes, GeoLocation, LostDogNotice, MatchBudget, StandingNotice, StrayDogReport
+from app.ai.dog_matcher import aclosing
+from app.ai.image_payload import decode_base64_image
+from app.ai.match_jobs import MatchJob, ProgressCallback
+from app.ai.visual_embedding import embed_image_source
 from app.core.response import api_success
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/ai", tags=["AI"])
 
 
@@ -36,6 +47,9 @@ class AnalyzeVideoRequest(BaseModel):
     pet_id: str = Field(min_length=1)
     video_path: str = Field(min_length=1)
     preprocess_seconds: int = Field(default=10, ge=0, le=120)
+    mode: Optional[Literal["upload", "keyframes"]] = None
+    keyframe_count: Optional[int] = Field(default=None, ge=1, le=32)
+    keyframe_strategy: Optional[Literal["uniform", "motion"]] = None
 
 
 class StrayReportCreateRequest(BaseModel):
@@ -77,6 +91,16 @@ class MatchLostDogRequest(BaseModel):
     similarity_threshold: Optional[float] = Field(default=None, ge=0, le=100)
     max_distance_km: Optional[float] = Field(default=None, ge=0)
     max_time_gap_hours: Optional[int] = Field(default=None, ge=0)
+    max_concurrency: Optional[int] = Field(default=None, ge=1, le=32)
+    prefilter_top_k: Optional[int] = Field(default=None, ge=0)
+    prefilter_min_similarity: Optional[float] = Field(default=None, ge=0, le=100)
+    candidate_order: Optional[Literal["input", "nearest", "recent"]] = None
+    batch_size: Optional[int] = Field(default=None, ge=1, le=16)
+    deadline_seconds: Optional[float] = Field(default=None, gt=0)
+    max_matches: Optional[int] = Field(default=None, ge=1)
+    max_model_calls: Optional[int] = Field(default=None, ge=0)
+    resume_report_ids: Optional[list[str]] = None
+    background: bool = False
 
     @model_validator(mode="after")
     def _validate_source(self) -> "MatchLostDogRequest":
@@ -85,6 +109,34 @@ class MatchLostDogRequest(BaseModel):
         return self
 
 
+class LostNoticeCreateRequest(BaseModel):
+    notice_id: str = Field(min_length=1)
+    owner_id: Optional[str] = None
+    notice_image_base64: Optional[str] = None
+    notice_image_path: Optional[str] = None
+    lost_at: Optional[datetime] = None
+    location: Optional[LocationInput] = None
+    similarity_threshold: Optional[float] = Field(default=None, ge=0, le=100)
+    max_distance_km: Optional[float] = Field(default=None, ge=0)
+    max_time_gap_hours: Optional[int] = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def _validate_source(self) -> "LostNoticeCreateRequest":
+        if bool(self.notice_image_base64) == bool(self.notice_image_path):
+            raise ValueError("Provide exactly one of notice_image_base64 or notice_image_path.")
+        return self
+
+
+def _match_budget(payload: MatchLostDogRequest) -> Optional[MatchBudget]:
+    if payload.deadline_seconds is None and payload.max_matches is None and payload.max_model_calls is None:
+        return None
+    return MatchBudget(
+        deadline_seconds=payload.deadline_seconds,
+        max_matches=payload.max_matches,
+        max_model_calls=payload.max_model_calls,
+    )
+
+
 def _location(value: Optional[LocationInput]) -> Optional[GeoLocation]:
     if value is None:
         return None
@@ -99,6 +151,60 @@ def _tmp_suffix(filename: Optional[str], fallback: str) -> str:
     return fallback
 
 
+def _decode_image(payload: Optional[str]) -> Optional[bytearray]:
+    """Decode a JSON base64 image once, up front, so only the binary copy travels further."""
+    if not payload:
+        return None
+    try:
+        return decode_base64_image(payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _tag_image(
+    state: Any,
+    *,
+    image_bytes: Optional[bytearray] = None,
+    image_path: Optional[str] = None,
+) -> Optional[DogAttributes]:
+    """Tag a report or notice photo for attribute pruning.
+
+    Stored reports and notices are tagged once per image, in a background task
+    after the upsert. Best effort: an image that cannot be tagged keeps no
+    attributes and is never pruned.
+    """
+    if not state.settings.match_attribute_tagging or state.attribute_pruner is None:
+        return None
+    try:
+        analysis = state.photo_analyzer.analyze_photo(image_bytes=image_bytes, image_path=image_path)
+    except Exception:
+        logger.warning("Tagging image %s failed", image_path or "<inline>", exc_info=True)
+        return None
+    return DogAttributes.from_analysis(analysis)
+
+
+async def _process_new_report_image(state: Any, report: StrayDogReport) -> None:
+    """Background half of a report upsert: tag the new image, then match it against standing notices."""
+    attributes = await run_in_threadpool(
+        _tag_image,
+        state,
+        image_bytes=report.image_bytes,
+        image_path=report.image_path,
+    )
+    if attributes is not None:
+        await run_in_threadpool(state.stray_report_repository.update_attributes, report, attributes)
+        report = replace(report, attributes=attributes)
+    if state.standing_notice_matcher is not None:
+        # Only this report is compared, against the open notices that cover it.
+        await state.standing_notice_matcher.match_new_report(report)
+
+
+def _tag_new_notice_image(state: Any, standing: StandingNotice) -> None:
+    attributes = _tag_image(state, image_bytes=standing.notice.image_bytes, image_path=standing.notice.image_path)
+    if attributes is not None:
+        state.lost_notice_repository.update_attributes(standing, attributes)
+
+
 async def _save_upload_to_temp(upload: UploadFile, fallback_suffix: str) -> Path:
     suffix = _tmp_suffix(upload.filename, fallback_suffix)
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
@@ -114,14 +220,15 @@ async def _save_upload_to_temp(upload: UploadFile, fallback_suffix: str) -> Path
 
 
 @router.post("/analyze-photo")
-def analyze_photo(payload: AnalyzePhotoRequest, request: Request) -> dict[str, Any]:
-    analyzer = request.app.state.photo_analyzer
+async def analyze_photo(payload: AnalyzePhotoRequest, request: Request) -> dict[str, Any]:
+    analyzer = request.app.state.async_photo_analyzer
     repository = request.app.state.pet_repository
+    image_bytes = _decode_image(payload.image_base64)
     try:
-        result = analyzer.analyze_and_persist(
+        result = await analyzer.analyze_and_persist(
             pet_id=payload.pet_id,
             repository=repository,
-            image_base64=payload.image_base64,
+            image_bytes=image_bytes,
             image_path=payload.image_path,
         )
     except FileNotFoundError as exc:
@@ -137,32 +244,41 @@ async def analyze_photo_upload(
     pet_id: str = Form(...),
     photo: UploadFile = File(...),
 ) -> dict[str, Any]:
-    analyzer = request.app.state.photo_analyzer
+    analyzer = request.app.state.async_photo_analyzer
     repository = request.app.state.pet_repository
-    temp_path = await _save_upload_to_temp(photo, ".jpg")
     try:
-        result = analyzer.analyze_and_persist(
+        content = await photo.read()
+    finally:
+        await photo.close()
+    if not content:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+
+    content_type = photo.content_type or ""
+    try:
+        result = await analyzer.analyze_and_persist(
             pet_id=pet_id,
             repository=repository,
-            image_path=str(temp_path),
+            image_bytes=content,
+            mime_type=content_type if content_type.startswith("image/") else None,
         )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
-    finally:
-        temp_path.unlink(missing_ok=True)
     return api_success(result)
 
 
 @router.post("/analyze-video")
-def analyze_video(payload: AnalyzeVideoRequest, request: Request) -> dict[str, Any]:
-    analyzer = request.app.state.video_analyzer
+async def analyze_video(payload: AnalyzeVideoRequest, request: Request) -> dict[str, Any]:
+    analyzer = request.app.state.async_video_analyzer
     repository = request.app.state.dynamic_info_repository
     try:
-        result = analyzer.analyze_and_persist(
+        result = await analyzer.analyze_and_persist(
             pet_id=payload.pet_id,
             video_path=payload.video_path,
             repository=repository,
             preprocess_seconds=payload.preprocess_seconds,
+            mode=payload.mode,
+            keyframe_count=payload.keyframe_count,
+            keyframe_strategy=payload.keyframe_strategy,
         )
     except FileNotFoundError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
@@ -176,20 +292,28 @@ async def analyze_video_upload(
     request: Request,
     pet_id: str = Form(...),
     preprocess_seconds: int = Form(10),
+    mode: Optional[Literal["upload", "keyframes"]] = Form(None),
+    keyframe_count: Optional[int] = Form(None),
+    keyframe_strategy: Optional[Literal["uniform", "motion"]] = Form(None),
     video: UploadFile = File(...),
 ) -> dict[str, Any]:
-    analyzer = request.app.state.video_analyzer
+    analyzer = request.app.state.async_video_analyzer
     repository = request.app.state.dynamic_info_repository
     if preprocess_seconds < 0 or preprocess_seconds > 120:
         raise HTTPException(status_code=400, detail="preprocess_seconds must be between 0 and 120.")
+    if keyframe_count is not None and not 1 <= keyframe_count <= 32:
+        raise HTTPException(status_code=400, detail="keyframe_count must be between 1 and 32.")
 
     temp_path = await _save_upload_to_temp(video, ".mp4")
     try:
-        result = analyzer.analyze_and_persist(
+        result = await analyzer.analyze_and_persist(
             pet_id=pet_id,
             video_path=str(temp_path),
             repository=repository,
             preprocess_seconds=preprocess_seconds,
+            mode=mode,
+            keyframe_count=keyframe_count,
+            keyframe_strategy=keyframe_strategy,
         )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
@@ -199,51 +323,152 @@ async def analyze_video_upload(
 
 
 @router.post("/stray-reports")
-def upsert_stray_report(payload: StrayReportCreateRequest, request: Request) -> dict[str, Any]:
+def upsert_stray_report(
+    payload: StrayReportCreateRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+) -> dict[str, Any]:
     repository = request.app.state.stray_report_repository
+    image_bytes = _decode_image(payload.image_base64)
     report = StrayDogReport(
         report_id=payload.report_id,
-        image_base64=payload.image_base64,
         image_path=payload.image_path,
         reported_at=payload.reported_at,
         location=_location(payload.location),
+        image_bytes=image_bytes,
+        embedding=embed_image_source(image_bytes=image_bytes, image_path=payload.image_path),
     )
-    repository.upsert_report(report)
+    if repository.upsert_report(report):
+        # Edits that keep the image change neither its tags nor any comparison, so
+        # only new images are tagged and matched, after the response is sent.
+        background_tasks.add_task(_process_new_report_image, request.app.state, report)
     return api_success({"report_id": payload.report_id}, message="report upserted")
 
 
 @router.get("/stray-reports")
-def list_stray_reports(request: Request) -> dict[str, Any]:
+def list_stray_reports(request: Request) -> StreamingResponse:
     repository = request.app.state.stray_report_repository
-    reports = repository.list_reports()
+    # Streamed a page at a time: no image column is read and the list is never built.
+    summaries = (_report_summary(row) for row in repository.iter_reports())
+    return StreamingResponse(_json_list_envelope(summaries), media_type="application/json")
+
+
+@router.get("/stray-reports/{report_id}/image")
+def get_stray_report_image(report_id: str, request: Request) -> Response:
+    image = request.app.state.stray_report_repository.load_image(report_id)
+    if image is None:
+        raise HTTPException(status_code=404, detail=f"No stored image for report {report_id}")
+    return Response(content=bytes(image), media_type="application/octet-stream")
+
+
+def _report_summary(row: dict[str, Any]) -> dict[str, Any]:
+    located = row["latitude"] is not None and row["longitude"] is not None
+    return {
+        "report_id": row["report_id"],
+        "image_path": row["image_path"],
+        "has_image_base64": row["has_image"],
+        "reported_at": row["reported_at"],
+        "location": {"latitude": row["latitude"], "longitude": row["longitude"]} if located else None,
+    }
+
+
+def _json_list_envelope(items: Iterator[dict[str, Any]], *, chunk_items: int = 256) -> Iterator[str]:
+    """`api_success(list(items))` as JSON text, encoded a chunk of items at a time."""
+    head, _, tail = json.dumps(api_success([]), ensure_ascii=False).rpartition("[]")
+    yield head + "["
+    chunk: list[str] = []
+    separator = ""
+    for item in items:
+        chunk.append(json.dumps(item, ensure_ascii=False))
+        if len(chunk) >= chunk_items:
+            yield separator + ",".join(chunk)
+            separator, chunk = ",", []
+    if chunk:
+        yield separator + ",".join(chunk)
+    yield "]" + tail
+
+
+@router.post("/lost-notices")
+def upsert_lost_notice(
+    payload: LostNoticeCreateRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+) -> dict[str, Any]:
+    settings = request.app.state.settings
+    image_bytes = _decode_image(payload.notice_image_base64)
+    standing = StandingNotice(
+        notice_id=payload.notice_id,
+        owner_id=payload.owner_id,
+        notice=LostDogNotice(
+            image_path=payload.notice_image_path,
+            lost_at=payload.lost_at,
+            location=_location(payload.location),
+            image_bytes=image_bytes,
+        ),
+        # Limits are fixed when the notice is stored, since they define its indexed search area.
+        max_distance_km=payload.max_distance_km or settings.max_distance_km,
+        max_time_gap_hours=payload.max_time_gap_hours or settings.max_time_gap_hours,
+        similarity_threshold=payload.similarity_threshold or settings.similarity_threshold,
+    )
+    if request.app.state.lost_notice_repository.upsert_notice(standing):
+        background_tasks.add_task(_tag_new_notice_image, request.app.state, standing)
+    return api_success({"notice_id": payload.notice_id, "status": "open"}, message="notice upserted")
+
+
+@router.get("/lost-notices")
+def list_lost_notices(request: Request) -> dict[str, Any]:
+    notices = request.app.state.lost_notice_repository.list_open_notices()
     data: list[dict[str, Any]] = []
-    for report in reports:
+    for standing in notices:
+        notice = standing.notice
         data.append(
             {
-                "report_id": report.report_id,
-                "image_path": report.image_path,
-                "has_image_base64": bool(report.image_base64),
-                "reported_at": report.reported_at.isoformat() if report.reported_at else None,
+                "notice_id": standing.notice_id,
+                "owner_id": standing.owner_id,
+                "image_path": notice.image_path,
+                "has_image_base64": bool(notice.image_base64 or notice.image_bytes),
+                "lost_at": notice.lost_at.isoformat() if notice.lost_at else None,
                 "location": (
-                    {"latitude": report.location.latitude, "longitude": report.location.longitude}
-                    if report.location
+                    {"latitude": notice.location.latitude, "longitude": notice.location.longitude}
+                    if notice.location
                     else None
                 ),
+                "max_distance_km": standing.max_distance_km,
+                "max_time_gap_hours": standing.max_time_gap_hours,
+                "similarity_threshold": standing.similarity_threshold,
             }
         )
     return api_success(data)
 
 
-@router.post("/match-lost-dog")
-def match_lost_dog(payload: MatchLostDogRequest, request: Request) -> dict[str, Any]:
-    settings = request.app.state.settings
-    client = request.app.state.ai_client
-    notifier = request.app.state.match_notifier
-    repository = request.app.state.stray_report_repository
+@router.delete("/lost-notices/{notice_id}")
+def close_lost_notice(notice_id: str, request: Request) -> dict[str, Any]:
+    if not request.app.state.lost_notice_repository.close_notice(notice_id):
+        raise HTTPException(status_code=404, detail=f"Open lost notice not found: {notice_id}")
+    return api_success({"notice_id": notice_id, "status": "closed"}, message="notice closed")
+
+
+async def _prepare_match(
+    payload: MatchLostDogRequest,
+    state: Any,
+) -> tuple[AsyncDogMatcher, LostDogNotice, list[StrayDogReport]]:
+    settings = state.settings
+    repository = state.stray_report_repository
+    max_distance_km = payload.max_distance_km or settings.max_distance_km
+    max_time_gap_hours = payload.max_time_gap_hours or settings.max_time_gap_hours
+    notice_location = _location(payload.location)
 
     reports_by_id: dict[str, StrayDogReport] = {}
     if payload.use_db_reports:
-        for report in repository.list_reports():
+        # Only reports that can pass the matcher's distance/time filter are loaded.
+        stored_reports = await run_in_threadpool(
+            repository.find_candidates,
+            location=notice_location,
+            radius_km=max_distance_km,
+            around=payload.lost_at,
+            max_gap_hours=max_time_gap_hours,
+        )
+        for report in stored_reports:
             reports_by_id[report.report_id] = report
     for report in payload.candidate_reports:
         reports_by_id[report.report_id] = StrayDogReport(
@@ -253,38 +478,254 @@ def match_lost_dog(payload: MatchLostDogRequest, request: Request) -> dict[str,
             reported_at=report.reported_at,
             location=_location(report.location),
         )
+    if payload.resume_report_ids is not None:
+        # Resuming a budgeted search: only the reports it skipped are scored.
+        resume_ids = set(payload.resume_report_ids)
+        reports_by_id = {report_id: report for report_id, report in reports_by_id.items() if report_id in resume_ids}
 
-    matcher = DogMatcher(
-        client=client,
+    matcher = AsyncDogMatcher(
+        client=state.async_ai_client,
         similarity_threshold=payload.similarity_threshold or settings.similarity_threshold,
-        max_distance_km=payload.max_distance_km or settings.max_distance_km,
-        max_time_gap_hours=payload.max_time_gap_hours or settings.max_time_gap_hours,
+        max_distance_km=max_distance_km,
+        max_time_gap_hours=max_time_gap_hours,
         temperature=settings.match_temperature,
+        max_concurrency=payload.max_concurrency or settings.match_max_concurrency,
+        prefilter_top_k=(
+            settings.match_prefilter_top_k if payload.prefilter_top_k is None else payload.prefilter_top_k
+        ),
+        prefilter_min_similarity=(
+            settings.match_prefilter_min_similarity
+            if payload.prefilter_min_similarity is None
+            else payload.prefilter_min_similarity
+        ),
+        candidate_order=payload.candidate_order or settings.match_candidate_order,
+        comparison_cache=state.comparison_cache,
+        attribute_pruner=state.attribute_pruner,
+        cascade=state.match_cascade,
+        batch_size=payload.batch_size or settings.match_batch_size,
+        batch_ambiguity_band=settings.match_batch_ambiguity_band,
     )
+    image_bytes = _decode_image(payload.notice_image_base64)
+    reports = list(reports_by_id.values())
+    attributes = None
+    if any(report.attributes is not None for report in reports):
+        # One tagging call for the notice is only worth it when there are tagged reports to prune.
+        attributes = await run_in_threadpool(
+            _tag_image,
+            state,
+            image_bytes=image_bytes,
+            image_path=payload.notice_image_path,
+        )
     notice = LostDogNotice(
-        image_base64=payload.notice_image_base64,
         image_path=payload.notice_image_path,
         lost_at=payload.lost_at,
-        location=_location(payload.location),
+        location=notice_location,
+        image_bytes=image_bytes,
+        attributes=attributes,
     )
+    return matcher, notice, reports
+
+
+@router.post("/match-lost-dog")
+async def match_lost_dog(payload: MatchLostDogRequest, request: Request) -> dict[str, Any]:
+    if payload.background:
+        job_id = await run_in_threadpool(
+            request.app.state.match_job_repository.enqueue,
+            payload.model_dump(mode="json", exclude={"background"}),
+        )
+        return api_success({"job_id": job_id, "status": "queued"}, message="match job queued")
+
+    matcher, notice, reports = await _prepare_match(payload, request.app.state)
 
     try:
-        result = matcher.match_lost_dog(
+        result = await matcher.match_lost_dog(
             notice=notice,
-            candidate_reports=list(reports_by_id.values()),
+            candidate_reports=reports,
             owner_id=payload.owner_id,
-            notifier=notifier,
+            notifier=request.app.state.match_notifier,
+            budget=_match_budget(payload),
         )
     except FileNotFoundError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    result["candidate_count"] = len(reports_by_id)
+    result["candidate_count"] = len(reports)
     return api_success(result)
 
 
+def _stream_frame(event: dict[str, Any], *, sse: bool) -> str:
+    if sse:
+        data = json.dumps(event["data"], ensure_ascii=False, separators=(",", ":"))
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+@router.post("/match-lost-dog/stream")
+async def stream_match_lost_dog(payload: MatchLostDogRequest, request: Request) -> StreamingResponse:
+    """Same search as /match-lost-dog, streamed as NDJSON, or as SSE when the client accepts text/event-stream."""
+    matcher, notice, reports = await _prepare_match(payload, request.app.state)
+    events = matcher.stream_match(
+        notice=notice,
+        candidate_reports=reports,
+        owner_id=payload.owner_id,
+        notifier=request.app.state.match_notifier,
+        budget=_match_budget(payload),
+    )
+    # Bad notice input fails before the first event, while a 400 can still be sent.
+    try:
+        first = await events.__anext__()
+    except (FileNotFoundError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    async def frames() -> AsyncIterator[str]:
+        async with aclosing(events):
+            event = first
+            while True:
+                if event["event"] == "summary":
+                    event["data"]["candidate_count"] = len(reports)
+                yield _stream_frame(event, sse=sse)
+                try:
+                    event = await events.__anext__()
+                except StopAsyncIteration:
+                    return
+                except Exception as exc:
+                    # Every candidate failed; the status line has already been sent.
+                    yield _stream_frame({"event": "error", "data": {"detail": str(exc)}}, sse=sse)
+                    return
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/match-jobs/{job_id}")
+def get_match_job(job_id: str, request: Request) -> dict[str, Any]:
+    job = request.app.state.match_job_repository.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Match job not found: {job_id}")
+    return api_success(job.to_dict())
+
+
+async def run_match_job(state: Any, job: MatchJob, progress: ProgressCallback) -> dict[str, Any]:
+    """Run a queued /match-lost-dog request; the job worker pool calls this.
+
+    Candidates whose comparison failed are retried up to
+    `match_job_candidate_retries` times before the result is stored, and the
+    owner is notified once, from the merged result.
+    """
+    payload = MatchLostDogRequest.model_validate(job.payload)
+    matcher, notice, reports = await _prepare_match(payload, state)
+    totals = {"done": 0, "total": 0}
+
+    async def track(event: dict[str, Any]) -> None:
+        if event["event"] == "start":
+            totals["total"] = event["data"]["eligible_count"]
+        elif event["event"] == "candidate":
+            totals["done"] += 1
+        await progress(totals["done"], totals["total"])
+
+    result = await _drain_match(
+        matcher.stream_match(notice=notice, candidate_reports=reports, budget=_match_budget(payload)),
+        track,
+    )
+
+    # Retries score only the failed reports; they already survived the prefilter.
+    matcher.prefilter_top_k = None
+    matcher.prefilter_min_similarity = 0.0
+    for _ in range(state.settings.match_job_candidate_retries):
+        failed_ids = set(result.get("failed_report_ids", []))
+        if not failed_ids:
+            break
+        retry_reports = [report for report in reports if report.report_id in failed_ids]
+        try:
+            retried = await _drain_match(
+                matcher.stream_match(notice=notice, candidate_reports=retry_reports),
+                lambda _event: progress(totals["done"], totals["total"]),
+            )
+        except Exception:
+            # Every retried comparison failed again; keep the previous result.
+            continue
+        result = _merge_retry(result, retried)
+
+    notifier = state.match_notifier
+    if result["is_match"] and payload.owner_id and notifier:
+        await run_in_threadpool(
+            notifier.notify_possible_match,
+            owner_id=payload.owner_id,
+            matched_report_ids=result["matched_report_ids"],
+            similarity_score=result["similarity_score"],
+        )
+    result["candidate_count"] = len(reports)
+    return result
+
+
+async def _drain_match(
+    events: AsyncIterator[dict[str, Any]],
+    on_event: Callable[[dict[str, Any]], Awaitable[None]],
+) -> dict[str, Any]:
+    result: dict[str, Any] = {}
+    async with aclosing(events):
+        async for event in events:
+            await on_event(event)
+            if event["event"] == "summary":
+                result = event["data"]
+    return result
+
+
+# Per-candidate id lists a retry adds to rather than replaces.
+_MERGED_ID_LISTS = ("cached_report_ids", "escalated_report_ids", "batched_report_ids")
+
+
+def _merge_retry(result: dict[str, Any], retried: dict[str, Any]) -> dict[str, Any]:
+    """Fold a retry of the failed candidates into the previous result, keeping what both attempts found."""
+    merged = dict(result)
+    still_failed = retried.get("failed_report_ids", [])
+    recovered = [report_id for report_id in result.get("failed_report_ids", []) if report_id not in still_failed]
+    matched = list(result["matched_report_ids"])
+    matched.extend(report_id for report_id in retried["matched_report_ids"] if report_id not in matched)
+    merged["matched_report_ids"] = matched
+    merged["is_match"] = bool(matched)
+    merged["similarity_score"] = max(result["similarity_score"], retried["similarity_score"])
+    merged.pop("failed_report_ids", None)
+    if still_failed:
+        merged["failed_report_ids"] = still_failed
+    for key in _MERGED_ID_LISTS:
+        ids = list(result.get(key, []))
+        ids.extend(report_id for report_id in retried.get(key, []) if report_id not in ids)
+        if ids:
+            merged[key] = ids
+    if "scored_report_ids" in result:
+        merged["scored_report_ids"] = [*result["scored_report_ids"], *recovered]
+    return merged
+
+
+@router.get("/stats")
+def ai_stats(request: Request) -> dict[str, Any]:
+    state = request.app.state
+    components = {
+        "response_cache": state.response_cache,
+        "request_coalescer": state.request_coalescer,
+        "rate_limiter": state.rate_limiter,
+        "hedging": state.hedging,
+        "image_preprocessor": state.image_preprocessor,
+        "upload_registry": state.upload_registry,
+        "comparison_cache": state.comparison_cache,
+        "attribute_pruner": state.attribute_pruner,
+        "match_cascade": state.match_cascade,
+        "match_jobs": state.match_job_repository,
+        "sqlite": state.db,
+    }
+    return api_success(
+        {name: component.stats() if component is not None else None for name, component in components.items()}
+    )
+
+
 @router.get("/notifications")
-def list_notifications(request: Request) -> dict[str, Any]:
+def list_notifications(request: Request, owner_id: Optional[str] = None) -> dict[str, Any]:
     notifier = request.app.state.match_notifier
-    return api_success(notifier.list_notifications())
+    return api_success(notifier.list_notifications(owner_id))
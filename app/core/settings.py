@@ -36,8 +36,17 @@ def _to_int(value: str | None, default: int) -> int:
 class Settings:
     api_prefix: str
     sqlite_path: str
+    sqlite_pool_size: int
+    sqlite_busy_timeout_ms: int
+    sqlite_cache_size_kib: int
+    sqlite_mmap_size_bytes: int
+    sqlite_write_behind: bool
+    sqlite_write_batch_size: int
+    sqlite_write_flush_ms: float
+    sqlite_write_queue_size: int
     gemini_api_key: str | None
     gemini_image_model: str
+    gemini_model_tiers: dict[str, str]
     gemini_video_model: str
     photo_temperature: float
     video_temperature: float
@@ -45,6 +54,44 @@ class Settings:
     similarity_threshold: float
     max_distance_km: float
     max_time_gap_hours: int
+    match_max_concurrency: int
+    match_prefilter_top_k: int
+    match_prefilter_min_similarity: float
+    match_comparison_cache: bool
+    match_candidate_order: str
+    match_job_workers: int
+    match_job_max_attempts: int
+    match_job_candidate_retries: int
+    standing_notice_matching: bool
+    match_attribute_tagging: bool
+    match_pruning_rules: list[str]
+    match_cascade: bool
+    match_cascade_band: float
+    match_cascade_screen_tier: str
+    match_cascade_escalation_tier: str
+    match_batch_size: int
+    match_batch_ambiguity_band: float
+    ai_cache_enabled: bool
+    ai_cache_max_bytes: int
+    ai_cache_ttl_seconds: float
+    ai_cache_sqlite_path: str | None
+    ai_coalesce_requests: bool
+    gemini_requests_per_minute: float
+    gemini_tokens_per_minute: float
+    gemini_max_attempts: int
+    gemini_retry_budget_seconds: float
+    gemini_hedging_enabled: bool
+    gemini_hedge_percentile: float
+    gemini_hedge_max_ratio: float
+    gemini_hedge_min_samples: int
+    image_preprocess_enabled: bool
+    image_max_edge: int
+    image_output_format: str
+    image_quality: int
+    video_analysis_mode: str
+    video_keyframe_count: int
+    video_keyframe_strategy: str
+    gemini_reuse_uploads: bool
     mock_mode: bool
     cors_origins: list[str]
 
@@ -60,19 +107,74 @@ def get_settings() -> Settings:
     cors_origins = [item.strip() for item in cors_value.split(",") if item.strip()]
     if not cors_origins:
         cors_origins = ["*"]
+    # "fast=gemini-flash-lite-latest,strong=gemini-pro-latest"
+    model_tiers: dict[str, str] = {}
+    for item in os.getenv("GEMINI_MODEL_TIERS", "").split(","):
+        tier, _, model_name = item.partition("=")
+        if tier.strip() and model_name.strip():
+            model_tiers[tier.strip()] = model_name.strip()
+    rules_value = os.getenv("MATCH_PRUNING_RULES", "")
+    pruning_rules = [item.strip().lower() for item in rules_value.split(",") if item.strip()]
 
     return Settings(
         api_prefix=os.getenv("API_PREFIX", "/api"),
         sqlite_path=os.getenv("SQLITE_PATH", "data/goodle.db"),
+        sqlite_pool_size=_to_int(os.getenv("SQLITE_POOL_SIZE"), 8),
+        sqlite_busy_timeout_ms=_to_int(os.getenv("SQLITE_BUSY_TIMEOUT_MS"), 5000),
+        sqlite_cache_size_kib=_to_int(os.getenv("SQLITE_CACHE_SIZE_KIB"), 16 * 1024),
+        sqlite_mmap_size_bytes=_to_int(os.getenv("SQLITE_MMAP_SIZE_MB"), 256) * 1024 * 1024,
+        sqlite_write_behind=_to_bool(os.getenv("SQLITE_WRITE_BEHIND"), default=False),
+        sqlite_write_batch_size=_to_int(os.getenv("SQLITE_WRITE_BATCH_SIZE"), 256),
+        sqlite_write_flush_ms=_to_float(os.getenv("SQLITE_WRITE_FLUSH_MS"), 0.0),
+        sqlite_write_queue_size=_to_int(os.getenv("SQLITE_WRITE_QUEUE_SIZE"), 10_000),
         gemini_api_key=os.getenv("GEMINI_API_KEY"),
         gemini_image_model=os.getenv("GEMINI_IMAGE_MODEL", "gemini-3-flash-preview"),
         gemini_video_model=os.getenv("GEMINI_VIDEO_MODEL", "gemini-3-flash-preview"),
+        gemini_model_tiers=model_tiers,
         photo_temperature=_to_float(os.getenv("PHOTO_AI_TEMPERATURE"), 0.3),
         video_temperature=_to_float(os.getenv("VIDEO_AI_TEMPERATURE"), 0.3),
         match_temperature=_to_float(os.getenv("MATCH_AI_TEMPERATURE"), 0.2),
         similarity_threshold=_to_float(os.getenv("MATCH_SIMILARITY_THRESHOLD"), 70.0),
         max_distance_km=_to_float(os.getenv("MATCH_MAX_DISTANCE_KM"), 5.0),
         max_time_gap_hours=_to_int(os.getenv("MATCH_MAX_TIME_GAP_HOURS"), 72),
+        match_max_concurrency=_to_int(os.getenv("MATCH_MAX_CONCURRENCY"), 4),
+        match_prefilter_top_k=_to_int(os.getenv("MATCH_PREFILTER_TOP_K"), 0),
+        match_prefilter_min_similarity=_to_float(os.getenv("MATCH_PREFILTER_MIN_SIMILARITY"), 0.0),
+        match_comparison_cache=_to_bool(os.getenv("MATCH_COMPARISON_CACHE"), default=True),
+        match_candidate_order=os.getenv("MATCH_CANDIDATE_ORDER", "input").strip().lower() or "input",
+        match_job_workers=_to_int(os.getenv("MATCH_JOB_WORKERS"), 1),
+        match_job_max_attempts=_to_int(os.getenv("MATCH_JOB_MAX_ATTEMPTS"), 3),
+        match_job_candidate_retries=_to_int(os.getenv("MATCH_JOB_CANDIDATE_RETRIES"), 2),
+        standing_notice_matching=_to_bool(os.getenv("STANDING_NOTICE_MATCHING"), default=True),
+        match_attribute_tagging=_to_bool(os.getenv("MATCH_ATTRIBUTE_TAGGING"), default=False),
+        match_pruning_rules=pruning_rules,
+        match_cascade=_to_bool(os.getenv("MATCH_CASCADE"), default=False),
+        match_cascade_band=_to_float(os.getenv("MATCH_CASCADE_BAND"), 10.0),
+        match_cascade_screen_tier=os.getenv("MATCH_CASCADE_SCREEN_TIER", "fast").strip() or "fast",
+        match_cascade_escalation_tier=os.getenv("MATCH_CASCADE_ESCALATION_TIER", "strong").strip() or "strong",
+        match_batch_size=_to_int(os.getenv("MATCH_BATCH_SIZE"), 1),
+        match_batch_ambiguity_band=_to_float(os.getenv("MATCH_BATCH_AMBIGUITY_BAND"), 5.0),
+        ai_cache_enabled=_to_bool(os.getenv("AI_CACHE_ENABLED"), default=True),
+        ai_cache_max_bytes=_to_int(os.getenv("AI_CACHE_MAX_MB"), 32) * 1024 * 1024,
+        ai_cache_ttl_seconds=_to_float(os.getenv("AI_CACHE_TTL_SECONDS"), 3600.0),
+        ai_cache_sqlite_path=os.getenv("AI_CACHE_SQLITE_PATH") or None,
+        ai_coalesce_requests=_to_bool(os.getenv("AI_COALESCE_REQUESTS"), default=True),
+        gemini_requests_per_minute=_to_float(os.getenv("GEMINI_REQUESTS_PER_MINUTE"), 0.0),
+        gemini_tokens_per_minute=_to_float(os.getenv("GEMINI_TOKENS_PER_MINUTE"), 0.0),
+        gemini_max_attempts=_to_int(os.getenv("GEMINI_MAX_ATTEMPTS"), 5),
+        gemini_retry_budget_seconds=_to_float(os.getenv("GEMINI_RETRY_BUDGET_SECONDS"), 60.0),
+        gemini_hedging_enabled=_to_bool(os.getenv("GEMINI_HEDGING_ENABLED"), default=False),
+        gemini_hedge_percentile=_to_float(os.getenv("GEMINI_HEDGE_PERCENTILE"), 95.0),
+        gemini_hedge_max_ratio=_to_float(os.getenv("GEMINI_HEDGE_MAX_RATIO"), 0.1),
+        gemini_hedge_min_samples=_to_int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES"), 20),
+        image_preprocess_enabled=_to_bool(os.getenv("AI_IMAGE_PREPROCESS"), default=False),
+        image_max_edge=_to_int(os.getenv("AI_IMAGE_MAX_EDGE"), 1024),
+        image_output_format=os.getenv("AI_IMAGE_FORMAT", "jpeg").strip().lower() or "jpeg",
+        image_quality=_to_int(os.getenv("AI_IMAGE_QUALITY"), 85),
+        video_analysis_mode=os.getenv("VIDEO_ANALYSIS_MODE", "upload").strip().lower() or "upload",
+        video_keyframe_count=_to_int(os.getenv("VIDEO_KEYFRAME_COUNT"), 8),
+        video_keyframe_strategy=os.getenv("VIDEO_KEYFRAME_STRATEGY", "uniform").strip().lower() or "uniform",
+        gemini_reuse_uploads=_to_bool(os.getenv("GEMINI_REUSE_UPLOADS"), default=True),
         mock_mode=_to_bool(os.getenv("AI_MOCK_MODE"), default=False),
         cors_origins=cors_origins,
     )
@@ -0,0 +1,442 @@
+"""Versioned schema migrations for SQLiteDatabase.
+
+Each entry in MIGRATIONS upgrades the schema by one version and is applied
+once, in order, inside the write transaction opened by
+`SQLiteDatabase.initialize()`; applied versions are recorded in the
+`schema_version` table. Databases created before versioning start at 0, so
+the baseline is written to be idempotent against any earlier layout.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+
+Migration = Callable[[sqlite3.Connection], None]
+
+
+_BASELINE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pets (
+        id TEXT PRIMARY KEY,
+        aitags TEXT,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS pet_dynamic_info (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pet_id TEXT NOT NULL,
+        activity_level REAL NOT NULL,
+        approach_speed REAL NOT NULL,
+        emotional_stability REAL NOT NULL,
+        play_preference TEXT NOT NULL,
+        body_language_score REAL NOT NULL,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS stray_dog_reports (
+        report_id TEXT PRIMARY KEY,
+        image_path TEXT,
+        image_base64 TEXT,
+        image_blob BLOB,
+        embedding BLOB,
+        latitude REAL,
+        longitude REAL,
+        reported_at TEXT,
+        reported_epoch REAL,
+        attr_size TEXT,
+        attr_age_group TEXT,
+        attr_colors TEXT,
+        attr_breed TEXT,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS match_notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        owner_id TEXT NOT NULL,
+        matched_report_ids TEXT NOT NULL,
+        similarity_score REAL NOT NULL,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS lost_dog_notices (
+        notice_id TEXT PRIMARY KEY,
+        owner_id TEXT,
+        status TEXT NOT NULL DEFAULT 'open',
+        image_path TEXT,
+        image_blob BLOB,
+        latitude REAL,
+        longitude REAL,
+        lost_at TEXT,
+        max_distance_km REAL,
+        max_time_gap_hours REAL,
+        similarity_threshold REAL,
+        window_start_epoch REAL,
+        window_end_epoch REAL,
+        min_lat REAL,
+        max_lat REAL,
+        min_lon REAL,
+        max_lon REAL,
+        attr_size TEXT,
+        attr_age_group TEXT,
+        attr_colors TEXT,
+        attr_breed TEXT,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_lost_dog_notices_open_window
+        ON lost_dog_notices (window_end_epoch)
+        WHERE status = 'open';
+
+    CREATE TABLE IF NOT EXISTS match_jobs (
+        job_id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        progress_done INTEGER NOT NULL DEFAULT 0,
+        progress_total INTEGER NOT NULL DEFAULT 0,
+        result TEXT,
+        error TEXT,
+        worker_id TEXT,
+        lease_expires_at REAL,
+        available_at REAL NOT NULL,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL,
+        run_seconds REAL NOT NULL DEFAULT 0
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_match_jobs_status_available
+        ON match_jobs (status, available_at);
+"""
+
+
+def _baseline(conn: sqlite3.Connection) -> None:
+    """Tables, spatial and tag indexes, and the columns added before versioning."""
+    _execute_script(conn, _BASELINE_SCHEMA)
+    # CREATE TABLE IF NOT EXISTS leaves pre-versioning databases untouched, so
+    # add the columns introduced since then in place.
+    _ensure_column(conn, "stray_dog_reports", "image_blob", "BLOB")
+    _ensure_column(conn, "stray_dog_reports", "embedding", "BLOB")
+    _ensure_column(conn, "stray_dog_reports", "reported_epoch", "REAL")
+    for table in ("stray_dog_reports", "lost_dog_notices"):
+        for column in ("attr_size", "attr_age_group", "attr_colors", "attr_breed"):
+            _ensure_column(conn, table, column, "TEXT")
+    rtree = _create_report_indexes(conn)
+    _backfill_report_indexes(conn, rtree=rtree)
+
+
+def _hot_path_indexes(conn: sqlite3.Connection) -> None:
+    """Indexes for report listing, per-owner notifications and per-pet dynamic info."""
+    _execute_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_stray_dog_reports_updated_at
+            ON stray_dog_reports (updated_at);
+        CREATE INDEX IF NOT EXISTS idx_match_notifications_owner
+            ON match_notifications (owner_id, id);
+        CREATE INDEX IF NOT EXISTS idx_pet_dynamic_info_pet
+            ON pet_dynamic_info (pet_id, id);
+        """,
+    )
+
+
+def _response_cache(conn: sqlite3.Connection) -> None:
+    """Disk tier of ResponseCache (previously created by the cache itself)."""
+    _execute_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            payload BLOB NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        """,
+    )
+
+
+def _uploaded_files(conn: sqlite3.Connection) -> None:
+    """Gemini upload registry (previously created by UploadedFileRegistry itself)."""
+    _execute_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS gemini_uploaded_files (
+            key TEXT PRIMARY KEY,
+            file_name TEXT NOT NULL,
+            file_uri TEXT,
+            mime_type TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_gemini_uploaded_files_name ON gemini_uploaded_files (file_name);
+        """,
+    )
+
+
+def _match_comparisons(conn: sqlite3.Connection) -> None:
+    """Match comparison cache (previously created by ComparisonCache itself)."""
+    _execute_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS match_comparisons (
+            notice_hash TEXT NOT NULL,
+            report_hash TEXT NOT NULL,
+            prompt_version TEXT NOT NULL,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (notice_hash, report_hash, prompt_version, model)
+        );
+        """,
+    )
+
+
+def _notification_dedupe(conn: sqlite3.Connection) -> None:
+    """Remember which standing notice raised a notification and allow one per owner, notice and reports."""
+    _ensure_column(conn, "match_notifications", "notice_id", "TEXT")
+    _execute_script(
+        conn,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_match_notifications_notice
+        ON match_notifications (owner_id, notice_id, matched_report_ids)
+        WHERE notice_id IS NOT NULL;
+        """,
+    )
+
+
+_STABLE_ID_TABLES = {
+    "stray_dog_reports": """
+        CREATE TABLE stray_dog_reports (
+            id INTEGER PRIMARY KEY,
+            report_id TEXT NOT NULL UNIQUE,
+            image_path TEXT,
+            image_base64 TEXT,
+            image_blob BLOB,
+            embedding BLOB,
+            latitude REAL,
+            longitude REAL,
+            reported_at TEXT,
+            reported_epoch REAL,
+            attr_size TEXT,
+            attr_age_group TEXT,
+            attr_colors TEXT,
+            attr_breed TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    "lost_dog_notices": """
+        CREATE TABLE lost_dog_notices (
+            id INTEGER PRIMARY KEY,
+            notice_id TEXT NOT NULL UNIQUE,
+            owner_id TEXT,
+            status TEXT NOT NULL DEFAULT 'open',
+            image_path TEXT,
+            image_blob BLOB,
+            latitude REAL,
+            longitude REAL,
+            lost_at TEXT,
+            max_distance_km REAL,
+            max_time_gap_hours REAL,
+            similarity_threshold REAL,
+            window_start_epoch REAL,
+            window_end_epoch REAL,
+            min_lat REAL,
+            max_lat REAL,
+            min_lon REAL,
+            max_lon REAL,
+            attr_size TEXT,
+            attr_age_group TEXT,
+            attr_colors TEXT,
+            attr_breed TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+}
+
+
+def _stable_row_ids(conn: sqlite3.Connection) -> None:
+    """Give stray reports and lost notices an INTEGER PRIMARY KEY `id` for their R*Tree entries.
+
+    With TEXT primary keys the R*Trees were keyed on the implicit rowid, which
+    VACUUM may renumber. Both tables are rebuilt with `id` set to the current
+    rowid, their indexes recreated and the R*Trees refilled from `id`.
+    """
+    for table, create in _STABLE_ID_TABLES.items():
+        columns = ", ".join(row[1] for row in conn.execute(f"PRAGMA table_info({table})"))
+        conn.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+        conn.execute(create)
+        conn.execute(f"INSERT INTO {table} (id, {columns}) SELECT rowid, {columns} FROM {table}_old")
+        conn.execute(f"DROP TABLE {table}_old")
+    _execute_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_lost_dog_notices_open_window
+            ON lost_dog_notices (window_end_epoch)
+            WHERE status = 'open';
+        CREATE INDEX IF NOT EXISTS idx_stray_dog_reports_updated_at
+            ON stray_dog_reports (updated_at);
+        """,
+    )
+    if _create_report_indexes(conn):
+        _execute_script(
+            conn,
+            """
+            DELETE FROM stray_dog_reports_rtree;
+            INSERT INTO stray_dog_reports_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            SELECT id, latitude, latitude, longitude, longitude FROM stray_dog_reports
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
+            DELETE FROM lost_dog_notices_rtree;
+            INSERT INTO lost_dog_notices_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            SELECT id, min_lat, max_lat, min_lon, max_lon FROM lost_dog_notices
+            WHERE min_lat IS NOT NULL;
+            """,
+        )
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    _baseline,
+    _hot_path_indexes,
+    _response_cache,
+    _uploaded_files,
+    _match_comparisons,
+    _notification_dedupe,
+    _stable_row_ids,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn: sqlite3.Connection) -> list[int]:
+    """Apply the migrations newer than the recorded version; returns the versions applied.
+
+    Run inside a write transaction so concurrent processes starting on the
+    same file apply each migration exactly once.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    current = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+    applied: list[int] = []
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        if version <= current:
+            continue
+        migration(conn)
+        conn.execute("INSERT INTO schema_version (version) VALUES (?)", (version,))
+        applied.append(version)
+    return applied
+
+
+def has_table(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row is not None
+
+
+def _create_report_indexes(conn: sqlite3.Connection) -> bool:
+    """Indexes behind SQLiteStrayReportRepository.find_candidates and tag lookups.
+
+    Located reports go into an R*Tree keyed by the report's id; reports
+    without a location always pass the distance filter, so a partial index
+    keeps them cheap to add back. Without the R*Tree module a plain
+    (latitude, longitude) index serves the bounding-box query instead.
+    Returns whether the R*Tree tables exist.
+    """
+    _execute_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_stray_dog_reports_reported_epoch
+            ON stray_dog_reports (reported_epoch);
+        CREATE INDEX IF NOT EXISTS idx_stray_dog_reports_unlocated
+            ON stray_dog_reports (reported_epoch)
+            WHERE latitude IS NULL OR longitude IS NULL;
+        CREATE INDEX IF NOT EXISTS idx_stray_dog_reports_attributes
+            ON stray_dog_reports (attr_size, attr_age_group);
+        CREATE INDEX IF NOT EXISTS idx_lost_dog_notices_attributes
+            ON lost_dog_notices (attr_size, attr_age_group);
+        """,
+    )
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS stray_dog_reports_rtree
+            USING rtree(id, min_lat, max_lat, min_lon, max_lon)
+            """
+        )
+        # Search area of each open standing notice, for matching new reports incrementally.
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS lost_dog_notices_rtree
+            USING rtree(id, min_lat, max_lat, min_lon, max_lon)
+            """
+        )
+    except sqlite3.OperationalError:
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_stray_dog_reports_lat_lon ON stray_dog_reports (latitude, longitude)"
+        )
+        return False
+    return True
+
+
+def _backfill_report_indexes(conn: sqlite3.Connection, *, rtree: bool) -> None:
+    rows = conn.execute(
+        """
+        SELECT rowid, reported_at FROM stray_dog_reports
+        WHERE reported_epoch IS NULL AND reported_at IS NOT NULL
+        """
+    ).fetchall()
+    epochs = [(_iso_to_epoch(row[1]), row[0]) for row in rows]
+    conn.executemany(
+        "UPDATE stray_dog_reports SET reported_epoch = ? WHERE rowid = ?",
+        [(epoch, rowid) for epoch, rowid in epochs if epoch is not None],
+    )
+    if rtree:
+        conn.execute(
+            """
+            INSERT INTO stray_dog_reports_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            SELECT rowid, latitude, latitude, longitude, longitude
+            FROM stray_dog_reports AS report
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM stray_dog_reports_rtree WHERE id = report.rowid)
+            """
+        )
+
+
+def _ensure_column(conn: sqlite3.Connection, table: str, column: str, declaration: str) -> None:
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def _execute_script(conn: sqlite3.Connection, script: str) -> None:
+    # executescript() would COMMIT the surrounding migration transaction, so
+    # run the statements one at a time instead.
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
+
+
+def _iso_to_epoch(value: str) -> Optional[float]:
+    """Epoch seconds of an ISO timestamp; None if it cannot be parsed, so one bad row cannot block startup."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
@@ -1,68 +1,205 @@
 from __future__ import annotations
 
+import queue
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterator
+from typing import Any, Iterator, Optional
+
+from .migrations import has_table, migrate
+from .write_behind import GroupCommitWriter, WriteOperation
 
 
 class SQLiteDatabase:
-    def __init__(self, db_path: str) -> None:
+    """SQLite store shared by the repositories.
+
+    Connections are long-lived and pooled: at most `pool_size` are open, each
+    handed to one caller at a time, and callers beyond that wait for one to be
+    returned. Every connection runs in WAL mode with `synchronous=NORMAL`, so
+    readers never wait on a writer. `connection(write=True)` takes the write
+    lock up front with BEGIN IMMEDIATE and retries while another writer holds
+    it, so a write transaction cannot fail with SQLITE_BUSY halfway through.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        pool_size: int = 8,
+        busy_timeout_ms: int = 5000,
+        cache_size_kib: int = 16 * 1024,
+        mmap_size_bytes: int = 256 * 1024 * 1024,
+        write_retries: int = 5,
+        retry_backoff_seconds: float = 0.05,
+    ) -> None:
         self.db_path = Path(db_path)
+        # Set by initialize(); False when this SQLite build lacks the R*Tree module.
+        self.rtree_enabled = False
+        self.pool_size = max(1, int(pool_size))
+        self.busy_timeout_ms = max(0, int(busy_timeout_ms))
+        self.cache_size_kib = max(0, int(cache_size_kib))
+        self.mmap_size_bytes = max(0, int(mmap_size_bytes))
+        self.write_retries = max(0, int(write_retries))
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._lock = threading.Lock()
+        self._open_connections = 0
+        self._closed = False
+        self._counters = {"waits": 0, "busy_retries": 0}
+        # Optional; when set, write() queues operations for group commit.
+        self.write_behind: Optional[GroupCommitWriter] = None
 
     def initialize(self) -> None:
+        """Create the schema, or upgrade an existing database in place to SCHEMA_VERSION."""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        with self.connection() as conn:
-            conn.executescript(
-                """
-                CREATE TABLE IF NOT EXISTS pets (
-                    id TEXT PRIMARY KEY,
-                    aitags TEXT,
-                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-                );
-
-                CREATE TABLE IF NOT EXISTS pet_dynamic_info (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    pet_id TEXT NOT NULL,
-                    activity_level REAL NOT NULL,
-                    approach_speed REAL NOT NULL,
-                    emotional_stability REAL NOT NULL,
-                    play_preference TEXT NOT NULL,
-                    body_language_score REAL NOT NULL,
-                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-                );
-
-                CREATE TABLE IF NOT EXISTS stray_dog_reports (
-                    report_id TEXT PRIMARY KEY,
-                    image_path TEXT,
-                    image_base64 TEXT,
-                    latitude REAL,
-                    longitude REAL,
-                    reported_at TEXT,
-                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-                );
-
-                CREATE TABLE IF NOT EXISTS match_notifications (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    owner_id TEXT NOT NULL,
-                    matched_report_ids TEXT NOT NULL,
-                    similarity_score REAL NOT NULL,
-                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-                );
-                """
-            )
+        with self.connection(write=True) as conn:
+            migrate(conn)
+            # False when the database was created by a SQLite build lacking the R*Tree module.
+            self.rtree_enabled = has_table(conn, "stray_dog_reports_rtree")
 
     @contextmanager
-    def connection(self) -> Iterator[sqlite3.Connection]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def connection(self, *, write: bool = False) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection for one transaction, committed on success.
+
+        Pass `write=True` for transactions that modify data, so the write lock
+        is taken (and waited for) before any statement runs. Raises
+        RuntimeError once the database is closed.
+        """
+        conn: Optional[sqlite3.Connection] = self._acquire()
         try:
+            if write:
+                self._begin_immediate(conn)
             yield conn
             conn.commit()
-        except Exception:
-            conn.rollback()
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                self._discard(conn)
+                conn = None
             raise
         finally:
+            if conn is not None:
+                self._release(conn)
+
+    def write(self, operation: WriteOperation, *, wait: bool = True) -> None:
+        """Run `operation` in a write transaction.
+
+        With `write_behind` attached the operation is queued and committed in a
+        batch with other writes; `wait=True` blocks until that batch commits
+        (and re-raises the operation's error), `wait=False` returns once it is
+        queued and flush() waits for it later. Without a writer the operation
+        runs inline either way.
+        """
+        if self.write_behind is None:
+            with self.connection(write=True) as conn:
+                operation(conn)
+            return
+        future = self.write_behind.submit(operation)
+        if wait:
+            future.result()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until every write queued so far is committed; a no-op without `write_behind`."""
+        if self.write_behind is not None:
+            self.write_behind.flush(timeout)
+
+    def close(self) -> None:
+        """Commit queued writes, then close the idle pooled connections.
+
+        Borrowed connections close when they are returned after this, and no
+        connection is lent out any more.
+        """
+        if self.write_behind is not None:
+            self.write_behind.close()
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
             conn.close()
+            with self._lock:
+                self._open_connections -= 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "open_connections": self._open_connections,
+                "idle_connections": self._idle.qsize(),
+                **self._counters,
+                "write_behind": self.write_behind.stats() if self.write_behind is not None else None,
+            }
+
+    def _acquire(self) -> sqlite3.Connection:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counters["waits"] += 1
+            self._slots.acquire()
+        if self._closed:
+            self._slots.release()
+            raise RuntimeError("SQLiteDatabase is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        # Checked under the lock close() sets the flag with, so a connection is
+        # either pooled before close() drains the pool or closed here.
+        with self._lock:
+            if not self._closed:
+                self._idle.put(conn)
+                self._slots.release()
+                return
+        self._discard(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        conn.close()
+        with self._lock:
+            self._open_connections -= 1
+        self._slots.release()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        # WAL is a property of the database file; the rest are per connection.
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+        conn.execute(f"PRAGMA cache_size = -{self.cache_size_kib}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size_bytes}")
+        with self._lock:
+            self._open_connections += 1
+        return conn
+
+    def _begin_immediate(self, conn: sqlite3.Connection) -> None:
+        for attempt in range(self.write_retries + 1):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as exc:
+                if not _is_busy(exc) or attempt == self.write_retries:
+                    raise
+            with self._lock:
+                self._counters["busy_retries"] += 1
+            time.sleep(self.retry_backoff_seconds * (2**attempt))
+
+
+def _is_busy(exc: sqlite3.OperationalError) -> bool:
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
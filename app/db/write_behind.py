@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    from .sqlite import SQLiteDatabase
+
+
+WriteOperation = Callable[[sqlite3.Connection], None]
+
+
+@dataclass
+class _QueuedWrite:
+    operation: WriteOperation
+    future: Future = field(default_factory=Future)
+
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """Write-behind thread that commits queued repository writes in batches.
+
+    Writes wait in a queue of at most `max_queue_size` entries (submitters
+    block when it is full). The thread takes the first waiting write, collects
+    more for up to `flush_interval_seconds` or until `max_batch_size`, and runs
+    them all in one transaction, so a burst of writes costs one commit instead
+    of one each. With the default interval of 0 it takes only what is already
+    queued; writes arriving while a batch commits form the next batch. Each
+    write runs under its own SAVEPOINT: a failing write is rolled back alone
+    and its error is set on its future, the rest still commit. Futures resolve
+    once the batch holding the write has committed. close() commits every
+    write submitted before it and later submits raise RuntimeError, so no
+    future is left pending.
+    """
+
+    def __init__(
+        self,
+        db: SQLiteDatabase,
+        *,
+        max_batch_size: int = 256,
+        flush_interval_seconds: float = 0.0,
+        max_queue_size: int = 10_000,
+    ) -> None:
+        self.db = db
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.flush_interval_seconds = max(0.0, float(flush_interval_seconds))
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max(1, int(max_queue_size)))
+        self._lock = threading.Lock()
+        # Serializes submit, start and close. Separate from _lock, which the
+        # writer thread needs to finish a batch, because put() can block on a
+        # full queue while this is held.
+        self._submit_lock = threading.Lock()
+        self._counters = {"writes": 0, "failed": 0, "batches": 0, "largest_batch": 0}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def start(self) -> None:
+        with self._submit_lock:
+            self._start()
+
+    def submit(self, operation: WriteOperation) -> Future:
+        """Queue `operation`; the returned future resolves when its batch commits."""
+        write = _QueuedWrite(operation)
+        # Checked and queued under one lock, so close() cannot put its stop marker
+        # between the check and the put and leave this write behind it.
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("GroupCommitWriter is closed")
+            self._start()
+            self._queue.put(write)
+        return write.future
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every write submitted before this call is committed."""
+        if self._thread is None:
+            return
+        self.submit(_noop).result(timeout)
+
+    def close(self) -> None:
+        """Commit what was queued before the stop marker and stop the thread."""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        batches = counters["batches"]
+        return {
+            **counters,
+            "queued": self._queue.qsize(),
+            "avg_batch": round(counters["writes"] / batches, 1) if batches else None,
+        }
+
+    def _start(self) -> None:
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="sqlite-group-commit", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+        self._fail_remaining()
+
+    def _fail_remaining(self) -> None:
+        """Fail writes left behind the stop marker instead of leaving their futures pending."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP:
+                item.future.set_exception(RuntimeError("GroupCommitWriter is closed"))
+
+    def _commit(self, batch: list[_QueuedWrite]) -> None:
+        errors: list[Optional[BaseException]] = []
+        try:
+            with self.db.connection(write=True) as conn:
+                for write in batch:
+                    conn.execute("SAVEPOINT group_commit_write")
+                    try:
+                        write.operation(conn)
+                    except Exception as exc:
+                        conn.execute("ROLLBACK TO group_commit_write")
+                        errors.append(exc)
+                    else:
+                        errors.append(None)
+                    conn.execute("RELEASE group_commit_write")
+        except Exception as exc:
+            # The transaction itself failed (e.g. the commit), so nothing in the batch is durable.
+            errors = [exc] * len(batch)
+
+        failed = sum(error is not None for error in errors)
+        with self._lock:
+            self._counters["writes"] += sum(write.operation is not _noop for write in batch)
+            self._counters["failed"] += failed
+            self._counters["batches"] += 1
+            self._counters["largest_batch"] = max(self._counters["largest_batch"], len(batch))
+        for write, error in zip(batch, errors):
+            if error is None:
+                write.future.set_result(None)
+            else:
+                write.future.set_exception(error)
+
+
+def _noop(conn: sqlite3.Connection) -> None:
+    return None
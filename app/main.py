@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
+from functools import partial
+from pathlib import Path
 from typing import Any
 
 from fastapi import FastAPI, HTTPException, Request
@@ -8,12 +10,42 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from app.ai import DogMatcher, GeminiClient, MockGeminiClient, PhotoAnalyzer, VideoAnalyzer
+from app.ai import (
+    AsyncGeminiClient,
+    AsyncMockGeminiClient,
+    AsyncPhotoAnalyzer,
+    AsyncVideoAnalyzer,
+    AttributePruner,
+    ComparisonCache,
+    DogMatcher,
+    GeminiClient,
+    HedgingPolicy,
+    ImagePreprocessor,
+    KeyframeSampler,
+    MatchCascade,
+    MatchJobWorkerPool,
+    MockGeminiClient,
+    PhotoAnalyzer,
+    QuotaRateLimiter,
+    RequestCoalescer,
+    ResponseCache,
+    RetryPolicy,
+    StandingNoticeMatcher,
+    UploadedFileRegistry,
+    VideoAnalyzer,
+)
+from app.ai.comparison_cache import prompt_version
+from app.ai.dog_matcher import DEFAULT_BATCH_PROMPT_PATH as MATCH_BATCH_PROMPT_PATH
+from app.ai.dog_matcher import DEFAULT_PROMPT_PATH as MATCH_PROMPT_PATH
 from app.api.ai_routes import router as ai_router
+from app.api.ai_routes import run_match_job
 from app.core.response import api_error, api_success
 from app.core.settings import Settings, get_settings
 from app.db.sqlite import SQLiteDatabase
+from app.db.write_behind import GroupCommitWriter
 from app.repositories.ai_repositories import (
+    SQLiteLostNoticeRepository,
+    SQLiteMatchJobRepository,
     SQLiteMatchNotifier,
     SQLitePetDynamicInfoRepository,
     SQLitePetRepository,
@@ -21,37 +53,188 @@ from app.repositories.ai_repositories import (
 )
 
 
-def _create_ai_client(settings: Settings) -> GeminiClient | MockGeminiClient:
+def _create_response_cache(settings: Settings, db: SQLiteDatabase) -> ResponseCache | None:
+    if not settings.ai_cache_enabled:
+        return None
+    cache_db: SQLiteDatabase | None = None
+    if settings.ai_cache_sqlite_path:
+        # The disk tier may live in its own file; it is migrated like the main one.
+        cache_db = db
+        if Path(settings.ai_cache_sqlite_path).resolve() != Path(settings.sqlite_path).resolve():
+            cache_db = SQLiteDatabase(
+                settings.ai_cache_sqlite_path,
+                busy_timeout_ms=settings.sqlite_busy_timeout_ms,
+            )
+            cache_db.initialize()
+    return ResponseCache(
+        max_bytes=settings.ai_cache_max_bytes,
+        ttl_seconds=settings.ai_cache_ttl_seconds,
+        db=cache_db,
+    )
+
+
+def _create_hedging_policy(settings: Settings) -> HedgingPolicy | None:
+    if not settings.gemini_hedging_enabled:
+        return None
+    return HedgingPolicy(
+        percentile=settings.gemini_hedge_percentile,
+        max_hedge_ratio=settings.gemini_hedge_max_ratio,
+        min_samples=settings.gemini_hedge_min_samples,
+    )
+
+
+def _create_image_preprocessor(settings: Settings) -> ImagePreprocessor | None:
+    if not settings.image_preprocess_enabled:
+        return None
+    return ImagePreprocessor(
+        max_edge=settings.image_max_edge,
+        output_format=settings.image_output_format,
+        quality=settings.image_quality,
+    )
+
+
+def _create_upload_registry(settings: Settings, db: SQLiteDatabase) -> UploadedFileRegistry | None:
+    if settings.mock_mode or not settings.gemini_reuse_uploads:
+        return None
+    return UploadedFileRegistry(db)
+
+
+def _create_match_cascade(settings: Settings) -> MatchCascade | None:
+    if not settings.match_cascade:
+        return None
+    return MatchCascade(
+        screen_tier=settings.match_cascade_screen_tier,
+        escalation_tier=settings.match_cascade_escalation_tier,
+        band=settings.match_cascade_band,
+    )
+
+
+def _create_comparison_cache(
+    settings: Settings,
+    db: SQLiteDatabase,
+    client: Any,
+    cascade: MatchCascade | None,
+) -> ComparisonCache | None:
+    if not settings.match_comparison_cache:
+        return None
+    cache = ComparisonCache(db)
+    if not MATCH_PROMPT_PATH.exists():
+        return cache
+    match_version = prompt_version(MATCH_PROMPT_PATH.read_text(encoding="utf-8"))
+    versions_by_model: dict[str, set[str]] = {client._resolve_model_name("image"): {match_version}}
+    if cascade is not None and cascade.screen_prompt_path.exists():
+        screen_version = prompt_version(cascade.load_screen_prompt())
+        versions_by_model.setdefault(client._resolve_model_name(cascade.screen_tier), set()).add(screen_version)
+        versions_by_model.setdefault(client._resolve_model_name(cascade.escalation_tier), set()).add(match_version)
+    if settings.match_batch_size > 1 and MATCH_BATCH_PROMPT_PATH.exists():
+        batch_version = prompt_version(MATCH_BATCH_PROMPT_PATH.read_text(encoding="utf-8"))
+        batch_tier = "image" if cascade is None else cascade.screen_tier
+        versions_by_model.setdefault(client._resolve_model_name(batch_tier), set()).add(batch_version)
+    # Rows from an older prompt or for a retired model can never hit again.
+    for model_name, versions in versions_by_model.items():
+        cache.purge_stale(prompt_version=versions, model=model_name)
+    return cache
+
+
+def _create_ai_client(settings: Settings, options: dict[str, Any]) -> GeminiClient | MockGeminiClient:
     if settings.mock_mode:
-        return MockGeminiClient()
+        return MockGeminiClient(**options)
     if not settings.gemini_api_key:
         raise RuntimeError("Missing GEMINI_API_KEY. Set it or enable AI_MOCK_MODE=1.")
     return GeminiClient(
         api_key=settings.gemini_api_key,
         image_model=settings.gemini_image_model,
         video_model=settings.gemini_video_model,
+        model_tiers=settings.gemini_model_tiers,
+        **options,
+    )
+
+
+def _create_async_ai_client(
+    settings: Settings,
+    options: dict[str, Any],
+) -> AsyncGeminiClient | AsyncMockGeminiClient:
+    if settings.mock_mode:
+        return AsyncMockGeminiClient(**options)
+    if not settings.gemini_api_key:
+        raise RuntimeError("Missing GEMINI_API_KEY. Set it or enable AI_MOCK_MODE=1.")
+    return AsyncGeminiClient(
+        api_key=settings.gemini_api_key,
+        image_model=settings.gemini_image_model,
+        video_model=settings.gemini_video_model,
+        model_tiers=settings.gemini_model_tiers,
+        **options,
     )
 
 
 def _initialize_runtime(app: FastAPI, settings: Settings) -> None:
-    db = SQLiteDatabase(settings.sqlite_path)
+    db = SQLiteDatabase(
+        settings.sqlite_path,
+        pool_size=settings.sqlite_pool_size,
+        busy_timeout_ms=settings.sqlite_busy_timeout_ms,
+        cache_size_kib=settings.sqlite_cache_size_kib,
+        mmap_size_bytes=settings.sqlite_mmap_size_bytes,
+    )
     db.initialize()
+    if settings.sqlite_write_behind:
+        db.write_behind = GroupCommitWriter(
+            db,
+            max_batch_size=settings.sqlite_write_batch_size,
+            flush_interval_seconds=settings.sqlite_write_flush_ms / 1000,
+            max_queue_size=settings.sqlite_write_queue_size,
+        )
 
-    ai_client = _create_ai_client(settings)
+    # Shared by the sync and async clients so both draw on one cache, quota and latency history.
+    client_options: dict[str, Any] = {
+        "response_cache": _create_response_cache(settings, db),
+        "coalescer": RequestCoalescer() if settings.ai_coalesce_requests else None,
+        "rate_limiter": QuotaRateLimiter(
+            requests_per_minute=settings.gemini_requests_per_minute,
+            tokens_per_minute=settings.gemini_tokens_per_minute,
+        ),
+        "retry_policy": RetryPolicy(
+            max_attempts=settings.gemini_max_attempts,
+            total_budget_seconds=settings.gemini_retry_budget_seconds,
+        ),
+        "hedging": _create_hedging_policy(settings),
+        "image_preprocessor": _create_image_preprocessor(settings),
+        "upload_registry": _create_upload_registry(settings, db),
+    }
+    ai_client = _create_ai_client(settings, client_options)
+    async_ai_client = _create_async_ai_client(settings, client_options)
     app.state.settings = settings
     app.state.db = db
+    app.state.response_cache = client_options["response_cache"]
+    app.state.request_coalescer = client_options["coalescer"]
+    app.state.rate_limiter = client_options["rate_limiter"]
+    app.state.hedging = client_options["hedging"]
+    app.state.image_preprocessor = client_options["image_preprocessor"]
+    app.state.upload_registry = client_options["upload_registry"]
+    app.state.match_cascade = _create_match_cascade(settings)
+    app.state.comparison_cache = _create_comparison_cache(settings, db, ai_client, app.state.match_cascade)
+    app.state.attribute_pruner = AttributePruner(settings.match_pruning_rules) if settings.match_pruning_rules else None
     app.state.ai_client = ai_client
+    app.state.async_ai_client = async_ai_client
     app.state.pet_repository = SQLitePetRepository(db)
     app.state.dynamic_info_repository = SQLitePetDynamicInfoRepository(db)
     app.state.stray_report_repository = SQLiteStrayReportRepository(db)
     app.state.match_notifier = SQLiteMatchNotifier(db)
+    app.state.match_job_repository = SQLiteMatchJobRepository(db)
+    app.state.lost_notice_repository = SQLiteLostNoticeRepository(db)
+    app.state.standing_notice_matcher = _create_standing_notice_matcher(app, settings)
     app.state.photo_analyzer = PhotoAnalyzer(
         ai_client,
         temperature=settings.photo_temperature,
     )
+    keyframe_sampler = KeyframeSampler(
+        count=settings.video_keyframe_count,
+        strategy=settings.video_keyframe_strategy,
+    )
     app.state.video_analyzer = VideoAnalyzer(
         ai_client,
         temperature=settings.video_temperature,
+        mode=settings.video_analysis_mode,
+        keyframe_sampler=keyframe_sampler,
     )
     app.state.matcher = DogMatcher(
         client=ai_client,
@@ -59,6 +242,52 @@ def _initialize_runtime(app: FastAPI, settings: Settings) -> None:
         max_distance_km=settings.max_distance_km,
         max_time_gap_hours=settings.max_time_gap_hours,
         temperature=settings.match_temperature,
+        max_concurrency=settings.match_max_concurrency,
+        prefilter_top_k=settings.match_prefilter_top_k,
+        prefilter_min_similarity=settings.match_prefilter_min_similarity,
+        candidate_order=settings.match_candidate_order,
+        comparison_cache=app.state.comparison_cache,
+        attribute_pruner=app.state.attribute_pruner,
+        cascade=app.state.match_cascade,
+        batch_size=settings.match_batch_size,
+        batch_ambiguity_band=settings.match_batch_ambiguity_band,
+    )
+    app.state.async_photo_analyzer = AsyncPhotoAnalyzer(
+        async_ai_client,
+        temperature=settings.photo_temperature,
+    )
+    app.state.async_video_analyzer = AsyncVideoAnalyzer(
+        async_ai_client,
+        temperature=settings.video_temperature,
+        mode=settings.video_analysis_mode,
+        keyframe_sampler=keyframe_sampler,
+    )
+
+
+def _create_standing_notice_matcher(app: FastAPI, settings: Settings) -> StandingNoticeMatcher | None:
+    if not settings.standing_notice_matching:
+        return None
+    return StandingNoticeMatcher(
+        app.state.async_ai_client,
+        app.state.lost_notice_repository.find_notices_for_report,
+        notifier=app.state.match_notifier,
+        similarity_threshold=settings.similarity_threshold,
+        max_distance_km=settings.max_distance_km,
+        max_time_gap_hours=settings.max_time_gap_hours,
+        temperature=settings.match_temperature,
+        max_concurrency=settings.match_max_concurrency,
+        comparison_cache=app.state.comparison_cache,
+        attribute_pruner=app.state.attribute_pruner,
+        cascade=app.state.match_cascade,
+    )
+
+
+def _create_match_job_pool(app: FastAPI, settings: Settings, *, workers: int) -> MatchJobWorkerPool:
+    return MatchJobWorkerPool(
+        app.state.match_job_repository,
+        partial(run_match_job, app.state),
+        workers=workers,
+        max_attempts=settings.match_job_max_attempts,
     )
 
 
@@ -68,7 +297,20 @@ def create_app() -> FastAPI:
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         _initialize_runtime(app, settings)
+        # MATCH_JOB_WORKERS=0 leaves queued jobs to `python -m app.match_worker`.
+        job_pool = None
+        if settings.match_job_workers > 0:
+            job_pool = _create_match_job_pool(app, settings, workers=settings.match_job_workers)
+            job_pool.start()
         yield
+        if job_pool is not None:
+            await job_pool.stop()
+        if app.state.hedging is not None:
+            app.state.hedging.close()
+        response_cache = app.state.response_cache
+        if response_cache is not None and response_cache.db not in (None, app.state.db):
+            response_cache.db.close()
+        app.state.db.close()
 
     app = FastAPI(
         title="Goodle Backend API",
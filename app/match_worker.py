@@ -0,0 +1,44 @@
+"""Run lost-dog match jobs outside the API process.
+
+Start the API with MATCH_JOB_WORKERS=0 and run one or more of these against the
+same SQLITE_PATH; workers coordinate through job leases in the database.
+
+    python -m app.match_worker --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from fastapi import FastAPI
+
+from app.core.settings import get_settings
+from app.main import _create_match_job_pool, _initialize_runtime
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent jobs (default: MATCH_JOB_WORKERS or 1).")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    app = FastAPI()
+
+    async def run() -> None:
+        _initialize_runtime(app, settings)
+        workers = args.workers or settings.match_job_workers or 1
+        try:
+            await _create_match_job_pool(app, settings, workers=workers).run_forever()
+        finally:
+            # Commits writes still queued for group commit (SQLITE_WRITE_BEHIND=1).
+            app.state.db.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
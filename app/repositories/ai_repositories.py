@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 import json
+import sqlite3
+import time
+import uuid
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable, Iterator, Optional, Sequence
 
-from app.ai.dog_matcher import GeoLocation, MatchNotifier, StrayDogReport
+from app.ai.dog_attributes import DogAttributes
+from app.ai.dog_matcher import GeoLocation, LostDogNotice, MatchNotifier, StandingNotice, StrayDogReport
+from app.ai.geo import bounding_box, haversine_km, to_epoch_seconds
+from app.ai.image_payload import ImageBytes, decode_base64_image
+from app.ai.match_jobs import MATCH_JOB_STATUSES, MatchJob
 from app.ai.photo_analyzer import PetAIRepository
 from app.ai.video_analyzer import PetDynamicInfoRepository
+from app.ai.visual_embedding import VisualEmbedding
 from app.db.sqlite import SQLiteDatabase
 
 
@@ -14,9 +22,10 @@ class SQLitePetRepository(PetAIRepository):
     def __init__(self, db: SQLiteDatabase) -> None:
         self.db = db
 
-    def update_pet_ai_tags(self, pet_id: str, ai_tags: dict[str, Any]) -> None:
+    def update_pet_ai_tags(self, pet_id: str, ai_tags: dict[str, Any], *, wait: bool = True) -> None:
         payload = json.dumps(ai_tags, ensure_ascii=True)
-        with self.db.connection() as conn:
+
+        def write(conn: sqlite3.Connection) -> None:
             conn.execute(
                 """
                 INSERT INTO pets (id, aitags, created_at, updated_at)
@@ -28,13 +37,24 @@ class SQLitePetRepository(PetAIRepository):
                 (pet_id, payload),
             )
 
+        self.db.write(write, wait=wait)
+
 
 class SQLitePetDynamicInfoRepository(PetDynamicInfoRepository):
     def __init__(self, db: SQLiteDatabase) -> None:
         self.db = db
 
-    def create_pet_dynamic_info(self, pet_id: str, dynamic_info: dict[str, Any]) -> None:
-        with self.db.connection() as conn:
+    def create_pet_dynamic_info(self, pet_id: str, dynamic_info: dict[str, Any], *, wait: bool = True) -> None:
+        values = (
+            pet_id,
+            float(dynamic_info["activity_level"]),
+            float(dynamic_info["approach_speed"]),
+            float(dynamic_info["emotional_stability"]),
+            str(dynamic_info["play_preference"]),
+            float(dynamic_info["body_language_score"]),
+        )
+
+        def write(conn: sqlite3.Connection) -> None:
             conn.execute(
                 """
                 INSERT INTO pet_dynamic_info (
@@ -46,61 +66,153 @@ class SQLitePetDynamicInfoRepository(PetDynamicInfoRepository):
                     body_language_score
                 ) VALUES (?, ?, ?, ?, ?, ?)
                 """,
-                (
-                    pet_id,
-                    float(dynamic_info["activity_level"]),
-                    float(dynamic_info["approach_speed"]),
-                    float(dynamic_info["emotional_stability"]),
-                    str(dynamic_info["play_preference"]),
-                    float(dynamic_info["body_language_score"]),
-                ),
+                values,
             )
 
+        self.db.write(write, wait=wait)
+
 
 class SQLiteStrayReportRepository:
+    _REPORT_COLUMNS = (
+        "report_id, image_path, image_base64, image_blob, embedding, latitude, longitude, reported_at, "
+        "attr_size, attr_age_group, attr_colors, attr_breed"
+    )
+    _ID_CHUNK = 500
+    # Columns iter_reports can project. Image data is never among them: `has_image`
+    # only checks for NULL, which SQLite answers from the record header.
+    _LISTING_COLUMNS = {
+        "report_id": "report_id",
+        "image_path": "image_path",
+        "has_image": "(image_blob IS NOT NULL OR image_base64 IS NOT NULL)",
+        "latitude": "latitude",
+        "longitude": "longitude",
+        "reported_at": "reported_at",
+        "attr_size": "attr_size",
+        "attr_age_group": "attr_age_group",
+        "attr_colors": "attr_colors",
+        "attr_breed": "attr_breed",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    }
+    SUMMARY_COLUMNS = ("report_id", "image_path", "has_image", "reported_at", "latitude", "longitude")
+
     def __init__(self, db: SQLiteDatabase) -> None:
         self.db = db
 
-    def upsert_report(self, report: StrayDogReport) -> None:
+    def upsert_report(self, report: StrayDogReport, *, wait: bool = True) -> bool:
+        """Insert or replace `report`; True when it is new or its image changed.
+
+        Edits that keep the image (location, time, tags) return False, so callers
+        can skip re-matching and re-tagging; such an edit without `attributes`
+        keeps the stored ones. With `wait=False` the write may not have run yet
+        and True is returned.
+        """
         latitude = report.location.latitude if report.location else None
         longitude = report.location.longitude if report.location else None
         reported_at = report.reported_at.isoformat() if report.reported_at else None
-        with self.db.connection() as conn:
+        reported_epoch = to_epoch_seconds(report.reported_at) if report.reported_at else None
+        image_changed: list[bool] = []
+
+        def write(conn: sqlite3.Connection) -> None:
+            stored = conn.execute(
+                """
+                SELECT image_path IS ? AND image_base64 IS ? AND image_blob IS ?,
+                    attr_size, attr_age_group, attr_colors, attr_breed
+                FROM stray_dog_reports
+                WHERE report_id = ?
+                """,
+                (report.image_path, report.image_base64, report.image_bytes, report.report_id),
+            ).fetchone()
+            image_changed.append(stored is None or not stored[0])
+            tags = _attribute_columns(report.attributes)
+            if report.attributes is None and not image_changed[-1]:
+                tags = tuple(stored[1:])
             conn.execute(
                 """
                 INSERT INTO stray_dog_reports (
                     report_id,
                     image_path,
                     image_base64,
+                    image_blob,
+                    embedding,
                     latitude,
                     longitude,
                     reported_at,
+                    reported_epoch,
+                    attr_size,
+                    attr_age_group,
+                    attr_colors,
+                    attr_breed,
                     created_at,
                     updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
                 ON CONFLICT(report_id) DO UPDATE SET
                     image_path = excluded.image_path,
                     image_base64 = excluded.image_base64,
+                    image_blob = excluded.image_blob,
+                    embedding = excluded.embedding,
                     latitude = excluded.latitude,
                     longitude = excluded.longitude,
                     reported_at = excluded.reported_at,
+                    reported_epoch = excluded.reported_epoch,
+                    attr_size = excluded.attr_size,
+                    attr_age_group = excluded.attr_age_group,
+                    attr_colors = excluded.attr_colors,
+                    attr_breed = excluded.attr_breed,
                     updated_at = CURRENT_TIMESTAMP
                 """,
                 (
                     report.report_id,
                     report.image_path,
                     report.image_base64,
+                    report.image_bytes,
+                    report.embedding.to_bytes() if report.embedding else None,
                     latitude,
                     longitude,
                     reported_at,
+                    reported_epoch,
+                    *tags,
                 ),
             )
+            if self.db.rtree_enabled:
+                report_key = conn.execute(
+                    "SELECT id FROM stray_dog_reports WHERE report_id = ?",
+                    (report.report_id,),
+                ).fetchone()[0]
+                conn.execute("DELETE FROM stray_dog_reports_rtree WHERE id = ?", (report_key,))
+                if latitude is not None and longitude is not None:
+                    conn.execute(
+                        "INSERT INTO stray_dog_reports_rtree (id, min_lat, max_lat, min_lon, max_lon) VALUES (?, ?, ?, ?, ?)",
+                        (report_key, latitude, latitude, longitude, longitude),
+                    )
+
+        self.db.write(write, wait=wait)
+        return image_changed[-1] if image_changed else True
+
+    def update_attributes(self, report: StrayDogReport, attributes: DogAttributes) -> bool:
+        """Store tags for `report` if its stored image is still the one they were taken from."""
+        with self.db.connection(write=True) as conn:
+            updated = conn.execute(
+                """
+                UPDATE stray_dog_reports
+                SET attr_size = ?, attr_age_group = ?, attr_colors = ?, attr_breed = ?
+                WHERE report_id = ? AND image_path IS ? AND image_base64 IS ? AND image_blob IS ?
+                """,
+                (
+                    *_attribute_columns(attributes),
+                    report.report_id,
+                    report.image_path,
+                    report.image_base64,
+                    report.image_bytes,
+                ),
+            ).rowcount
+        return updated > 0
 
     def list_reports(self) -> list[StrayDogReport]:
         with self.db.connection() as conn:
             rows = conn.execute(
-                """
-                SELECT report_id, image_path, image_base64, latitude, longitude, reported_at
+                f"""
+                SELECT {self._REPORT_COLUMNS}
                 FROM stray_dog_reports
                 ORDER BY updated_at DESC
                 """
@@ -108,6 +220,149 @@ class SQLiteStrayReportRepository:
 
         return [self._to_report(row) for row in rows]
 
+    def iter_reports(
+        self,
+        columns: Sequence[str] = SUMMARY_COLUMNS,
+        *,
+        chunk_size: int = 500,
+    ) -> Iterator[dict[str, Any]]:
+        """Yield one dict per report, newest first, holding only `columns`.
+
+        Rows are fetched `chunk_size` at a time, so memory stays flat however many
+        reports there are; use load_image for a report's image. Each chunk is a
+        keyset query on (updated_at, id) over idx_stray_dog_reports_updated_at
+        that borrows a pooled connection only while it runs, so a slow consumer
+        never holds one. A report updated mid-listing may be skipped or repeated.
+        """
+        unknown = [column for column in columns if column not in self._LISTING_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unsupported report columns: {unknown}. Use any of {list(self._LISTING_COLUMNS)}.")
+        return self._iter_rows(tuple(columns), max(1, int(chunk_size)))
+
+    def _iter_rows(self, columns: tuple[str, ...], chunk_size: int) -> Iterator[dict[str, Any]]:
+        select = ", ".join(f"{self._LISTING_COLUMNS[column]} AS {column}" for column in columns)
+        first_page = f"SELECT {select}, updated_at, id FROM stray_dog_reports"
+        next_page = f"{first_page} WHERE (updated_at, id) < (?, ?)"
+        order = " ORDER BY updated_at DESC, id DESC LIMIT ?"
+        after: Optional[tuple[str, int]] = None
+        while True:
+            with self.db.connection() as conn:
+                if after is None:
+                    rows = conn.execute(first_page + order, (chunk_size,)).fetchall()
+                else:
+                    rows = conn.execute(next_page + order, (*after, chunk_size)).fetchall()
+            for row in rows:
+                item = dict(zip(columns, row))
+                if "has_image" in item:
+                    item["has_image"] = bool(item["has_image"])
+                yield item
+            if len(rows) < chunk_size:
+                return
+            after = (rows[-1][-2], rows[-1][-1])
+
+    def load_image(self, report_id: str) -> Optional[ImageBytes]:
+        """Stored image of one report, read on demand; None if the report or its image is missing.
+
+        Rows written before images were kept as blobs are decoded from `image_base64`.
+        """
+        with self.db.connection() as conn:
+            row = conn.execute(
+                "SELECT image_blob, image_base64 FROM stray_dog_reports WHERE report_id = ?",
+                (report_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        if row["image_blob"] is not None:
+            return row["image_blob"]
+        if row["image_base64"]:
+            return decode_base64_image(row["image_base64"])
+        return None
+
+    def find_candidates(
+        self,
+        *,
+        location: Optional[GeoLocation] = None,
+        radius_km: Optional[float] = None,
+        around: Optional[datetime] = None,
+        max_gap_hours: Optional[float] = None,
+    ) -> list[StrayDogReport]:
+        """Reports that can pass DogMatcher's distance/time filter, newest first.
+
+        Mirrors `_passes_spatiotemporal_filter`: reports without a location or a
+        report time pass that check. Candidates are found from the R*Tree (or
+        lat/lon bounding box) and `reported_epoch` index, checked exactly with
+        haversine, and only then are image columns read, for the survivors.
+        """
+        params: dict[str, Any] = {}
+        time_clause = ""
+        if around is not None and max_gap_hours is not None:
+            center = to_epoch_seconds(around)
+            params["earliest"] = center - max_gap_hours * 3600
+            params["latest"] = center + max_gap_hours * 3600
+            time_clause = "AND (reported_epoch BETWEEN :earliest AND :latest OR reported_epoch IS NULL)"
+
+        spatial = location is not None and radius_km is not None
+        if spatial:
+            assert location is not None and radius_km is not None
+            box = bounding_box(location.latitude, location.longitude, radius_km)
+            params.update(
+                min_lat=box.min_latitude,
+                max_lat=box.max_latitude,
+                min_lon=box.min_longitude,
+                max_lon=box.max_longitude,
+            )
+            if self.db.rtree_enabled:
+                query = f"""
+                    SELECT id, latitude, longitude, updated_at FROM stray_dog_reports
+                    WHERE id IN (
+                        SELECT id FROM stray_dog_reports_rtree
+                        WHERE max_lat >= :min_lat AND min_lat <= :max_lat
+                          AND max_lon >= :min_lon AND min_lon <= :max_lon
+                    ) {time_clause}
+                    UNION ALL
+                    SELECT id, latitude, longitude, updated_at FROM stray_dog_reports
+                    WHERE (latitude IS NULL OR longitude IS NULL) {time_clause}
+                    ORDER BY updated_at DESC
+                """
+            else:
+                query = f"""
+                    SELECT id, latitude, longitude, updated_at FROM stray_dog_reports
+                    WHERE (
+                        (latitude BETWEEN :min_lat AND :max_lat AND longitude BETWEEN :min_lon AND :max_lon)
+                        OR latitude IS NULL OR longitude IS NULL
+                    ) {time_clause}
+                    ORDER BY updated_at DESC
+                """
+        else:
+            query = f"""
+                SELECT id, latitude, longitude, updated_at FROM stray_dog_reports
+                WHERE 1 = 1 {time_clause}
+                ORDER BY updated_at DESC
+            """
+
+        with self.db.connection() as conn:
+            ids: list[int] = []
+            for row in conn.execute(query, params):
+                if spatial and row["latitude"] is not None and row["longitude"] is not None:
+                    assert location is not None and radius_km is not None
+                    distance = haversine_km(location.latitude, location.longitude, row["latitude"], row["longitude"])
+                    if distance > radius_km:
+                        continue
+                ids.append(int(row["id"]))
+            return self._reports_by_id(conn, ids)
+
+    def _reports_by_id(self, conn: Any, ids: Sequence[int]) -> list[StrayDogReport]:
+        by_id: dict[int, StrayDogReport] = {}
+        for start in range(0, len(ids), self._ID_CHUNK):
+            chunk = ids[start : start + self._ID_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            for row in conn.execute(
+                f"SELECT id, {self._REPORT_COLUMNS} FROM stray_dog_reports WHERE id IN ({placeholders})",
+                chunk,
+            ):
+                by_id[int(row["id"])] = self._to_report(row)
+        return [by_id[report_key] for report_key in ids if report_key in by_id]
+
     @staticmethod
     def _to_report(row: Any) -> StrayDogReport:
         reported_at = None
@@ -122,6 +377,228 @@ class SQLiteStrayReportRepository:
             image_base64=row["image_base64"],
             reported_at=reported_at,
             location=location,
+            image_bytes=row["image_blob"],
+            embedding=VisualEmbedding.from_bytes(row["embedding"]),
+            attributes=_attributes_from_row(row),
+        )
+
+
+class SQLiteLostNoticeRepository:
+    """Standing lost notices, indexed by search area and time window.
+
+    Each open notice stores the bounding box of its search radius (in an R*Tree
+    when available) and the epoch window it accepts reports from, so a new
+    report only has to be compared against the notices that could match it.
+    """
+
+    _NOTICE_COLUMNS = (
+        "notice_id, owner_id, image_path, image_blob, latitude, longitude, lost_at, "
+        "max_distance_km, max_time_gap_hours, similarity_threshold, "
+        "attr_size, attr_age_group, attr_colors, attr_breed"
+    )
+
+    def __init__(self, db: SQLiteDatabase) -> None:
+        self.db = db
+
+    def upsert_notice(self, standing: StandingNotice) -> bool:
+        """Insert or replace and reopen a notice; True when it is new or its image changed.
+
+        A replacement with the same image and no `attributes` keeps the stored ones.
+        """
+        notice = standing.notice
+        location = notice.location
+        box = None
+        if location is not None and standing.max_distance_km is not None:
+            box = bounding_box(location.latitude, location.longitude, standing.max_distance_km)
+        window_start = window_end = None
+        if notice.lost_at is not None and standing.max_time_gap_hours is not None:
+            center = to_epoch_seconds(notice.lost_at)
+            window_start = center - standing.max_time_gap_hours * 3600
+            window_end = center + standing.max_time_gap_hours * 3600
+
+        with self.db.connection(write=True) as conn:
+            stored = conn.execute(
+                """
+                SELECT image_path IS ? AND image_blob IS ?, attr_size, attr_age_group, attr_colors, attr_breed
+                FROM lost_dog_notices
+                WHERE notice_id = ?
+                """,
+                (notice.image_path, notice.image_bytes, standing.notice_id),
+            ).fetchone()
+            image_changed = stored is None or not stored[0]
+            tags = _attribute_columns(notice.attributes)
+            if notice.attributes is None and not image_changed:
+                tags = tuple(stored[1:])
+            conn.execute(
+                """
+                INSERT INTO lost_dog_notices (
+                    notice_id, owner_id, status, image_path, image_blob, latitude, longitude, lost_at,
+                    max_distance_km, max_time_gap_hours, similarity_threshold,
+                    window_start_epoch, window_end_epoch, min_lat, max_lat, min_lon, max_lon,
+                    attr_size, attr_age_group, attr_colors, attr_breed, created_at, updated_at
+                ) VALUES (
+                    ?, ?, 'open', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                    CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+                )
+                ON CONFLICT(notice_id) DO UPDATE SET
+                    owner_id = excluded.owner_id,
+                    status = 'open',
+                    image_path = excluded.image_path,
+                    image_blob = excluded.image_blob,
+                    latitude = excluded.latitude,
+                    longitude = excluded.longitude,
+                    lost_at = excluded.lost_at,
+                    max_distance_km = excluded.max_distance_km,
+                    max_time_gap_hours = excluded.max_time_gap_hours,
+                    similarity_threshold = excluded.similarity_threshold,
+                    window_start_epoch = excluded.window_start_epoch,
+                    window_end_epoch = excluded.window_end_epoch,
+                    min_lat = excluded.min_lat,
+                    max_lat = excluded.max_lat,
+                    min_lon = excluded.min_lon,
+                    max_lon = excluded.max_lon,
+                    attr_size = excluded.attr_size,
+                    attr_age_group = excluded.attr_age_group,
+                    attr_colors = excluded.attr_colors,
+                    attr_breed = excluded.attr_breed,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (
+                    standing.notice_id,
+                    standing.owner_id,
+                    notice.image_path,
+                    notice.image_bytes,
+                    location.latitude if location else None,
+                    location.longitude if location else None,
+                    notice.lost_at.isoformat() if notice.lost_at else None,
+                    standing.max_distance_km,
+                    standing.max_time_gap_hours,
+                    standing.similarity_threshold,
+                    window_start,
+                    window_end,
+                    box.min_latitude if box else None,
+                    box.max_latitude if box else None,
+                    box.min_longitude if box else None,
+                    box.max_longitude if box else None,
+                    *tags,
+                ),
+            )
+            if self.db.rtree_enabled:
+                notice_key = conn.execute(
+                    "SELECT id FROM lost_dog_notices WHERE notice_id = ?",
+                    (standing.notice_id,),
+                ).fetchone()[0]
+                conn.execute("DELETE FROM lost_dog_notices_rtree WHERE id = ?", (notice_key,))
+                if box is not None:
+                    conn.execute(
+                        "INSERT INTO lost_dog_notices_rtree (id, min_lat, max_lat, min_lon, max_lon) VALUES (?, ?, ?, ?, ?)",
+                        (notice_key, box.min_latitude, box.max_latitude, box.min_longitude, box.max_longitude),
+                    )
+        return image_changed
+
+    def update_attributes(self, standing: StandingNotice, attributes: DogAttributes) -> bool:
+        """Store tags for `standing` if its stored image is still the one they were taken from."""
+        notice = standing.notice
+        with self.db.connection(write=True) as conn:
+            updated = conn.execute(
+                """
+                UPDATE lost_dog_notices
+                SET attr_size = ?, attr_age_group = ?, attr_colors = ?, attr_breed = ?
+                WHERE notice_id = ? AND image_path IS ? AND image_blob IS ?
+                """,
+                (*_attribute_columns(attributes), standing.notice_id, notice.image_path, notice.image_bytes),
+            ).rowcount
+        return updated > 0
+
+    def close_notice(self, notice_id: str) -> bool:
+        with self.db.connection(write=True) as conn:
+            updated = conn.execute(
+                """
+                UPDATE lost_dog_notices SET status = 'closed', updated_at = CURRENT_TIMESTAMP
+                WHERE notice_id = ? AND status = 'open'
+                """,
+                (notice_id,),
+            ).rowcount
+        return bool(updated)
+
+    def list_open_notices(self) -> list[StandingNotice]:
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT {self._NOTICE_COLUMNS} FROM lost_dog_notices
+                WHERE status = 'open'
+                ORDER BY created_at DESC
+                """
+            ).fetchall()
+        return [self._to_notice(row) for row in rows]
+
+    def find_notices_for_report(self, report: StrayDogReport) -> list[StandingNotice]:
+        """Open notices whose search area and time window contain `report`.
+
+        Like DogMatcher's filter, a missing location or time on either side
+        passes that check.
+        """
+        params: dict[str, Any] = {
+            "epoch": to_epoch_seconds(report.reported_at) if report.reported_at else None,
+            "lat": report.location.latitude if report.location else None,
+            "lon": report.location.longitude if report.location else None,
+        }
+        if self.db.rtree_enabled:
+            area_clause = """
+                id IN (
+                    SELECT id FROM lost_dog_notices_rtree
+                    WHERE min_lat <= :lat AND max_lat >= :lat AND min_lon <= :lon AND max_lon >= :lon
+                )
+            """
+        else:
+            area_clause = "(:lat BETWEEN min_lat AND max_lat AND :lon BETWEEN min_lon AND max_lon)"
+
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT {self._NOTICE_COLUMNS} FROM lost_dog_notices
+                WHERE status = 'open'
+                  AND (:epoch IS NULL OR window_start_epoch IS NULL
+                       OR :epoch BETWEEN window_start_epoch AND window_end_epoch)
+                  AND (:lat IS NULL OR min_lat IS NULL OR {area_clause})
+                """,
+                params,
+            ).fetchall()
+
+        notices: list[StandingNotice] = []
+        for row in rows:
+            standing = self._to_notice(row)
+            origin = standing.notice.location
+            if origin and report.location and standing.max_distance_km is not None:
+                distance = haversine_km(
+                    origin.latitude,
+                    origin.longitude,
+                    report.location.latitude,
+                    report.location.longitude,
+                )
+                if distance > standing.max_distance_km:
+                    continue
+            notices.append(standing)
+        return notices
+
+    @staticmethod
+    def _to_notice(row: Any) -> StandingNotice:
+        location = None
+        if row["latitude"] is not None and row["longitude"] is not None:
+            location = GeoLocation(latitude=float(row["latitude"]), longitude=float(row["longitude"]))
+        return StandingNotice(
+            notice_id=str(row["notice_id"]),
+            owner_id=row["owner_id"],
+            notice=LostDogNotice(
+                image_path=row["image_path"],
+                lost_at=datetime.fromisoformat(row["lost_at"]) if row["lost_at"] else None,
+                location=location,
+                image_bytes=row["image_blob"],
+                attributes=_attributes_from_row(row),
+            ),
+            max_distance_km=row["max_distance_km"],
+            max_time_gap_hours=row["max_time_gap_hours"],
+            similarity_threshold=row["similarity_threshold"],
         )
 
 
@@ -134,25 +611,37 @@ class SQLiteMatchNotifier(MatchNotifier):
         owner_id: str,
         matched_report_ids: list[str],
         similarity_score: float,
+        *,
+        notice_id: Optional[str] = None,
+        wait: bool = True,
     ) -> None:
+        """Record a possible match; repeats for the same owner, `notice_id` and reports are ignored."""
         payload = json.dumps(matched_report_ids, ensure_ascii=True)
-        with self.db.connection() as conn:
+
+        def write(conn: sqlite3.Connection) -> None:
+            # idx_match_notifications_notice only covers rows with a notice_id.
             conn.execute(
                 """
-                INSERT INTO match_notifications (owner_id, matched_report_ids, similarity_score)
-                VALUES (?, ?, ?)
+                INSERT OR IGNORE INTO match_notifications (owner_id, notice_id, matched_report_ids, similarity_score)
+                VALUES (?, ?, ?, ?)
                 """,
-                (owner_id, payload, float(similarity_score)),
+                (owner_id, notice_id, payload, float(similarity_score)),
             )
 
-    def list_notifications(self) -> list[dict[str, Any]]:
+        self.db.write(write, wait=wait)
+
+    def list_notifications(self, owner_id: Optional[str] = None) -> list[dict[str, Any]]:
+        """Newest first; `owner_id` narrows the list to one owner via idx_match_notifications_owner."""
+        owner_clause = "" if owner_id is None else "WHERE owner_id = :owner_id"
         with self.db.connection() as conn:
             rows = conn.execute(
-                """
+                f"""
                 SELECT id, owner_id, matched_report_ids, similarity_score, created_at
                 FROM match_notifications
+                {owner_clause}
                 ORDER BY id DESC
-                """
+                """,
+                {"owner_id": owner_id},
             ).fetchall()
 
         result: list[dict[str, Any]] = []
@@ -167,3 +656,208 @@ class SQLiteMatchNotifier(MatchNotifier):
                 }
             )
         return result
+
+
+class SQLiteMatchJobRepository:
+    """Durable queue behind background match runs; see MatchJobWorkerPool.
+
+    Every state change after a claim is conditional on the caller still holding
+    the job (same worker_id), so a worker whose lease lapsed cannot overwrite the
+    work of the worker that picked the job up after it.
+    """
+
+    def __init__(self, db: SQLiteDatabase, *, clock: Callable[[], float] = time.time) -> None:
+        self.db = db
+        self._clock = clock
+
+    def enqueue(self, payload: dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        now = self._clock()
+        with self.db.connection(write=True) as conn:
+            conn.execute(
+                """
+                INSERT INTO match_jobs (job_id, status, payload, available_at, created_at)
+                VALUES (?, 'queued', ?, ?, ?)
+                """,
+                (job_id, json.dumps(payload, ensure_ascii=True), now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[MatchJob]:
+        with self.db.connection() as conn:
+            row = conn.execute("SELECT * FROM match_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return None if row is None else self._to_job(row)
+
+    def claim(self, worker_id: str, *, lease_seconds: float, max_attempts: int) -> Optional[MatchJob]:
+        """Take the oldest runnable job: queued and due, or running with a lapsed lease.
+
+        A lapsed job that has already used `max_attempts` is marked failed
+        instead, so a job that keeps killing its worker is not retried forever.
+        """
+        while True:
+            now = self._clock()
+            with self.db.connection(write=True) as conn:
+                conn.execute(
+                    """
+                    UPDATE match_jobs
+                    SET status = 'failed',
+                        error = 'lease lapsed after ' || attempts || ' attempts',
+                        finished_at = :now,
+                        lease_expires_at = NULL
+                    WHERE status = 'running' AND lease_expires_at < :now AND attempts >= :max_attempts
+                    """,
+                    {"now": now, "max_attempts": max_attempts},
+                )
+                row = conn.execute(
+                    """
+                    SELECT job_id, status, worker_id FROM match_jobs
+                    WHERE (status = 'queued' AND available_at <= :now)
+                       OR (status = 'running' AND lease_expires_at < :now)
+                    ORDER BY available_at, created_at
+                    LIMIT 1
+                    """,
+                    {"now": now},
+                ).fetchone()
+                if row is None:
+                    return None
+                claimed = conn.execute(
+                    """
+                    UPDATE match_jobs
+                    SET status = 'running',
+                        worker_id = ?,
+                        attempts = attempts + 1,
+                        lease_expires_at = ?,
+                        started_at = COALESCE(started_at, ?)
+                    WHERE job_id = ? AND status = ? AND worker_id IS ?
+                    """,
+                    (worker_id, now + lease_seconds, now, row["job_id"], row["status"], row["worker_id"]),
+                ).rowcount
+                if claimed:
+                    job_row = conn.execute("SELECT * FROM match_jobs WHERE job_id = ?", (row["job_id"],)).fetchone()
+                    return self._to_job(job_row)
+            # Another worker won the race for that job; look again.
+
+    def update_progress(self, job_id: str, worker_id: str, done: int, total: int, *, lease_seconds: float) -> None:
+        with self.db.connection(write=True) as conn:
+            conn.execute(
+                """
+                UPDATE match_jobs
+                SET progress_done = ?, progress_total = ?, lease_expires_at = ?
+                WHERE job_id = ? AND worker_id = ? AND status = 'running'
+                """,
+                (done, total, self._clock() + lease_seconds, job_id, worker_id),
+            )
+
+    def complete(self, job_id: str, worker_id: str, result: dict[str, Any], *, run_seconds: float) -> None:
+        self._finish(job_id, worker_id, "succeeded", run_seconds=run_seconds, result=result)
+
+    def fail(self, job_id: str, worker_id: str, error: str, *, run_seconds: float) -> None:
+        self._finish(job_id, worker_id, "failed", run_seconds=run_seconds, error=error)
+
+    def retry_later(self, job_id: str, worker_id: str, error: str, *, run_seconds: float, delay_seconds: float) -> None:
+        with self.db.connection(write=True) as conn:
+            conn.execute(
+                """
+                UPDATE match_jobs
+                SET status = 'queued', worker_id = NULL, lease_expires_at = NULL, error = ?,
+                    available_at = ?, run_seconds = run_seconds + ?
+                WHERE job_id = ? AND worker_id = ? AND status = 'running'
+                """,
+                (error, self._clock() + delay_seconds, run_seconds, job_id, worker_id),
+            )
+
+    def release(self, job_id: str, worker_id: str) -> None:
+        """Return an interrupted job to the queue without charging it an attempt."""
+        with self.db.connection(write=True) as conn:
+            conn.execute(
+                """
+                UPDATE match_jobs
+                SET status = 'queued', worker_id = NULL, lease_expires_at = NULL,
+                    attempts = MAX(attempts - 1, 0), available_at = ?
+                WHERE job_id = ? AND worker_id = ? AND status = 'running'
+                """,
+                (self._clock(), job_id, worker_id),
+            )
+
+    def stats(self) -> dict[str, Any]:
+        """Queue depth and timing, for sizing the worker pool."""
+        with self.db.connection() as conn:
+            counts = {
+                row["status"]: int(row["count"])
+                for row in conn.execute("SELECT status, COUNT(*) AS count FROM match_jobs GROUP BY status")
+            }
+            timing = conn.execute(
+                """
+                SELECT AVG(started_at - created_at) AS queue_seconds,
+                       AVG(run_seconds) AS run_seconds,
+                       MAX(run_seconds) AS max_run_seconds
+                FROM match_jobs
+                WHERE status IN ('succeeded', 'failed')
+                """
+            ).fetchone()
+        return {
+            **{status: counts.get(status, 0) for status in MATCH_JOB_STATUSES},
+            "avg_queue_seconds": _rounded(timing["queue_seconds"]),
+            "avg_run_seconds": _rounded(timing["run_seconds"]),
+            "max_run_seconds": _rounded(timing["max_run_seconds"]),
+        }
+
+    def _finish(
+        self,
+        job_id: str,
+        worker_id: str,
+        status: str,
+        *,
+        run_seconds: float,
+        result: Optional[dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        with self.db.connection(write=True) as conn:
+            conn.execute(
+                """
+                UPDATE match_jobs
+                SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires_at = NULL,
+                    run_seconds = run_seconds + ?
+                WHERE job_id = ? AND worker_id = ? AND status = 'running'
+                """,
+                (
+                    status,
+                    None if result is None else json.dumps(result, ensure_ascii=True),
+                    error,
+                    self._clock(),
+                    run_seconds,
+                    job_id,
+                    worker_id,
+                ),
+            )
+
+    @staticmethod
+    def _to_job(row: Any) -> MatchJob:
+        return MatchJob(
+            job_id=str(row["job_id"]),
+            status=str(row["status"]),
+            payload=json.loads(row["payload"]),
+            attempts=int(row["attempts"]),
+            progress_done=int(row["progress_done"]),
+            progress_total=int(row["progress_total"]),
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            created_at=float(row["created_at"]),
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            run_seconds=float(row["run_seconds"]),
+        )
+
+
+def _attribute_columns(attributes: Optional[DogAttributes]) -> tuple[Optional[str], ...]:
+    if attributes is None:
+        return (None, None, None, None)
+    return (attributes.size, attributes.age_group, attributes.colors_column(), attributes.breed)
+
+
+def _attributes_from_row(row: Any) -> Optional[DogAttributes]:
+    return DogAttributes.from_columns(row["attr_size"], row["attr_age_group"], row["attr_colors"], row["attr_breed"])
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(float(value), 3)
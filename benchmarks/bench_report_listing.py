@@ -0,0 +1,76 @@
+"""Peak Python memory for listing stray reports: `list_reports` vs `iter_reports`.
+
+Seeds `--reports` reports with `--image-kb` images stored as legacy
+`image_base64` text (the layout that made listing expensive), then measures
+with tracemalloc the peak while building the listing the previous way
+(`list_reports` plus one summary dict per report) and while streaming it
+through `iter_reports`, which projects the summary columns only.
+
+    python -m benchmarks.bench_report_listing
+    python -m benchmarks.bench_report_listing --reports 100000 --image-kb 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from app.db.sqlite import SQLiteDatabase
+from app.repositories.ai_repositories import SQLiteStrayReportRepository
+
+
+def _seed(db: SQLiteDatabase, count: int, image_kb: int) -> None:
+    image = base64.b64encode(b"x" * image_kb * 1024).decode("ascii")
+    with db.connection(write=True) as conn:
+        conn.executemany(
+            "INSERT INTO stray_dog_reports (report_id, image_base64, latitude, longitude) VALUES (?, ?, ?, ?)",
+            ((f"rep_{index}", image, 25.0, 121.5) for index in range(count)),
+        )
+
+
+def _measure(call: Callable[[], int]) -> tuple[float, float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = call()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024), rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=20_000)
+    parser.add_argument("--image-kb", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SQLiteDatabase(str(Path(tmp) / "listing.db"))
+        db.initialize()
+        _seed(db, args.reports, args.image_kb)
+        repository = SQLiteStrayReportRepository(db)
+
+        def materialized() -> int:
+            summaries = [
+                {"report_id": report.report_id, "has_image_base64": bool(report.image_base64 or report.image_bytes)}
+                for report in repository.list_reports()
+            ]
+            return len(summaries)
+
+        def streamed() -> int:
+            return sum(1 for _ in repository.iter_reports())
+
+        print(f"{'listing':<14} {'seconds':>8} {'peak MiB':>9} {'rows':>8}")
+        for label, call in (("list_reports", materialized), ("iter_reports", streamed)):
+            seconds, peak, rows = _measure(call)
+            print(f"{label:<14} {seconds:>8.2f} {peak:>9.1f} {rows:>8}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
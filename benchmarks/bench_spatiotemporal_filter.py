@@ -0,0 +1,82 @@
+"""Compare the per-report spatiotemporal filter with `DogMatcher.filter_batch`.
+
+For each size it times three things over the same synthetic candidates:
+`_passes_spatiotemporal_filter` called per report (the previous behaviour),
+`filter_batch` on prebuilt columnar arrays (what a columnar source such as the
+repository can hand over), and `filter_batch` including the conversion from
+`StrayDogReport` objects, as `_eligible_reports` does.
+
+    python -m benchmarks.bench_spatiotemporal_filter
+    python -m benchmarks.bench_spatiotemporal_filter --sizes 10000 100000 --runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+import numpy as np
+
+from app.ai import DogMatcher, GeoLocation, LostDogNotice, MockGeminiClient, StrayDogReport
+
+
+LOST_AT = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+CENTER = GeoLocation(latitude=25.033, longitude=121.565)
+
+
+def _candidates(count: int) -> tuple[list[StrayDogReport], np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    latitudes = CENTER.latitude + rng.uniform(-0.5, 0.5, count)
+    longitudes = CENTER.longitude + rng.uniform(-0.5, 0.5, count)
+    offsets = rng.uniform(-240, 240, count)
+    epochs = LOST_AT.timestamp() + offsets * 3600
+    reports = [
+        StrayDogReport(
+            report_id=f"rep_{index}",
+            location=GeoLocation(latitude=float(latitudes[index]), longitude=float(longitudes[index])),
+            reported_at=LOST_AT + timedelta(hours=float(offsets[index])),
+        )
+        for index in range(count)
+    ]
+    return reports, latitudes, longitudes, epochs
+
+
+def _timed(runs: int, call: Callable[[], object]) -> list[float]:
+    timings: list[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    matcher = DogMatcher(client=MockGeminiClient(), max_distance_km=5.0, max_time_gap_hours=72)
+    notice = LostDogNotice(lost_at=LOST_AT, location=CENTER)
+    print(f"{'candidates':>10} {'loop ms':>10} {'batch ms':>10} {'batch+cols ms':>14} {'speedup':>8} {'passing':>8}")
+    for size in args.sizes:
+        reports, latitudes, longitudes, epochs = _candidates(size)
+
+        loop = _timed(args.runs, lambda: [matcher._passes_spatiotemporal_filter(notice, r) for r in reports])
+        batch = _timed(args.runs, lambda: matcher.filter_batch(notice, latitudes, longitudes, epochs))
+        with_columns = _timed(args.runs, lambda: matcher.filter_batch(notice, *matcher._report_columns(reports)))
+
+        passing = int(matcher.filter_batch(notice, latitudes, longitudes, epochs).mask.sum())
+        loop_ms = statistics.median(loop) * 1000
+        batch_ms = statistics.median(batch) * 1000
+        print(
+            f"{size:>10} {loop_ms:>10.1f} {batch_ms:>10.2f} {statistics.median(with_columns) * 1000:>14.1f}"
+            f" {loop_ms / batch_ms:>7.0f}x {passing:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
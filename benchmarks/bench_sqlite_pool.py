@@ -0,0 +1,133 @@
+"""Repository throughput with per-call connections vs the pooled WAL `SQLiteDatabase`.
+
+Each thread runs a mix of the repository calls the API makes: stray report
+upserts and match notifications (writes) and `find_candidates` searches
+(reads). The "per-call" variant reproduces the previous `connection()`: a new
+connection per transaction in the default rollback-journal mode, with implicit
+transactions, so concurrent writers can fail with "database is locked". Those
+failures are counted rather than retried.
+
+    python -m benchmarks.bench_sqlite_pool
+    python -m benchmarks.bench_sqlite_pool --threads 1 4 16 --ops 500 --write-ratio 0.3
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+from app.ai import GeoLocation, StrayDogReport
+from app.db.sqlite import SQLiteDatabase
+from app.repositories.ai_repositories import SQLiteMatchNotifier, SQLiteStrayReportRepository
+
+
+LOST_AT = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+CENTER = GeoLocation(latitude=25.033, longitude=121.565)
+
+
+class _PerCallDatabase(SQLiteDatabase):
+    """The previous behaviour: one fresh rollback-journal connection per transaction."""
+
+    @contextmanager
+    def connection(self, *, write: bool = False) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+def _report(rng: random.Random, index: int) -> StrayDogReport:
+    return StrayDogReport(
+        report_id=f"rep_{index}",
+        image_bytes=b"x" * 2048,
+        location=GeoLocation(
+            latitude=CENTER.latitude + rng.uniform(-0.2, 0.2),
+            longitude=CENTER.longitude + rng.uniform(-0.2, 0.2),
+        ),
+        reported_at=LOST_AT + timedelta(hours=rng.uniform(-120, 120)),
+    )
+
+
+def _run(db: SQLiteDatabase, *, threads: int, ops: int, write_ratio: float, seed_reports: int) -> tuple[float, int]:
+    db.initialize()
+    reports = SQLiteStrayReportRepository(db)
+    notifier = SQLiteMatchNotifier(db)
+    rng = random.Random(0)
+    for index in range(seed_reports):
+        reports.upsert_report(_report(rng, index))
+
+    errors = 0
+    lock = threading.Lock()
+    start = threading.Barrier(threads + 1)
+
+    def worker(worker_index: int) -> None:
+        nonlocal errors
+        local = random.Random(worker_index)
+        start.wait()
+        for op in range(ops):
+            try:
+                if local.random() < write_ratio:
+                    if op % 2:
+                        reports.upsert_report(_report(local, seed_reports + worker_index * ops + op))
+                    else:
+                        notifier.notify_possible_match(f"owner_{worker_index}", [f"rep_{op}"], 80.0)
+                else:
+                    reports.find_candidates(location=CENTER, radius_km=5.0, around=LOST_AT, max_gap_hours=72)
+            except sqlite3.OperationalError:
+                with lock:
+                    errors += 1
+
+    pool = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in pool:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    db.close()
+    return threads * ops / elapsed, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--ops", type=int, default=300, help="Repository calls per thread.")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--seed-reports", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'threads':>7} {'per-call ops/s':>15} {'errors':>7} {'pooled ops/s':>13} {'errors':>7} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for threads in args.threads:
+            options = {"threads": threads, "ops": args.ops, "write_ratio": args.write_ratio}
+            before, before_errors = _run(
+                _PerCallDatabase(str(Path(tmp) / f"per_call_{threads}.db")), seed_reports=args.seed_reports, **options
+            )
+            after, after_errors = _run(
+                SQLiteDatabase(str(Path(tmp) / f"pooled_{threads}.db"), pool_size=threads),
+                seed_reports=args.seed_reports,
+                **options,
+            )
+            print(
+                f"{threads:>7} {before:>15.0f} {before_errors:>7} {after:>13.0f} {after_errors:>7}"
+                f" {after / before:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Compare the Files API upload path with inline keyframe sampling for video analysis.
+
+Offline (default) it times only the local work each mode does before the model
+call: trimming/re-encoding the clip versus sampling and JPEG-encoding keyframes,
+and reports the payload size each mode sends. With `--live` it runs
+`VideoAnalyzer.analyze_video` end to end against Gemini in both modes, which
+includes upload, ACTIVE polling and generation for the upload path.
+
+    python -m benchmarks.bench_video_modes
+    python -m benchmarks.bench_video_modes --video clip.mp4 --runs 3 --live
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import cv2
+import numpy as np
+
+from app.ai import GeminiClient, KeyframeSampler, VideoAnalyzer
+from app.core.settings import get_settings
+
+
+def _synthetic_clip(path: Path, *, seconds: int = 20, fps: float = 30.0) -> Path:
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (640, 480))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 80, size=(480, 640, 3), dtype=np.uint8)
+    for index in range(int(seconds * fps)):
+        frame = background.copy()
+        x = int(300 + 250 * np.sin(index / fps))
+        cv2.circle(frame, (x, 240), 60, (200, 180, 160), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def _timed(runs: int, call: Callable[[], object]) -> tuple[list[float], object]:
+    timings: list[float] = []
+    result: object = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = call()
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def _report(label: str, timings: list[float], payload_bytes: int | None = None) -> None:
+    line = f"{label:<28} mean {statistics.mean(timings) * 1000:9.1f} ms   min {min(timings) * 1000:9.1f} ms"
+    if payload_bytes is not None:
+        line += f"   payload {payload_bytes / 1024:9.1f} KiB"
+    print(line)
+
+
+def run_offline(video: Path, args: argparse.Namespace) -> None:
+    client = GeminiClient(api_key="offline-benchmark", image_model="unused", video_model="unused")
+    sampler = KeyframeSampler(count=args.keyframes)
+
+    def trim() -> Path:
+        return client._trim_video(video, args.seconds)
+
+    timings, clip = _timed(args.runs, trim)
+    assert isinstance(clip, Path)
+    _report("upload: trim + re-encode", timings, clip.stat().st_size)
+    clip.unlink(missing_ok=True)
+
+    for strategy in ("uniform", "motion"):
+        timings, frames = _timed(
+            args.runs,
+            lambda: sampler.sample(video, max_seconds=args.seconds, strategy=strategy),
+        )
+        _report(f"keyframes: {strategy}", timings, sum(len(frame.data) for frame in frames))
+    print("(upload mode additionally waits for the Files API upload and ACTIVE polling; use --live)")
+
+
+def run_live(video: Path, args: argparse.Namespace) -> None:
+    settings = get_settings()
+    if not settings.gemini_api_key:
+        raise SystemExit("--live needs GEMINI_API_KEY.")
+    client = GeminiClient(
+        api_key=settings.gemini_api_key,
+        image_model=settings.gemini_image_model,
+        video_model=settings.gemini_video_model,
+    )
+    analyzer = VideoAnalyzer(client, keyframe_sampler=KeyframeSampler(count=args.keyframes))
+    for mode, strategy in (("upload", None), ("keyframes", "uniform"), ("keyframes", "motion")):
+        timings, result = _timed(
+            args.runs,
+            lambda: analyzer.analyze_video(
+                str(video),
+                preprocess_seconds=args.seconds,
+                mode=mode,
+                keyframe_strategy=strategy,
+            ),
+        )
+        _report(f"{mode}" + (f": {strategy}" if strategy else ""), timings)
+        print(f"    last result: {result}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", type=Path, help="Clip to analyze (default: a synthetic 20s 640x480 clip).")
+    parser.add_argument("--seconds", type=int, default=10, help="preprocess_seconds window.")
+    parser.add_argument("--keyframes", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--live", action="store_true", help="Call Gemini end to end in both modes.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        video = args.video or _synthetic_clip(Path(workdir) / "synthetic.mp4")
+        if args.live:
+            run_live(video, args)
+        else:
+            run_offline(video, args)
+
+
+if __name__ == "__main__":
+    main()
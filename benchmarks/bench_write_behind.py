@@ -0,0 +1,122 @@
+"""Bulk ingest throughput with one transaction per write vs group commit.
+
+Upserts `--reports` stray reports (and one match notification per report)
+three ways against fresh databases: inline, where every call is its own
+transaction; through `GroupCommitWriter` with `wait=False` and a final
+`flush()`, as a bulk importer would; and through the writer from `--threads`
+threads that each wait for durability (`wait=True`), as concurrent API
+requests do.
+
+    python -m benchmarks.bench_write_behind
+    python -m benchmarks.bench_write_behind --reports 20000 --batch-size 512 --synchronous FULL
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from app.ai import GeoLocation, StrayDogReport
+from app.db.sqlite import SQLiteDatabase
+from app.db.write_behind import GroupCommitWriter
+from app.repositories.ai_repositories import SQLiteMatchNotifier, SQLiteStrayReportRepository
+
+
+CENTER = GeoLocation(latitude=25.033, longitude=121.565)
+
+
+def _report(index: int) -> StrayDogReport:
+    return StrayDogReport(report_id=f"rep_{index}", image_bytes=b"x" * 2048, location=CENTER)
+
+
+class _BenchDatabase(SQLiteDatabase):
+    """Pooled database whose connections use the benchmark's `synchronous` level (the app uses NORMAL)."""
+
+    def __init__(self, db_path: str, synchronous: str, **options: int) -> None:
+        super().__init__(db_path, **options)
+        self.synchronous = synchronous
+
+    def _open(self) -> sqlite3.Connection:
+        conn = super()._open()
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        return conn
+
+
+def _database(path: Path, args: argparse.Namespace, *, write_behind: bool) -> SQLiteDatabase:
+    db = _BenchDatabase(str(path), args.synchronous, pool_size=args.threads + 1)
+    db.initialize()
+    if write_behind:
+        db.write_behind = GroupCommitWriter(
+            db,
+            max_batch_size=args.batch_size,
+            flush_interval_seconds=args.flush_ms / 1000,
+        )
+    return db
+
+
+def _timed(db: SQLiteDatabase, ingest: Callable[[SQLiteStrayReportRepository, SQLiteMatchNotifier], None]) -> float:
+    reports = SQLiteStrayReportRepository(db)
+    notifier = SQLiteMatchNotifier(db)
+    started = time.perf_counter()
+    ingest(reports, notifier)
+    db.flush()
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--flush-ms", type=float, default=0.0)
+    parser.add_argument("--synchronous", choices=["OFF", "NORMAL", "FULL"], default="NORMAL")
+    args = parser.parse_args()
+    writes = args.reports * 2
+
+    def serial(wait: bool) -> Callable[[SQLiteStrayReportRepository, SQLiteMatchNotifier], None]:
+        def ingest(reports: SQLiteStrayReportRepository, notifier: SQLiteMatchNotifier) -> None:
+            for index in range(args.reports):
+                reports.upsert_report(_report(index), wait=wait)
+                notifier.notify_possible_match("owner_001", [f"rep_{index}"], 80.0, wait=wait)
+
+        return ingest
+
+    def threaded(reports: SQLiteStrayReportRepository, notifier: SQLiteMatchNotifier) -> None:
+        def worker(offset: int) -> None:
+            for index in range(offset, args.reports, args.threads):
+                reports.upsert_report(_report(index))
+                notifier.notify_possible_match("owner_001", [f"rep_{index}"], 80.0)
+
+        pool = [threading.Thread(target=worker, args=(offset,)) for offset in range(args.threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [
+            ("inline, one commit per write", _database(Path(tmp) / "inline.db", args, write_behind=False), serial(True)),
+            ("group commit, wait=False", _database(Path(tmp) / "queued.db", args, write_behind=True), serial(False)),
+            (
+                f"group commit, {args.threads} threads waiting",
+                _database(Path(tmp) / "threads.db", args, write_behind=True),
+                threaded,
+            ),
+        ]
+        print(f"{'mode':<32} {'seconds':>8} {'writes/s':>10} {'commits':>8}")
+        for label, db, ingest in runs:
+            writer = db.write_behind
+            seconds = _timed(db, ingest)
+            commits = writer.stats()["batches"] if writer is not None else writes
+            print(f"{label:<32} {seconds:>8.2f} {writes / seconds:>10.0f} {commits:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import {
   MatchLostDogPayload,
   MatchLostDogResult,
   MatchNotification,
+  MatchStreamEvent,
   PhotoAnalysisResult,
   StrayReportPayload,
   VideoAnalysisResult,
@@ -55,6 +56,34 @@ export const aiService = {
   matchLostDog: (payload: MatchLostDogPayload) =>
     client.post<MatchLostDogResult>('/ai/match-lost-dog', payload),
 
+  // Calls onEvent for each candidate score as it arrives, then once with the summary.
+  streamMatchLostDog: async (payload: MatchLostDogPayload, onEvent: (event: MatchStreamEvent) => void) => {
+    const token = localStorage.getItem('token');
+    const response = await fetch(`${client.defaults.baseURL}/ai/match-lost-dog/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Accept: 'application/x-ndjson',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify(payload),
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Match stream failed with status ${response.status}`);
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      buffered += decoder.decode(value, { stream: !done });
+      const lines = buffered.split('\n');
+      buffered = lines.pop() ?? '';
+      lines.filter((line) => line.trim()).forEach((line) => onEvent(JSON.parse(line) as MatchStreamEvent));
+      if (done) break;
+    }
+  },
+
   listMatchNotifications: () =>
     client.get<MatchNotification[]>('/ai/notifications'),
 };
@@ -49,6 +49,20 @@ export interface MatchLostDogResult {
   candidate_count: number;
 }
 
+export interface MatchCandidateEvent {
+  report_id: string;
+  similarity_score?: number;
+  is_match?: boolean;
+  cached?: boolean;
+  error?: string;
+}
+
+export type MatchStreamEvent =
+  | { event: 'start'; data: { eligible_count: number } }
+  | { event: 'candidate'; data: MatchCandidateEvent }
+  | { event: 'summary'; data: MatchLostDogResult }
+  | { event: 'error'; data: { detail: string } };
+
 export interface MatchNotification {
   id: number;
   owner_id: string;
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import base64
+import json
 
 import pytest
 from fastapi.testclient import TestClient
@@ -117,3 +118,66 @@ def test_match_and_notification_chain(client: TestClient) -> None:
     assert rows
     assert set(rows[0].keys()) == {"id", "owner_id", "matched_report_ids", "similarity_score", "created_at"}
     assert rows[0]["owner_id"] == "owner_001"
+
+
+def test_streamed_match_emits_candidates_then_summary(client: TestClient) -> None:
+    for report_id, payload in (("rep_001", b"same-dog"), ("rep_002", b"other-dog")):
+        client.post("/api/ai/stray-reports", json={"report_id": report_id, "image_base64": _b64(payload)})
+    body = {"notice_image_base64": _b64(b"same-dog"), "use_db_reports": True}
+
+    response = client.post("/api/ai/match-lost-dog/stream", json=body)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["event"] for event in events] == ["start", "candidate", "candidate", "summary"]
+    assert events[0]["data"] == {"eligible_count": 2}
+    assert {event["data"]["report_id"] for event in events[1:3]} == {"rep_001", "rep_002"}
+    # The repeat request is answered from the comparison cache.
+    summary = client.post("/api/ai/match-lost-dog", json=body).json()["data"]
+    assert events[-1]["data"]["matched_report_ids"] == summary["matched_report_ids"]
+    assert set(events[-1]["data"]) == set(summary) - {"cached_report_ids"}
+
+    sse = client.post("/api/ai/match-lost-dog/stream", json=body, headers={"Accept": "text/event-stream"})
+    assert sse.headers["content-type"].startswith("text/event-stream")
+    frames = [frame for frame in sse.text.split("\n\n") if frame]
+    assert frames[-1].startswith("event: summary\ndata: ")
+    assert json.loads(frames[-1].split("data: ", 1)[1])["candidate_count"] == 2
+
+    missing = client.post(
+        "/api/ai/match-lost-dog/stream",
+        json={"notice_image_path": "/nonexistent/notice.jpg", "use_db_reports": True},
+    )
+    assert missing.status_code == 400
+
+
+def test_stray_report_listing_and_image(client: TestClient) -> None:
+    client.post(
+        "/api/ai/stray-reports",
+        json={
+            "report_id": "rep_001",
+            "image_base64": _b64(b"same-dog"),
+            "reported_at": "2026-03-01T12:00:00+00:00",
+            "location": {"latitude": 25.033, "longitude": 121.565},
+        },
+    )
+    client.post("/api/ai/stray-reports", json={"report_id": "rep_002", "image_path": "missing.jpg"})
+
+    listing = client.get("/api/ai/stray-reports")
+    assert listing.status_code == 200
+    body = listing.json()
+    assert set(body.keys()) == {"code", "message", "data"}
+    reports = {row["report_id"]: row for row in body["data"]}
+    assert reports["rep_001"] == {
+        "report_id": "rep_001",
+        "image_path": None,
+        "has_image_base64": True,
+        "reported_at": "2026-03-01T12:00:00+00:00",
+        "location": {"latitude": 25.033, "longitude": 121.565},
+    }
+    assert reports["rep_002"]["has_image_base64"] is False
+    assert reports["rep_002"]["location"] is None
+
+    image = client.get("/api/ai/stray-reports/rep_001/image")
+    assert image.status_code == 200
+    assert image.content == b"same-dog"
+    assert client.get("/api/ai/stray-reports/rep_002/image").status_code == 404
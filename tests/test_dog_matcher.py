@@ -0,0 +1,519 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional, Sequence
+
+import pytest
+
+from app.ai import (
+    AsyncDogMatcher,
+    AsyncMockGeminiClient,
+    AttributePruner,
+    ComparisonCache,
+    DogAttributes,
+    DogMatcher,
+    GeoLocation,
+    LostDogNotice,
+    MatchBudget,
+    MatchCascade,
+    MockGeminiClient,
+    StrayDogReport,
+)
+from app.ai.comparison_cache import prompt_version
+from app.db.sqlite import SQLiteDatabase
+
+
+def _b64(payload: bytes) -> str:
+    return base64.b64encode(payload).decode("utf-8")
+
+
+class _SlowMockClient(MockGeminiClient):
+    """Mock client that sleeps per call and can fail for selected report images."""
+
+    def __init__(self, delay_seconds: float = 0.0, failing_payloads: Sequence[bytes] = ()) -> None:
+        super().__init__()
+        self.delay_seconds = delay_seconds
+        self.failing_payloads = set(failing_payloads)
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def generate_json(self, prompt: str, *, parts: Optional[Sequence[Any]] = None, **kwargs: Any) -> dict[str, Any]:
+        with self._lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            time.sleep(self.delay_seconds)
+            if parts and self._extract_bytes(parts[-1]) in self.failing_payloads:
+                raise RuntimeError("upstream unavailable")
+            return super().generate_json(prompt, parts=parts, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _reports(count: int) -> list[StrayDogReport]:
+    reports = [
+        StrayDogReport(report_id=f"rep_{index:03d}", image_base64=_b64(f"dog-{index}".encode()))
+        for index in range(count)
+    ]
+    reports.append(StrayDogReport(report_id="rep_same", image_base64=_b64(b"same-dog")))
+    return reports
+
+
+def test_concurrent_matching_matches_sequential_output() -> None:
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    reports = _reports(12)
+
+    sequential = DogMatcher(client=MockGeminiClient()).match_lost_dog(notice=notice, candidate_reports=reports)
+    client = _SlowMockClient(delay_seconds=0.02)
+    concurrent = DogMatcher(client=client, max_concurrency=4).match_lost_dog(notice=notice, candidate_reports=reports)
+
+    assert concurrent == sequential
+    assert "rep_same" in concurrent["matched_report_ids"]
+    assert 1 < client.peak_active <= 4
+
+
+def test_candidate_errors_do_not_fail_the_search() -> None:
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    client = _SlowMockClient(failing_payloads=[b"dog-1"])
+
+    result = DogMatcher(client=client, max_concurrency=3).match_lost_dog(notice=notice, candidate_reports=_reports(3))
+
+    assert result["failed_report_ids"] == ["rep_001"]
+    assert "rep_same" in result["matched_report_ids"]
+
+
+def test_search_fails_when_every_candidate_fails() -> None:
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    client = _SlowMockClient(failing_payloads=[b"dog-0"])
+    reports = [StrayDogReport(report_id="rep_000", image_base64=_b64(b"dog-0"))]
+
+    with pytest.raises(RuntimeError):
+        DogMatcher(client=client, max_concurrency=2).match_lost_dog(notice=notice, candidate_reports=reports)
+
+
+def test_async_matcher_matches_sync_output() -> None:
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    reports = _reports(8)
+
+    expected = DogMatcher(client=MockGeminiClient()).match_lost_dog(notice=notice, candidate_reports=reports)
+    matcher = AsyncDogMatcher(client=AsyncMockGeminiClient(), max_concurrency=4)
+    result = asyncio.run(matcher.match_lost_dog(notice=notice, candidate_reports=reports))
+
+    assert result == expected
+
+
+def test_embedding_prefilter_sends_only_the_closest_reports() -> None:
+    cv2 = pytest.importorskip("cv2")
+    np = pytest.importorskip("numpy")
+
+    def photo(color: tuple[int, int, int], offset: int = 0) -> bytes:
+        image = np.full((120, 160, 3), 60, dtype=np.uint8)
+        cv2.circle(image, (80 + offset, 60), 40, color, -1)
+        return cv2.imencode(".png", image)[1].tobytes()
+
+    notice = LostDogNotice(image_bytes=photo((30, 90, 220)))
+    reports = [
+        StrayDogReport(report_id="rep_blue", image_bytes=photo((220, 60, 30))),
+        StrayDogReport(report_id="rep_close", image_bytes=photo((30, 90, 220), offset=10)),
+        StrayDogReport(report_id="rep_green", image_bytes=photo((40, 200, 40))),
+        StrayDogReport(report_id="rep_unreadable", image_bytes=b"not-an-image"),
+    ]
+    client = _SlowMockClient()
+    calls: list[bytes] = []
+    original = client.generate_json
+
+    def recording(prompt: str, *, parts: Optional[Sequence[Any]] = None, **kwargs: Any) -> dict[str, Any]:
+        calls.append(client._extract_bytes(parts[-1]))
+        return original(prompt, parts=parts, **kwargs)
+
+    client.generate_json = recording  # type: ignore[method-assign]
+    result = DogMatcher(client=client, prefilter_top_k=1).match_lost_dog(notice=notice, candidate_reports=reports)
+
+    assert calls == [photo((30, 90, 220), offset=10)]
+    # Unreadable images are never floored out, but rank after every embedded report.
+    assert result["pruned_report_ids"] == ["rep_blue", "rep_green", "rep_unreadable"]
+
+
+def test_batch_filter_matches_per_report_filter() -> None:
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(3)
+    lost_at = datetime(2026, 3, 1, 12, 0)
+    notice = LostDogNotice(lost_at=lost_at, location=GeoLocation(latitude=25.03, longitude=121.56))
+    reports = [
+        StrayDogReport(
+            report_id=f"rep_{index:03d}",
+            location=(
+                None
+                if index % 9 == 0
+                else GeoLocation(latitude=25.03 + rng.uniform(-0.1, 0.1), longitude=121.56 + rng.uniform(-0.1, 0.1))
+            ),
+            reported_at=None if index % 11 == 0 else lost_at + timedelta(hours=float(rng.uniform(-120, 120))),
+        )
+        for index in range(200)
+    ]
+    matcher = DogMatcher(client=MockGeminiClient())
+
+    batch = matcher.filter_batch(notice, *matcher._report_columns(reports))
+
+    expected = [matcher._passes_spatiotemporal_filter(notice, report) for report in reports]
+    assert batch.mask.tolist() == expected
+    assert 0 < sum(expected) < len(reports)
+
+    nearest = DogMatcher(client=MockGeminiClient(), candidate_order="nearest")._eligible_reports(notice, reports)
+    distances = [
+        matcher._haversine_km(25.03, 121.56, report.location.latitude, report.location.longitude)
+        for report in nearest
+        if report.location
+    ]
+    assert distances == sorted(distances)
+    assert all(report.location is None for report in nearest[len(distances) :])
+
+
+def test_comparison_cache_skips_known_pairs(tmp_path) -> None:
+    db = SQLiteDatabase(str(tmp_path / "comparisons.db"))
+    db.initialize()
+    cache = ComparisonCache(db)
+    client = _SlowMockClient()
+    calls: list[bytes] = []
+    original = client.generate_json
+
+    def recording(prompt: str, *, parts: Optional[Sequence[Any]] = None, **kwargs: Any) -> dict[str, Any]:
+        calls.append(client._extract_bytes(parts[-1]))
+        return original(prompt, parts=parts, **kwargs)
+
+    client.generate_json = recording  # type: ignore[method-assign]
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    matcher = DogMatcher(client=client, comparison_cache=cache)
+
+    first = matcher.match_lost_dog(notice=notice, candidate_reports=_reports(2))
+    second = matcher.match_lost_dog(notice=notice, candidate_reports=_reports(3))
+
+    assert len(calls) == 4
+    assert calls[-1] == b"dog-2"
+    assert second["matched_report_ids"] == first["matched_report_ids"]
+    assert second["similarity_score"] == first["similarity_score"]
+    assert second["cached_report_ids"] == ["rep_000", "rep_001", "rep_same"]
+    assert "cached_report_ids" not in first
+
+    prompt_path = tmp_path / "prompt.txt"
+    prompt_path.write_text(matcher.prompt_path.read_text(encoding="utf-8") + "\nBe strict.", encoding="utf-8")
+    edited = DogMatcher(client=client, comparison_cache=cache, prompt_path=prompt_path)
+    assert "cached_report_ids" not in edited.match_lost_dog(notice=notice, candidate_reports=_reports(0))
+    assert cache.purge_stale(prompt_version=prompt_version(prompt_path.read_text(encoding="utf-8")), model="mock-image") == 4
+
+
+def test_budget_stops_early_and_reports_skipped_reports() -> None:
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    reports = _reports(5)
+
+    limited = DogMatcher(client=_SlowMockClient(), max_concurrency=2).match_lost_dog(
+        notice=notice,
+        candidate_reports=reports,
+        budget=MatchBudget(max_model_calls=3),
+    )
+    assert limited["scored_report_ids"] == ["rep_000", "rep_001", "rep_002"]
+    assert limited["skipped_report_ids"] == ["rep_003", "rep_004", "rep_same"]
+    assert limited["stop_reason"] == "max_model_calls"
+
+    started = time.perf_counter()
+    timed = DogMatcher(client=_SlowMockClient(delay_seconds=0.2), max_concurrency=2).match_lost_dog(
+        notice=notice,
+        candidate_reports=reports,
+        budget=MatchBudget(deadline_seconds=0.3),
+    )
+    assert time.perf_counter() - started < 0.4
+    assert timed["stop_reason"] == "deadline"
+    assert timed["scored_report_ids"] == ["rep_000", "rep_001"]
+    assert timed["skipped_report_ids"] == ["rep_002", "rep_003", "rep_004", "rep_same"]
+
+    resumed = DogMatcher(client=_SlowMockClient()).match_lost_dog(
+        notice=notice,
+        candidate_reports=[report for report in reports if report.report_id in timed["skipped_report_ids"]],
+        budget=MatchBudget(max_matches=1),
+    )
+    assert "rep_same" in resumed["matched_report_ids"]
+    assert resumed["skipped_report_ids"] == []
+
+
+def test_abandoned_comparisons_make_no_further_calls() -> None:
+    client = _SlowMockClient(delay_seconds=0.2)
+    tiers: list[str] = []
+    original = client.generate_json
+
+    def recording(prompt: str, *, parts: Optional[Sequence[Any]] = None, **kwargs: Any) -> dict[str, Any]:
+        tiers.append(kwargs["model"])
+        return original(prompt, parts=parts, **kwargs)
+
+    client.generate_json = recording  # type: ignore[method-assign]
+    # A band of 100 escalates every screened candidate, so each one needs two calls.
+    matcher = DogMatcher(client=client, cascade=MatchCascade(band=100.0))
+
+    result = matcher.match_lost_dog(
+        notice=LostDogNotice(image_base64=_b64(b"same-dog")),
+        candidate_reports=_reports(2),
+        budget=MatchBudget(deadline_seconds=0.1),
+    )
+    time.sleep(0.3)
+
+    assert result["stop_reason"] == "deadline"
+    assert tiers == ["fast"]
+
+
+
+def test_model_call_budget_reserves_escalations_and_batches() -> None:
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    # A band of 100 escalates every screened candidate, so each one needs two calls.
+    for options, max_calls, expected_calls in (
+        ({}, 3, 2),
+        ({"batch_size": 2}, 5, 3),
+    ):
+        client = _SlowMockClient()
+        calls: list[str] = []
+        original = client.generate_json
+
+        def recording(prompt: str, *, parts: Optional[Sequence[Any]] = None, **kwargs: Any) -> dict[str, Any]:
+            calls.append(kwargs["model"])
+            return original(prompt, parts=parts, **kwargs)
+
+        client.generate_json = recording  # type: ignore[method-assign]
+        matcher = DogMatcher(client=client, cascade=MatchCascade(band=100.0), max_concurrency=2, **options)
+
+        result = matcher.match_lost_dog(
+            notice=notice,
+            candidate_reports=_reports(4),
+            budget=MatchBudget(max_model_calls=max_calls),
+        )
+
+        assert len(calls) == expected_calls <= max_calls
+        assert result["stop_reason"] == "max_model_calls"
+        assert result["skipped_report_ids"]
+
+        async_result = asyncio.run(
+            AsyncDogMatcher(
+                client=AsyncMockGeminiClient(),
+                cascade=MatchCascade(band=100.0),
+                max_concurrency=2,
+                **options,
+            ).match_lost_dog(
+                notice=notice,
+                candidate_reports=_reports(4),
+                budget=MatchBudget(max_model_calls=max_calls),
+            )
+        )
+        assert async_result["scored_report_ids"] == result["scored_report_ids"]
+
+def test_async_budget_stops_at_max_matches() -> None:
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    reports = list(reversed(_reports(3)))
+
+    result = asyncio.run(
+        AsyncDogMatcher(client=AsyncMockGeminiClient()).match_lost_dog(
+            notice=notice,
+            candidate_reports=reports,
+            budget=MatchBudget(max_matches=1),
+        )
+    )
+
+    assert result["matched_report_ids"] == ["rep_same"]
+    assert result["scored_report_ids"] == ["rep_same"]
+    assert result["stop_reason"] == "max_matches"
+    assert result["skipped_report_ids"] == ["rep_002", "rep_001", "rep_000"]
+
+
+def test_recent_order_scores_latest_reports_first() -> None:
+    lost_at = datetime(2026, 3, 1, 12, 0)
+    reports = [
+        StrayDogReport(report_id="rep_old", reported_at=lost_at - timedelta(hours=30)),
+        StrayDogReport(report_id="rep_undated"),
+        StrayDogReport(report_id="rep_new", reported_at=lost_at + timedelta(hours=2)),
+    ]
+
+    ordered = DogMatcher(client=MockGeminiClient(), candidate_order="recent")._eligible_reports(
+        LostDogNotice(lost_at=lost_at),
+        reports,
+    )
+
+    assert [report.report_id for report in ordered] == ["rep_new", "rep_old", "rep_undated"]
+
+
+def test_attribute_pruner_skips_clearly_incompatible_reports() -> None:
+    notice_tags = DogAttributes.from_analysis(
+        {"size": "small", "age_group": "puppy", "appearance_tags": ["long_coat", "white", "cream_patches"]}
+    )
+    assert notice_tags == DogAttributes(size="small", age_group="puppy", colors=("white",))
+    reports = [
+        StrayDogReport(
+            report_id="rep_large",
+            image_base64=_b64(b"dog-1"),
+            attributes=DogAttributes(size="large", age_group="puppy", colors=("white",)),
+        ),
+        StrayDogReport(
+            report_id="rep_senior",
+            image_base64=_b64(b"dog-2"),
+            attributes=DogAttributes(size="medium", age_group="senior", colors=("white",)),
+        ),
+        StrayDogReport(
+            report_id="rep_black",
+            image_base64=_b64(b"dog-3"),
+            attributes=DogAttributes.from_analysis({"size": "small", "appearance_tags": ["black_tan"]}),
+        ),
+        StrayDogReport(
+            report_id="rep_close",
+            image_base64=_b64(b"same-dog"),
+            attributes=DogAttributes(size="medium", age_group="adult", colors=("grey", "white")),
+        ),
+        StrayDogReport(report_id="rep_untagged", image_base64=_b64(b"dog-4")),
+    ]
+    client = _SlowMockClient()
+    calls: list[bytes] = []
+    original = client.generate_json
+
+    def recording(prompt: str, *, parts: Optional[Sequence[Any]] = None, **kwargs: Any) -> dict[str, Any]:
+        calls.append(client._extract_bytes(parts[-1]))
+        return original(prompt, parts=parts, **kwargs)
+
+    client.generate_json = recording  # type: ignore[method-assign]
+    pruner = AttributePruner()
+    result = DogMatcher(client=client, attribute_pruner=pruner).match_lost_dog(
+        notice=LostDogNotice(image_base64=_b64(b"same-dog"), attributes=notice_tags),
+        candidate_reports=reports,
+    )
+
+    assert calls == [b"same-dog", b"dog-4"]
+    assert result["matched_report_ids"] == ["rep_close"]
+    assert result["pruned_report_ids"] == ["rep_large", "rep_senior", "rep_black"]
+    # The untagged report is never checked, so never pruned.
+    assert pruner.stats() == {
+        "checked": 4,
+        "pruned": 3,
+        "pruned_by_rule": {"size": 1, "age_group": 1, "coat_color": 1},
+    }
+    with pytest.raises(ValueError):
+        AttributePruner(["size", "tail_length"])
+
+
+def test_cascade_escalates_only_scores_near_the_threshold() -> None:
+    client = _SlowMockClient()
+    calls: list[tuple[str, int]] = []
+    original = client.generate_json
+
+    def recording(prompt: str, *, parts: Optional[Sequence[Any]] = None, **kwargs: Any) -> dict[str, Any]:
+        calls.append((kwargs["model"], kwargs["max_output_tokens"]))
+        return original(prompt, parts=parts, **kwargs)
+
+    client.generate_json = recording  # type: ignore[method-assign]
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    reports = _reports(12)
+    baseline = DogMatcher(client=MockGeminiClient()).match_lost_dog(notice=notice, candidate_reports=reports)
+    cascade = MatchCascade(band=10.0)
+
+    result = DogMatcher(client=client, cascade=cascade).match_lost_dog(notice=notice, candidate_reports=reports)
+
+    screen_calls = [call for call in calls if call[0] == "fast"]
+    strong_calls = [call for call in calls if call[0] == "strong"]
+    assert len(screen_calls) == len(reports)
+    assert all(tokens == cascade.screen_max_output_tokens for _, tokens in screen_calls)
+    assert 0 < len(strong_calls) < len(reports)
+    assert len(result["escalated_report_ids"]) == len(strong_calls)
+    # The mock scores both tiers alike, so the cascade reaches the same verdict with fewer strong calls.
+    assert result["matched_report_ids"] == baseline["matched_report_ids"]
+    stats = cascade.stats()
+    assert stats["screened"] == len(reports)
+    assert stats["escalated"] == len(strong_calls)
+    assert stats["tiers"]["fast"]["calls"] == len(reports)
+    assert stats["tiers"]["strong"]["calls"] == len(strong_calls)
+
+
+def test_batched_comparison_packs_candidates_into_one_call() -> None:
+    client = _SlowMockClient()
+    calls: list[int] = []
+    original = client.generate_json
+
+    def recording(prompt: str, *, parts: Optional[Sequence[Any]] = None, **kwargs: Any) -> dict[str, Any]:
+        calls.append(len(parts or []) - 1)
+        return original(prompt, parts=parts, **kwargs)
+
+    client.generate_json = recording  # type: ignore[method-assign]
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    reports = _reports(11)
+    expected = DogMatcher(client=MockGeminiClient()).match_lost_dog(notice=notice, candidate_reports=reports)
+
+    result = DogMatcher(client=client, batch_size=4, batch_ambiguity_band=5.0).match_lost_dog(
+        notice=notice,
+        candidate_reports=reports,
+    )
+
+    # Three batches of up to four candidates, plus one pairwise call per ambiguous score.
+    assert [call for call in calls if call > 1] == [4, 4, 4]
+    pairwise = [call for call in calls if call == 1]
+    assert len(result["batched_report_ids"]) + len(pairwise) == len(reports)
+    assert result["matched_report_ids"] == expected["matched_report_ids"]
+    assert result["similarity_score"] == expected["similarity_score"]
+
+    async_result = asyncio.run(
+        AsyncDogMatcher(client=AsyncMockGeminiClient(), batch_size=4, max_concurrency=2).match_lost_dog(
+            notice=notice,
+            candidate_reports=reports,
+        )
+    )
+    assert async_result == result
+
+
+def test_cascade_escalates_ambiguous_batch_entries_without_rescreening() -> None:
+    client = _SlowMockClient()
+    calls: list[tuple[str, int]] = []
+    original = client.generate_json
+
+    def recording(prompt: str, *, parts: Optional[Sequence[Any]] = None, **kwargs: Any) -> dict[str, Any]:
+        calls.append((kwargs["model"], len(parts or []) - 1))
+        return original(prompt, parts=parts, **kwargs)
+
+    client.generate_json = recording  # type: ignore[method-assign]
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    reports = _reports(11)
+    cascade = MatchCascade(band=10.0)
+
+    result = DogMatcher(client=client, cascade=cascade, batch_size=4).match_lost_dog(
+        notice=notice,
+        candidate_reports=reports,
+    )
+
+    # The batches are the screening calls; ambiguous entries only add a strong call.
+    assert [call for call in calls if call[0] == "fast"] == [("fast", 4)] * 3
+    strong_calls = [call for call in calls if call[0] == "strong"]
+    assert strong_calls and all(count == 1 for _, count in strong_calls)
+    assert len(result["escalated_report_ids"]) == len(strong_calls)
+    assert cascade.stats()["screened"] == len(reports)
+
+    async_result = asyncio.run(
+        AsyncDogMatcher(client=AsyncMockGeminiClient(), cascade=MatchCascade(band=10.0), batch_size=4).match_lost_dog(
+            notice=notice,
+            candidate_reports=reports,
+        )
+    )
+    assert async_result == result
+
+
+def test_unusable_batch_response_falls_back_to_pairwise() -> None:
+    class _BrokenBatchClient(MockGeminiClient):
+        def _generate(self, prompt: str, parts: Sequence[Any]) -> dict[str, Any]:
+            if '"results"' in prompt:
+                return {"results": [{"index": 1, "similarity_score": "high"}, {"index": 7, "similarity_score": 90}]}
+            return super()._generate(prompt, parts)
+
+    notice = LostDogNotice(image_base64=_b64(b"same-dog"))
+    reports = _reports(3)
+    expected = DogMatcher(client=MockGeminiClient()).match_lost_dog(notice=notice, candidate_reports=reports)
+
+    result = DogMatcher(client=_BrokenBatchClient(), batch_size=4).match_lost_dog(
+        notice=notice,
+        candidate_reports=reports,
+    )
+
+    assert result == expected
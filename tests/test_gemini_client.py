@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+from typing import Any, Sequence
+
+import pytest
+
+from app.ai import (
+    AsyncGeminiClient,
+    GeminiClient,
+    QuotaRateLimiter,
+    ResponseCache,
+    RetryPolicy,
+    UploadedFileRegistry,
+)
+from app.ai.gemini_client import _GeminiClientBase, _GenAIV2Backend
+from app.db.sqlite import SQLiteDatabase
+
+
+def _database(tmp_path) -> SQLiteDatabase:
+    db = SQLiteDatabase(str(tmp_path / "registry.db"))
+    db.initialize()
+    return db
+
+
+class _FakeResponse:
+    def __init__(self, payload: dict[str, Any]) -> None:
+        self.text = json.dumps(payload)
+
+
+class _FakeBackend:
+    """Stands in for _GenAIV2Backend; records every upstream call."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.failures: list[Exception] = []
+        self.files: dict[str, Any] = {}
+        self.uploads = 0
+
+    def generation_config(self, *, temperature: float, max_output_tokens: int) -> Any:
+        return {"temperature": temperature, "max_output_tokens": max_output_tokens}
+
+    def build_inline_part(self, *, mime_type: str, data: bytes) -> Any:
+        return {"mime_type": mime_type, "data": data}
+
+    def generate_content(self, *, model_name: str, contents: Sequence[Any], generation_config: Any) -> Any:
+        self.calls.append(model_name)
+        if self.failures:
+            raise self.failures.pop(0)
+        return _FakeResponse({"model": model_name, "call": len(self.calls)})
+
+    async def generate_content_async(self, *, model_name: str, contents: Sequence[Any], generation_config: Any) -> Any:
+        await asyncio.sleep(0)
+        return self.generate_content(model_name=model_name, contents=contents, generation_config=generation_config)
+
+    def upload_file(self, *, path: str, mime_type: str) -> Any:
+        self.uploads += 1
+        name = f"files/upload-{self.uploads}"
+        self.files[name] = SimpleNamespace(name=name, uri=f"https://files/{name}", mime_type=mime_type, state="ACTIVE")
+        return self.files[name]
+
+    def get_file(self, *, name: str) -> Any:
+        if name not in self.files:
+            raise LookupError(f"404 NOT_FOUND: {name}")
+        return self.files[name]
+
+    def delete_file(self, *, name: str) -> None:
+        self.files.pop(name, None)
+
+    file_state_name = staticmethod(_GenAIV2Backend.file_state_name)
+
+
+@pytest.fixture()
+def backend(monkeypatch: pytest.MonkeyPatch) -> _FakeBackend:
+    fake = _FakeBackend()
+    monkeypatch.setattr(_GeminiClientBase, "_init_backend", staticmethod(lambda api_key: fake))
+    return fake
+
+
+def test_generate_json_uses_response_cache(backend: _FakeBackend) -> None:
+    client = GeminiClient(api_key="test", image_model="img-model", response_cache=ResponseCache())
+    part = client.build_image_part(image_base64="ZG9n")
+
+    first = client.generate_json("compare", parts=[part])
+    second = client.generate_json("compare", parts=[part])
+    third = client.generate_json("compare", parts=[part], temperature=0.9)
+
+    assert first == second == {"model": "img-model", "call": 1}
+    assert third["call"] == 2
+    assert backend.calls == ["img-model", "img-model"]
+
+
+def test_async_client_shares_request_pipeline(backend: _FakeBackend) -> None:
+    cache = ResponseCache()
+    client = AsyncGeminiClient(api_key="test", video_model="vid-model", response_cache=cache)
+
+    async def run() -> list[dict[str, Any]]:
+        return [await client.generate_json("describe", model="video") for _ in range(2)]
+
+    results = asyncio.run(run())
+
+    assert results[0] == results[1] == {"model": "vid-model", "call": 1}
+    assert cache.stats()["hits"] == 1
+
+
+def test_async_client_keeps_cache_io_off_the_event_loop(backend: _FakeBackend) -> None:
+    threads: list[int] = []
+
+    class _RecordingCache(ResponseCache):
+        def get(self, key: str) -> Any:
+            threads.append(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key: str, value: dict[str, Any]) -> None:
+            threads.append(threading.get_ident())
+            super().set(key, value)
+
+    client = AsyncGeminiClient(api_key="test", response_cache=_RecordingCache())
+
+    async def run() -> int:
+        await client.generate_json("describe")
+        await client.generate_json("describe")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+
+    assert len(threads) == 3
+    assert loop_thread not in threads
+
+
+def test_generate_json_retries_transient_errors(backend: _FakeBackend) -> None:
+    backend.failures = [ConnectionError("reset"), ConnectionError("reset")]
+    limiter = QuotaRateLimiter(sleep=lambda seconds: None)
+    client = GeminiClient(
+        api_key="test",
+        image_model="img-model",
+        rate_limiter=limiter,
+        retry_policy=RetryPolicy(base_delay_seconds=0.01),
+    )
+
+    assert client.generate_json("compare") == {"model": "img-model", "call": 3}
+    assert limiter.stats()["retries"] == 2
+
+
+def test_uploaded_videos_are_reused_by_content(backend: _FakeBackend, tmp_path) -> None:
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"fake-mp4-bytes")
+    registry = UploadedFileRegistry(_database(tmp_path))
+    client = GeminiClient(api_key="test", upload_registry=registry)
+
+    first = client.upload_video(str(video), preprocess_seconds=0)
+    client.release_uploaded_file(first)
+    second = client.upload_video(str(video), preprocess_seconds=0)
+
+    assert second.name == first.name
+    assert backend.uploads == 1
+    assert first.name in backend.files
+
+    # Gone remotely: evicted and uploaded again.
+    backend.files.clear()
+    third = client.upload_video(str(video), preprocess_seconds=0)
+    assert backend.uploads == 2
+
+    # Explicit deletion evicts the registry entry as well.
+    client.delete_uploaded_file(third)
+    client.upload_video(str(video), preprocess_seconds=0)
+    assert backend.uploads == 3
+    assert registry.stats()["evictions"] == 2
+
+
+def test_upload_registry_expires_entries_before_the_file_does(tmp_path) -> None:
+    now = [1000.0]
+    registry = UploadedFileRegistry(_database(tmp_path), min_remaining_seconds=60, clock=lambda: now[0])
+    registry.register("clip", file_name="files/a", expires_at=1200.0)
+
+    assert registry.lookup("clip").file_name == "files/a"
+    now[0] = 1150.0
+    assert registry.lookup("clip") is None
+    assert registry.stats()["expirations"] == 1
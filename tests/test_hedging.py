@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import threading
+import time
+
+from app.ai import HedgingPolicy
+
+
+def _warm(policy: HedgingPolicy, model: str, seconds: float, samples: int) -> None:
+    for _ in range(samples):
+        policy.latencies.record(model, seconds)
+
+
+def test_no_hedge_until_enough_samples() -> None:
+    policy = HedgingPolicy(min_samples=5, max_hedge_ratio=1.0)
+    assert policy.hedge_delay("flash") is None
+    assert policy.run("flash", lambda: "ok") == "ok"
+    assert policy.stats()["hedges"] == 0
+
+
+def test_slow_primary_is_hedged_and_hedge_wins() -> None:
+    policy = HedgingPolicy(min_samples=5, max_hedge_ratio=1.0, min_delay_seconds=0.01)
+    _warm(policy, "flash", 0.01, 10)
+    counter = itertools.count()
+    release = threading.Event()
+
+    def call() -> str:
+        attempt = next(counter)
+        if attempt == 0:
+            release.wait(2)
+            return "primary"
+        return "hedge"
+
+    try:
+        assert policy.run("flash", call) == "hedge"
+    finally:
+        release.set()
+    stats = policy.stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_hedge_budget_caps_extra_requests() -> None:
+    policy = HedgingPolicy(percentile=50, min_samples=1, max_hedge_ratio=0.5, min_delay_seconds=0.001)
+    _warm(policy, "flash", 0.001, 50)
+
+    def call() -> str:
+        time.sleep(0.01)
+        return "ok"
+
+    for _ in range(6):
+        policy.run("flash", call, can_hedge=lambda: True)
+
+    stats = policy.stats()
+    assert stats["hedges"] == 3
+    assert stats["hedges_denied"] == 3
+
+
+def test_async_hedge_cancels_the_loser() -> None:
+    policy = HedgingPolicy(min_samples=5, max_hedge_ratio=1.0, min_delay_seconds=0.01)
+    _warm(policy, "flash", 0.01, 10)
+    cancelled: list[bool] = []
+    counter = itertools.count()
+
+    async def call() -> str:
+        attempt = next(counter)
+        try:
+            await asyncio.sleep(5 if attempt == 0 else 0.001)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return f"attempt-{attempt}"
+
+    async def run() -> str:
+        result = await policy.run_async("flash", call)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == "attempt-1"
+    assert cancelled == [True]
+
+
+def test_no_hedge_without_a_free_worker_or_after_close() -> None:
+    policy = HedgingPolicy(min_samples=5, max_hedge_ratio=1.0, min_delay_seconds=0.01, max_hedges=0)
+    _warm(policy, "flash", 0.01, 10)
+
+    def call() -> str:
+        time.sleep(0.05)
+        return "primary"
+
+    assert policy.run("flash", call) == "primary"
+    stats = policy.stats()
+    assert stats["hedges"] == 0
+    assert stats["hedges_no_worker"] == 1
+
+    policy = HedgingPolicy(min_samples=5, max_hedge_ratio=1.0, min_delay_seconds=0.01)
+    _warm(policy, "flash", 0.01, 10)
+    policy.close()
+    assert policy.run("flash", call) == "primary"
+    assert policy.stats()["hedges"] == 0
+
+
+def test_sync_attempts_share_a_bounded_pool() -> None:
+    policy = HedgingPolicy(min_samples=5, max_hedge_ratio=1.0, min_delay_seconds=0.01, max_workers=2, max_hedges=1)
+    _warm(policy, "flash", 0.01, 10)
+    release = threading.Event()
+    results: list[str] = []
+
+    def call() -> str:
+        release.wait(2)
+        return "ok"
+
+    callers = [threading.Thread(target=lambda: results.append(policy.run("flash", call))) for _ in range(4)]
+    for caller in callers:
+        caller.start()
+    time.sleep(0.2)
+    pool_threads = [thread for thread in threading.enumerate() if thread.name.startswith("gemini-hedging")]
+    release.set()
+    for caller in callers:
+        caller.join()
+
+    assert results == ["ok"] * 4
+    assert len(pool_threads) <= 2
+    stats = policy.stats()
+    assert stats["primaries_inline"] >= 2
+    assert stats["hedges"] + stats["hedges_no_worker"] >= 1
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import base64
+import os
+import sqlite3
+
+import pytest
+
+from app.ai import MockGeminiClient, StrayDogReport
+from app.ai.image_payload import decode_base64_image
+from app.db.sqlite import SQLiteDatabase
+from app.repositories.ai_repositories import SQLiteStrayReportRepository
+
+
+def test_decoder_matches_b64decode_across_chunks() -> None:
+    data = os.urandom(200_000)
+    # MIME line breaks every 76 chars put whitespace on both sides of chunk boundaries.
+    payload = "data:image/jpeg;base64," + base64.encodebytes(data).decode("ascii")
+
+    assert decode_base64_image(payload) == data
+    assert decode_base64_image("  " + base64.b64encode(b"same-dog").decode("ascii") + "\n") == b"same-dog"
+
+
+def test_decoder_strictness() -> None:
+    with pytest.raises(ValueError):
+        decode_base64_image("c2Ft$ZS1kb2c=")
+    with pytest.raises(ValueError):
+        decode_base64_image("c2FtZS1kb2")
+    with pytest.raises(ValueError):
+        decode_base64_image("c2Fm=ZS1kb2c=")
+    # An invalid character past the first chunk is still rejected.
+    with pytest.raises(ValueError):
+        decode_base64_image(base64.b64encode(os.urandom(100_000)).decode("ascii") + "#AAA")
+
+    assert decode_base64_image("c2Ft$ZS1kb2c", validate=False) == b"same-dog"
+
+
+def test_build_image_part_accepts_raw_bytes() -> None:
+    client = MockGeminiClient()
+    view = memoryview(b"same-dog")
+
+    part = client.build_image_part(image_bytes=view, mime_type="image/png")
+
+    assert part["data"] is view
+    assert part["mime_type"] == "image/png"
+    with pytest.raises(ValueError):
+        client.build_image_part(image_bytes=b"same-dog", image_path="dog.jpg")
+
+
+def test_report_images_are_stored_as_blobs(tmp_path) -> None:
+    db_path = tmp_path / "legacy.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE stray_dog_reports (
+                report_id TEXT PRIMARY KEY,
+                image_path TEXT,
+                image_base64 TEXT,
+                latitude REAL,
+                longitude REAL,
+                reported_at TEXT,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute("INSERT INTO stray_dog_reports (report_id, image_base64) VALUES ('old', 'b2xk')")
+    db = SQLiteDatabase(str(db_path))
+    db.initialize()
+    repository = SQLiteStrayReportRepository(db)
+
+    repository.upsert_report(StrayDogReport(report_id="new", image_bytes=bytearray(b"new-dog")))
+
+    reports = {report.report_id: report for report in repository.list_reports()}
+    assert reports["new"].image_bytes == b"new-dog"
+    assert reports["new"].image_base64 is None
+    assert reports["old"].image_base64 == "b2xk"
+    assert reports["old"].image_bytes is None
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import struct
+
+import pytest
+
+from app.ai import ImagePreprocessor, MockGeminiClient
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    gradient = np.linspace(0, 255, width, dtype=np.uint8)
+    image = np.dstack([np.tile(gradient, (height, 1))] * 3)
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 100])
+    assert ok
+    return encoded.tobytes()
+
+
+def _with_exif_orientation(jpeg: bytes, orientation: int) -> bytes:
+    tiff = b"MM\x00\x2a\x00\x00\x00\x08" + struct.pack(">H", 1)
+    tiff += struct.pack(">HHIHH", 0x0112, 3, 1, orientation, 0) + struct.pack(">I", 0)
+    payload = b"Exif\x00\x00" + tiff
+    app1 = b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+    return jpeg[:2] + app1 + jpeg[2:]
+
+
+def _size(data: bytes) -> tuple[int, int]:
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    return image.shape[1], image.shape[0]
+
+
+def test_downscales_to_max_edge_and_reencodes() -> None:
+    preprocessor = ImagePreprocessor(max_edge=512, quality=80)
+    original = _jpeg(2000, 1000)
+
+    result = preprocessor.process(original, "image/jpeg")
+
+    assert result.resized
+    assert result.mime_type == "image/jpeg"
+    assert _size(result.data) == (512, 256)
+    assert result.bytes_saved > 0
+    assert preprocessor.stats()["bytes_saved"] == result.bytes_saved
+
+
+def test_applies_exif_orientation_and_strips_metadata() -> None:
+    rotated = _with_exif_orientation(_jpeg(400, 200), orientation=6)
+
+    result = ImagePreprocessor(max_edge=1024, output_format="webp").process(rotated)
+
+    assert result.mime_type == "image/webp"
+    assert _size(result.data) == (200, 400)
+    assert b"Exif" not in result.data
+
+
+def test_undecodable_payload_passes_through() -> None:
+    preprocessor = ImagePreprocessor()
+    client = MockGeminiClient(image_preprocessor=preprocessor)
+
+    part = client.build_image_part(image_base64="c2FtZS1kb2c=")
+
+    assert part == {"mime_type": "image/jpeg", "data": b"same-dog"}
+    assert preprocessor.stats()["passthrough"] == 1
+
+
+def test_keeps_original_when_reencode_is_not_smaller() -> None:
+    image = np.full((64, 64, 3), 128, dtype=np.uint8)
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 10])
+    assert ok
+    original = encoded.tobytes()
+    preprocessor = ImagePreprocessor(quality=100)
+
+    result = preprocessor.process(original, "image/jpeg")
+
+    assert result.data is original
+    assert result.bytes_saved == 0
+    assert preprocessor.stats()["passthrough"] == 1
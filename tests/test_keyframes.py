@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.ai import KeyframeSampler, MockGeminiClient, VideoAnalyzer
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+
+def _write_video(path: Path, *, frames: int = 60, fps: float = 10.0, still_frames: int = 30) -> Path:
+    """A square that sits still for `still_frames` frames, then moves across the frame."""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (160, 120))
+    assert writer.isOpened()
+    for index in range(frames):
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        x = 10 if index < still_frames else 10 + (index - still_frames) * 4
+        cv2.rectangle(frame, (x, 40), (x + 30, 70), (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+class _RecordingClient(MockGeminiClient):
+    def __init__(self) -> None:
+        super().__init__()
+        self.uploads = 0
+        self.parts: list = []
+
+    def upload_video(self, video_path: str, *, preprocess_seconds=10):
+        self.uploads += 1
+        return super().upload_video(video_path, preprocess_seconds=preprocess_seconds)
+
+    def generate_json(self, prompt, *, parts=None, **kwargs):
+        self.parts = list(parts or [])
+        return super().generate_json(prompt, parts=parts, **kwargs)
+
+
+def test_uniform_sampling_spreads_frames_over_the_window(tmp_path) -> None:
+    video = _write_video(tmp_path / "clip.mp4")
+
+    keyframes = KeyframeSampler(count=4).sample(video, max_seconds=4)
+
+    assert [frame.index for frame in keyframes] == [5, 15, 25, 35]
+    assert keyframes[1].timestamp_seconds == pytest.approx(1.5)
+    assert all(frame.data[:2] == b"\xff\xd8" for frame in keyframes)
+
+
+def test_motion_sampling_favours_moving_stretches(tmp_path) -> None:
+    video = _write_video(tmp_path / "clip.mp4")
+
+    keyframes = KeyframeSampler(count=6, strategy="motion").sample(video)
+
+    moving = [frame for frame in keyframes if frame.index >= 30]
+    assert len(moving) >= 5
+
+
+def test_keyframe_mode_skips_the_upload(tmp_path) -> None:
+    video = _write_video(tmp_path / "clip.mp4")
+    client = _RecordingClient()
+    analyzer = VideoAnalyzer(client, keyframe_sampler=KeyframeSampler(count=3))
+
+    result = analyzer.analyze_video(str(video), mode="keyframes")
+
+    assert client.uploads == 0
+    assert result["play_preference"] == "chase"
+    assert client.parts[0] == "Frame 1 at 1.00s"
+    assert [part["mime_type"] for part in client.parts[1::2]] == ["image/jpeg"] * 3
+
+    analyzer.analyze_video(str(video))
+    assert client.uploads == 1
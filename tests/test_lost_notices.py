@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.ai import (
+    AsyncMockGeminiClient,
+    GeoLocation,
+    LostDogNotice,
+    StandingNotice,
+    StandingNoticeMatcher,
+    StrayDogReport,
+)
+from app.db.sqlite import SQLiteDatabase
+from app.repositories.ai_repositories import SQLiteLostNoticeRepository
+
+
+LOST_AT = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+CENTER = GeoLocation(latitude=25.033, longitude=121.565)
+
+
+def _repository(tmp_path, *, rtree: bool = True) -> SQLiteLostNoticeRepository:
+    db = SQLiteDatabase(str(tmp_path / "notices.db"))
+    db.initialize()
+    if not rtree:
+        db.rtree_enabled = False
+    return SQLiteLostNoticeRepository(db)
+
+
+def _standing(notice_id: str, location, lost_at, radius_km: float = 5.0) -> StandingNotice:
+    return StandingNotice(
+        notice_id=notice_id,
+        notice=LostDogNotice(image_bytes=b"dog", lost_at=lost_at, location=location),
+        owner_id=f"owner_{notice_id}",
+        max_distance_km=radius_km,
+        max_time_gap_hours=72,
+    )
+
+
+@pytest.mark.parametrize("rtree", [True, False])
+def test_find_notices_for_report_checks_area_and_window(tmp_path, rtree: bool) -> None:
+    repository = _repository(tmp_path, rtree=rtree)
+    # ~3.3 km north of CENTER: inside a 5 km radius but outside a 1 km one.
+    nearby = GeoLocation(latitude=CENTER.latitude + 0.03, longitude=CENTER.longitude)
+    repository.upsert_notice(_standing("near", CENTER, LOST_AT))
+    repository.upsert_notice(_standing("tight", CENTER, LOST_AT, radius_km=1.0))
+    repository.upsert_notice(_standing("old", CENTER, LOST_AT - timedelta(days=30)))
+    repository.upsert_notice(_standing("far", GeoLocation(latitude=26.0, longitude=121.565), LOST_AT))
+    repository.upsert_notice(_standing("anywhere", None, None))
+    repository.upsert_notice(_standing("closed", CENTER, LOST_AT))
+    assert repository.close_notice("closed")
+    assert not repository.close_notice("closed")
+
+    report = StrayDogReport(report_id="rep_new", location=nearby, reported_at=LOST_AT + timedelta(hours=5))
+    found = repository.find_notices_for_report(report)
+
+    assert sorted(standing.notice_id for standing in found) == ["anywhere", "near"]
+    near = next(standing for standing in found if standing.notice_id == "near")
+    assert near.owner_id == "owner_near"
+    assert near.notice.image_bytes == b"dog"
+    assert near.notice.location == CENTER
+
+    unplaced = StrayDogReport(report_id="rep_unplaced")
+    assert len(repository.find_notices_for_report(unplaced)) == 5
+
+
+
+def test_ownerless_standing_notice_match_is_logged_not_notified(caplog) -> None:
+    notified: list[dict] = []
+
+    class _Notifier:
+        def notify_possible_match(self, **kwargs) -> None:
+            notified.append(kwargs)
+
+    standing = StandingNotice(
+        notice_id="notice_ownerless",
+        notice=LostDogNotice(image_bytes=b"same-dog", lost_at=LOST_AT, location=CENTER),
+    )
+    matcher = StandingNoticeMatcher(AsyncMockGeminiClient(), lambda report: [standing], notifier=_Notifier())
+    report = StrayDogReport(report_id="rep_near", image_bytes=b"same-dog", reported_at=LOST_AT, location=CENTER)
+
+    with caplog.at_level(logging.INFO, logger="app.ai.standing_notices"):
+        results = asyncio.run(matcher.match_new_report(report))
+
+    assert results["notice_ownerless"]["is_match"]
+    assert notified == []
+    assert "notice_ownerless" in caplog.text
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("AI_MOCK_MODE", "1")
+    monkeypatch.setenv("MATCH_JOB_WORKERS", "0")
+    monkeypatch.setenv("MATCH_ATTRIBUTE_TAGGING", "1")
+    monkeypatch.setenv("MATCH_PRUNING_RULES", "size,age_group,coat_color")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "goodle-test.db"))
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.main import create_app
+
+    with TestClient(create_app()) as test_client:
+        yield test_client
+
+    get_settings.cache_clear()
+
+
+def test_new_stray_report_notifies_standing_notice_owner(client: TestClient) -> None:
+    same = "data:image/jpeg;base64," + base64.b64encode(b"same-dog").decode("utf-8")
+    location = {"latitude": CENTER.latitude, "longitude": CENTER.longitude}
+    created = client.post(
+        "/api/ai/lost-notices",
+        json={
+            "notice_id": "notice_001",
+            "owner_id": "owner_001",
+            "notice_image_base64": same,
+            "lost_at": LOST_AT.isoformat(),
+            "location": location,
+        },
+    )
+    assert created.status_code == 200
+    assert [item["notice_id"] for item in client.get("/api/ai/lost-notices").json()["data"]] == ["notice_001"]
+
+    far_away = {"latitude": 26.0, "longitude": CENTER.longitude}
+    client.post(
+        "/api/ai/stray-reports",
+        json={"report_id": "rep_far", "image_base64": same, "reported_at": LOST_AT.isoformat(), "location": far_away},
+    )
+    assert client.get("/api/ai/notifications").json()["data"] == []
+
+    client.post(
+        "/api/ai/stray-reports",
+        json={"report_id": "rep_near", "image_base64": same, "reported_at": LOST_AT.isoformat(), "location": location},
+    )
+    notifications = client.get("/api/ai/notifications").json()["data"]
+    assert len(notifications) == 1
+    assert notifications[0]["owner_id"] == "owner_001"
+
+    # Re-posting the same image (here with a new timestamp) is not matched again,
+    # and a repeat match for the same notice and report is not stored twice.
+    client.post(
+        "/api/ai/stray-reports",
+        json={
+            "report_id": "rep_near",
+            "image_base64": same,
+            "reported_at": (LOST_AT + timedelta(hours=1)).isoformat(),
+            "location": location,
+        },
+    )
+    notifier = client.app.state.match_notifier
+    notifier.notify_possible_match("owner_001", ["rep_near"], 90.0, notice_id="notice_001")
+    assert len(client.get("/api/ai/notifications").json()["data"]) == 1
+
+    assert client.delete("/api/ai/lost-notices/notice_001").status_code == 200
+    assert client.get("/api/ai/lost-notices").json()["data"] == []
+    assert client.delete("/api/ai/lost-notices/notice_001").status_code == 404
+
+
+def test_report_tags_are_backfilled_after_the_upsert(client: TestClient) -> None:
+    image = base64.b64encode(b"same-dog").decode("utf-8")
+    repository = client.app.state.stray_report_repository
+
+    client.post("/api/ai/stray-reports", json={"report_id": "rep_tagged", "image_base64": image})
+    (tagged,) = repository.list_reports()
+    assert tagged.attributes is not None
+
+    # Moving the report keeps the tags of its unchanged image.
+    moved = {"latitude": CENTER.latitude, "longitude": CENTER.longitude}
+    client.post("/api/ai/stray-reports", json={"report_id": "rep_tagged", "image_base64": image, "location": moved})
+    (kept,) = repository.list_reports()
+    assert kept.location == CENTER
+    assert kept.attributes == tagged.attributes
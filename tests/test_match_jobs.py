@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.ai import MatchJobWorkerPool
+from app.api.ai_routes import _merge_retry
+from app.db.sqlite import SQLiteDatabase
+from app.repositories.ai_repositories import SQLiteMatchJobRepository
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _repository(tmp_path, clock=time.time) -> SQLiteMatchJobRepository:
+    db = SQLiteDatabase(str(tmp_path / "jobs.db"))
+    db.initialize()
+    return SQLiteMatchJobRepository(db, clock=clock)
+
+
+def test_lapsed_lease_hands_the_job_to_another_worker(tmp_path) -> None:
+    clock = _Clock()
+    repository = _repository(tmp_path, clock)
+    job_id = repository.enqueue({"notice_image_path": "notice.jpg"})
+
+    first = repository.claim("worker-a", lease_seconds=60, max_attempts=3)
+    assert first is not None and first.job_id == job_id and first.attempts == 1
+    assert repository.claim("worker-b", lease_seconds=60, max_attempts=3) is None
+
+    clock.now += 61
+    second = repository.claim("worker-b", lease_seconds=60, max_attempts=3)
+    assert second is not None and second.attempts == 2
+
+    # The first worker lost its lease, so its late result is ignored.
+    repository.complete(job_id, "worker-a", {"is_match": False}, run_seconds=5)
+    assert repository.get(job_id).status == "running"
+
+    repository.update_progress(job_id, "worker-b", 3, 4, lease_seconds=60)
+    clock.now += 2
+    repository.complete(job_id, "worker-b", {"is_match": True}, run_seconds=2)
+    job = repository.get(job_id)
+    assert job.status == "succeeded"
+    assert job.result == {"is_match": True}
+    assert job.to_dict()["progress"] == {"done": 3, "total": 4}
+    assert job.to_dict()["timing"]["queue_seconds"] == 0
+    assert repository.stats()["succeeded"] == 1
+
+
+
+def test_lapsed_lease_on_the_last_attempt_fails_the_job(tmp_path) -> None:
+    clock = _Clock()
+    repository = _repository(tmp_path, clock)
+    job_id = repository.enqueue({})
+
+    assert repository.claim("worker-a", lease_seconds=60, max_attempts=1) is not None
+    clock.now += 61
+    assert repository.claim("worker-b", lease_seconds=60, max_attempts=1) is None
+
+    job = repository.get(job_id)
+    assert job.status == "failed"
+    assert job.attempts == 1
+    assert job.error == "lease lapsed after 1 attempts"
+    assert repository.stats()["failed"] == 1
+
+
+def test_pool_retries_a_failing_job(tmp_path) -> None:
+    repository = _repository(tmp_path)
+    job_id = repository.enqueue({})
+    calls: list[int] = []
+
+    async def run_job(job, progress):
+        calls.append(job.attempts)
+        await progress(1, 2)
+        if job.attempts == 1:
+            raise RuntimeError("upstream unavailable")
+        return {"is_match": False}
+
+    async def scenario() -> None:
+        pool = MatchJobWorkerPool(repository, run_job, poll_interval_seconds=0.01, retry_delay_seconds=0)
+        pool.start()
+        for _ in range(200):
+            if repository.get(job_id).status == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+    job = repository.get(job_id)
+    assert calls == [1, 2]
+    assert job.status == "succeeded"
+    assert job.error is None
+    assert job.attempts == 2
+
+
+
+def test_pool_throttles_progress_writes(tmp_path) -> None:
+    repository = _repository(tmp_path)
+    job_id = repository.enqueue({})
+    writes: list[tuple[int, int]] = []
+    update_progress = repository.update_progress
+
+    def counting(job_id: str, worker_id: str, done: int, total: int, *, lease_seconds: float) -> None:
+        writes.append((done, total))
+        update_progress(job_id, worker_id, done, total, lease_seconds=lease_seconds)
+
+    repository.update_progress = counting  # type: ignore[method-assign]
+
+    async def run_job(job, progress):
+        for done in range(51):
+            await progress(done, 50)
+        return {"is_match": False}
+
+    async def scenario() -> None:
+        pool = MatchJobWorkerPool(repository, run_job, poll_interval_seconds=0.01, progress_interval_seconds=60)
+        pool.start()
+        for _ in range(200):
+            if repository.get(job_id).status == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+    assert writes == [(0, 50), (50, 50)]
+    assert repository.get(job_id).to_dict()["progress"] == {"done": 50, "total": 50}
+
+
+def test_retry_merge_keeps_ids_from_both_attempts() -> None:
+    first = {
+        "is_match": True,
+        "similarity_score": 90.0,
+        "matched_report_ids": ["rep_a"],
+        "failed_report_ids": ["rep_b", "rep_c"],
+        "escalated_report_ids": ["rep_a"],
+        "batched_report_ids": ["rep_a", "rep_d"],
+    }
+    retried = {
+        "is_match": True,
+        "similarity_score": 80.0,
+        "matched_report_ids": ["rep_b"],
+        "failed_report_ids": ["rep_c"],
+        "escalated_report_ids": ["rep_b"],
+        "cached_report_ids": ["rep_b"],
+    }
+
+    merged = _merge_retry(first, retried)
+
+    assert merged["matched_report_ids"] == ["rep_a", "rep_b"]
+    assert merged["escalated_report_ids"] == ["rep_a", "rep_b"]
+    assert merged["batched_report_ids"] == ["rep_a", "rep_d"]
+    assert merged["cached_report_ids"] == ["rep_b"]
+    assert merged["failed_report_ids"] == ["rep_c"]
+    assert merged["similarity_score"] == 90.0
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("AI_MOCK_MODE", "1")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "goodle-test.db"))
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    from app.main import create_app
+
+    with TestClient(create_app()) as test_client:
+        yield test_client
+
+    get_settings.cache_clear()
+
+
+def test_background_match_job_runs_to_completion(client: TestClient) -> None:
+    same = "data:image/jpeg;base64," + base64.b64encode(b"same-dog").decode("utf-8")
+    client.post("/api/ai/stray-reports", json={"report_id": "rep_001", "image_base64": same})
+
+    queued = client.post(
+        "/api/ai/match-lost-dog",
+        json={"owner_id": "owner_001", "notice_image_base64": same, "background": True},
+    )
+    assert queued.status_code == 200
+    job_id = queued.json()["data"]["job_id"]
+
+    for _ in range(200):
+        job = client.get(f"/api/ai/match-jobs/{job_id}").json()["data"]
+        if job["status"] in ("succeeded", "failed"):
+            break
+        time.sleep(0.02)
+
+    assert job["status"] == "succeeded"
+    assert job["result"]["matched_report_ids"] == ["rep_001"]
+    assert job["progress"] == {"done": 1, "total": 1}
+    assert client.get("/api/ai/notifications").json()["data"][0]["owner_id"] == "owner_001"
+    assert client.get("/api/ai/match-jobs/missing").status_code == 404
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import pytest
+from google.genai import errors
+
+from app.ai import QuotaRateLimiter, RetryPolicy
+from app.ai.rate_limiter import call_with_retry, estimate_request_tokens, retry_after_seconds
+
+
+class _FakeTime:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _quota_error(retry_delay: str = "7s") -> errors.APIError:
+    return errors.ClientError(
+        429,
+        {
+            "error": {
+                "code": 429,
+                "status": "RESOURCE_EXHAUSTED",
+                "message": "Quota exceeded",
+                "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": retry_delay}],
+            }
+        },
+    )
+
+
+def _limiter(fake: _FakeTime, **kwargs: float) -> QuotaRateLimiter:
+    return QuotaRateLimiter(clock=fake.clock, sleep=fake.sleep, **kwargs)
+
+
+def test_request_bucket_spaces_calls_at_quota() -> None:
+    fake = _FakeTime()
+    limiter = _limiter(fake, requests_per_minute=60)
+
+    for _ in range(62):
+        limiter.acquire("gemini-flash")
+
+    assert fake.now == pytest.approx(2.0)
+    assert limiter.stats()["throttled"] == 2
+
+
+def test_token_bucket_is_tracked_per_model() -> None:
+    fake = _FakeTime()
+    limiter = _limiter(fake, tokens_per_minute=600)
+
+    assert limiter.reserve("flash", 600) == 0
+    assert limiter.reserve("flash", 300) == pytest.approx(30.0)
+    assert limiter.reserve("pro", 300) == 0
+
+
+def test_retry_honours_server_hint_then_succeeds() -> None:
+    fake = _FakeTime()
+    limiter = _limiter(fake)
+    attempts: list[int] = []
+
+    def call() -> str:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _quota_error("7s")
+        return "ok"
+
+    result = call_with_retry(call, policy=RetryPolicy(base_delay_seconds=0.5), limiter=limiter, model="flash")
+
+    assert result == "ok"
+    assert len(attempts) == 3
+    assert all(7.0 <= delay <= 7.5 for delay in fake.sleeps)
+    assert limiter.stats()["retries"] == 2
+    assert limiter.stats()["server_backoffs"] == 2
+
+
+def test_retry_budget_stops_retrying() -> None:
+    fake = _FakeTime()
+    limiter = _limiter(fake)
+
+    def call() -> str:
+        raise _quota_error("40s")
+
+    with pytest.raises(errors.ClientError):
+        call_with_retry(call, policy=RetryPolicy(total_budget_seconds=60), limiter=limiter, model="flash")
+
+    assert len(fake.sleeps) == 1
+    assert limiter.stats()["retry_exhausted"] == 1
+
+
+def test_non_retryable_errors_propagate_immediately() -> None:
+    fake = _FakeTime()
+
+    def call() -> str:
+        raise ValueError("bad prompt")
+
+    with pytest.raises(ValueError):
+        call_with_retry(call, policy=RetryPolicy(), limiter=_limiter(fake), model="flash")
+    assert fake.sleeps == []
+
+
+def test_hint_and_token_estimate_helpers() -> None:
+    assert retry_after_seconds(_quota_error("12.5s")) == 12.5
+    assert retry_after_seconds(RuntimeError("boom")) is None
+    assert estimate_request_tokens("x" * 400, [{"mime_type": "image/jpeg", "data": b""}]) == 101 + 258
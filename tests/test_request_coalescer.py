@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.ai import RequestCoalescer
+
+
+def test_threads_share_one_upstream_call() -> None:
+    coalescer = RequestCoalescer()
+    calls: list[int] = []
+    started = threading.Event()
+
+    def upstream() -> dict:
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return {"similarity_score": 88}
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(coalescer.run, "key", upstream)
+        started.wait()
+        followers = [executor.submit(coalescer.run, "key", upstream) for _ in range(4)]
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert len(calls) == 1
+    assert all(result == {"similarity_score": 88} for result in results)
+    assert results[1] is not results[0]
+    assert coalescer.stats() == {"requests": 5, "upstream_calls": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_followers_receive_the_leader_exception() -> None:
+    coalescer = RequestCoalescer()
+    started = threading.Event()
+
+    def upstream() -> dict:
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("quota exhausted")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(coalescer.run, "key", upstream)
+        started.wait()
+        follower = executor.submit(coalescer.run, "key", upstream)
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="quota exhausted"):
+                future.result()
+
+    assert coalescer.stats()["upstream_calls"] == 1
+
+
+def test_async_callers_share_one_upstream_call() -> None:
+    coalescer = RequestCoalescer()
+    calls: list[str] = []
+
+    async def upstream(key: str) -> dict:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return {"key": key}
+
+    async def run() -> list[dict]:
+        return await asyncio.gather(
+            *(coalescer.run_async(key, lambda key=key: upstream(key)) for key in ["a", "a", "a", "b"])
+        )
+
+    results = asyncio.run(run())
+
+    assert sorted(calls) == ["a", "b"]
+    assert [result["key"] for result in results] == ["a", "a", "a", "b"]
+    assert coalescer.stats()["coalesced"] == 2
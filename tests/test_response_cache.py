@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from app.ai import MockGeminiClient, ResponseCache
+from app.ai.response_cache import request_fingerprint
+from app.db.sqlite import SQLiteDatabase
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _key(**overrides: object) -> str | None:
+    params: dict = {
+        "model_name": "gemini-flash-latest",
+        "prompt": "compare",
+        "parts": [{"mime_type": "image/jpeg", "data": b"dog"}],
+        "temperature": 0.2,
+        "max_output_tokens": 2048,
+    }
+    params.update(overrides)
+    return request_fingerprint(**params)
+
+
+def test_fingerprint_covers_every_request_field() -> None:
+    base = _key()
+    assert base is not None
+    assert _key() == base
+    assert _key(model_name="gemini-pro") != base
+    assert _key(prompt="compare again") != base
+    assert _key(parts=[{"mime_type": "image/jpeg", "data": b"cat"}]) != base
+    assert _key(temperature=0.3) != base
+    assert _key(max_output_tokens=1024) != base
+    assert _key(parts=[object()]) is None
+
+
+def test_memory_tier_evicts_by_bytes_and_expires() -> None:
+    clock = _Clock()
+    cache = ResponseCache(max_bytes=40, ttl_seconds=60, clock=clock)
+
+    cache.set("a", {"v": "x" * 10})
+    cache.set("b", {"v": "y" * 10})
+    assert cache.get("a") == {"v": "x" * 10}
+    cache.set("c", {"v": "z" * 10})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    clock.now += 61
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["expirations"] >= 1
+    assert stats["memory_hits"] == 2
+
+
+def test_disk_tier_survives_restart(tmp_path) -> None:
+    db = SQLiteDatabase(str(tmp_path / "cache.db"))
+    db.initialize()
+    ResponseCache(db=db).set("key", {"similarity_score": 91})
+
+    restarted = ResponseCache(db=db)
+    assert restarted.get("key") == {"similarity_score": 91}
+    assert restarted.get("key") == {"similarity_score": 91}
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.stats()["memory_hits"] == 1
+
+
+def test_mock_client_serves_repeats_from_cache() -> None:
+    cache = ResponseCache()
+    client = MockGeminiClient(response_cache=cache)
+    part = {"mime_type": "image/jpeg", "data": b"dog"}
+
+    first = client.generate_json("describe", parts=[part], temperature=0.3)
+    first["breed"] = "mutated by caller"
+    second = client.generate_json("describe", parts=[part], temperature=0.3)
+
+    assert second["breed"] != "mutated by caller"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import random
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.ai import DogAttributes, DogMatcher, GeoLocation, LostDogNotice, MockGeminiClient, StrayDogReport
+from app.db.sqlite import SQLiteDatabase
+from app.repositories.ai_repositories import SQLiteStrayReportRepository
+
+
+LOST_AT = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+CENTER = GeoLocation(latitude=25.033, longitude=121.565)
+
+
+def _repository(tmp_path, *, rtree: bool = True) -> SQLiteStrayReportRepository:
+    db = SQLiteDatabase(str(tmp_path / "reports.db"))
+    db.initialize()
+    if not rtree:
+        db.rtree_enabled = False
+    return SQLiteStrayReportRepository(db)
+
+
+def _seed(repository: SQLiteStrayReportRepository, count: int = 300) -> None:
+    rng = random.Random(7)
+    for index in range(count):
+        location = None
+        if index % 10:
+            location = GeoLocation(
+                latitude=CENTER.latitude + rng.uniform(-0.15, 0.15),
+                longitude=CENTER.longitude + rng.uniform(-0.15, 0.15),
+            )
+        reported_at = None if index % 7 == 0 else LOST_AT + timedelta(hours=rng.uniform(-150, 150))
+        repository.upsert_report(
+            StrayDogReport(
+                report_id=f"rep_{index:03d}",
+                image_bytes=b"dog",
+                reported_at=reported_at,
+                location=location,
+            )
+        )
+
+
+def _expected_ids(repository: SQLiteStrayReportRepository) -> list[str]:
+    matcher = DogMatcher(client=MockGeminiClient(), max_distance_km=5.0, max_time_gap_hours=72)
+    notice = LostDogNotice(lost_at=LOST_AT, location=CENTER)
+    return [
+        report.report_id
+        for report in repository.list_reports()
+        if matcher._passes_spatiotemporal_filter(notice, report)
+    ]
+
+
+@pytest.mark.parametrize("rtree", [True, False])
+def test_find_candidates_matches_python_filter(tmp_path, rtree: bool) -> None:
+    repository = _repository(tmp_path, rtree=rtree)
+    _seed(repository)
+
+    found = repository.find_candidates(location=CENTER, radius_km=5.0, around=LOST_AT, max_gap_hours=72)
+
+    expected = _expected_ids(repository)
+    assert 0 < len(expected) < 300
+    assert sorted(report.report_id for report in found) == sorted(expected)
+    assert all(report.image_bytes == b"dog" for report in found)
+
+
+def test_find_candidates_follows_moved_reports(tmp_path) -> None:
+    repository = _repository(tmp_path)
+    report = StrayDogReport(report_id="rep_moving", location=CENTER, reported_at=LOST_AT)
+    assert repository.upsert_report(report)
+    assert [item.report_id for item in repository.find_candidates(location=CENTER, radius_km=1.0)] == ["rep_moving"]
+
+    far_away = GeoLocation(latitude=CENTER.latitude + 1.0, longitude=CENTER.longitude)
+    assert not repository.upsert_report(StrayDogReport(report_id="rep_moving", location=far_away, reported_at=LOST_AT))
+    assert repository.find_candidates(location=CENTER, radius_km=1.0) == []
+    assert len(repository.find_candidates()) == 1
+
+
+
+def test_spatial_index_survives_vacuum(tmp_path) -> None:
+    repository = _repository(tmp_path)
+    places = {
+        f"rep_{index}": GeoLocation(latitude=CENTER.latitude + index, longitude=CENTER.longitude)
+        for index in range(4)
+    }
+    for report_id, location in places.items():
+        repository.upsert_report(StrayDogReport(report_id=report_id, location=location))
+    with repository.db.connection(write=True) as conn:
+        conn.execute("DELETE FROM stray_dog_reports WHERE report_id IN ('rep_0', 'rep_2')")
+        conn.execute("DELETE FROM stray_dog_reports_rtree WHERE id NOT IN (SELECT id FROM stray_dog_reports)")
+    with repository.db.connection() as conn:
+        conn.execute("VACUUM")
+        ids = [row[0] for row in conn.execute("SELECT id FROM stray_dog_reports ORDER BY id")]
+        indexed = [row[0] for row in conn.execute("SELECT id FROM stray_dog_reports_rtree ORDER BY id")]
+    # An explicit INTEGER PRIMARY KEY is never renumbered, so the R*Tree keys still match.
+    assert ids == indexed == [2, 4]
+
+    for report_id in ("rep_1", "rep_3"):
+        found = repository.find_candidates(location=places[report_id], radius_km=1.0)
+        assert [report.report_id for report in found] == [report_id]
+
+def test_initialize_backfills_index_columns(tmp_path) -> None:
+    db_path = tmp_path / "legacy.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE stray_dog_reports (
+                report_id TEXT PRIMARY KEY,
+                image_path TEXT,
+                image_base64 TEXT,
+                latitude REAL,
+                longitude REAL,
+                reported_at TEXT,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            "INSERT INTO stray_dog_reports (report_id, latitude, longitude, reported_at) VALUES (?, ?, ?, ?)",
+            ("old_near", CENTER.latitude, CENTER.longitude, (LOST_AT + timedelta(hours=2)).isoformat()),
+        )
+        conn.execute(
+            "INSERT INTO stray_dog_reports (report_id, latitude, longitude, reported_at) VALUES (?, ?, ?, ?)",
+            ("old_late", CENTER.latitude, CENTER.longitude, (LOST_AT + timedelta(days=30)).isoformat()),
+        )
+        # A malformed time leaves the report unindexed by time instead of failing the migration.
+        conn.execute(
+            "INSERT INTO stray_dog_reports (report_id, latitude, longitude, reported_at) VALUES (?, ?, ?, ?)",
+            ("old_garbled", CENTER.latitude + 1.0, CENTER.longitude, "last tuesday"),
+        )
+    db = SQLiteDatabase(str(db_path))
+    db.initialize()
+    repository = SQLiteStrayReportRepository(db)
+
+    found = repository.find_candidates(location=CENTER, radius_km=1.0, around=LOST_AT, max_gap_hours=72)
+
+    assert [report.report_id for report in found] == ["old_near"]
+    with db.connection() as conn:
+        assert [row[0] for row in conn.execute("SELECT id FROM stray_dog_reports_rtree ORDER BY id")] == [1, 2, 3]
+        garbled = conn.execute("SELECT reported_epoch FROM stray_dog_reports WHERE report_id = 'old_garbled'")
+        assert garbled.fetchone()[0] is None
+
+
+def test_attributes_round_trip(tmp_path) -> None:
+    repository = _repository(tmp_path)
+    tags = DogAttributes(size="small", age_group="puppy", colors=("brown", "white"), breed="beagle")
+    repository.upsert_report(StrayDogReport(report_id="rep_tagged", attributes=tags))
+    repository.upsert_report(StrayDogReport(report_id="rep_untagged"))
+
+    stored = {report.report_id: report.attributes for report in repository.list_reports()}
+
+    assert stored == {"rep_tagged": tags, "rep_untagged": None}
+
+
+def test_iter_reports_projects_columns_without_images(tmp_path) -> None:
+    repository = _repository(tmp_path)
+    _seed(repository, count=30)
+    repository.upsert_report(StrayDogReport(report_id="rep_no_image"))
+
+    listing = repository.iter_reports(("report_id", "has_image"), chunk_size=7)
+    rows = [next(listing)]
+    # Between pages the listing holds no pooled connection.
+    stats = repository.db.stats()
+    assert stats["idle_connections"] == stats["open_connections"]
+    rows.extend(listing)
+
+    assert len(rows) == 31
+    assert len({row["report_id"] for row in rows}) == 31
+    assert all(set(row) == {"report_id", "has_image"} for row in rows)
+    assert {row["report_id"] for row in rows if not row["has_image"]} == {"rep_no_image"}
+    assert repository.load_image("rep_003") == b"dog"
+    assert repository.load_image("rep_no_image") is None
+    assert repository.load_image("missing") is None
+    with pytest.raises(ValueError):
+        repository.iter_reports(("image_blob",))